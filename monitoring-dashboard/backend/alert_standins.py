@@ -0,0 +1,123 @@
+# monitoring-dashboard/backend/alert_standins.py
+"""
+Servidores locais que substituem o SMTP e a API do Telegram em testes
+
+Registram tudo o que recebem, sem enviar nada. Para usar com o dashboard:
+
+    python alert_standins.py            # SMTP em 1025, HTTP em 8025
+
+    ALERT_SMTP_HOST=localhost ALERT_SMTP_PORT=1025 ALERT_SMTP_SSL=0 \\
+    ALERT_EMAIL_FROM=monitor@localhost ALERT_EMAIL_TO=ops@localhost \\
+    TELEGRAM_BOT_TOKEN=teste TELEGRAM_CHAT_ID=1 \\
+    TELEGRAM_API_URL=http://localhost:8025 python test_dashboard.py
+
+As mensagens recebidas ficam em GET http://localhost:8025/messages.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Compartilhado pelos dois servidores
+RECEIVED = {"emails": [], "telegram": [], "smtp_connections": 0}
+
+
+class SMTPStandIn:
+    """SMTP mínimo (EHLO/HELO, MAIL, RCPT, DATA, NOOP, RSET, QUIT), sem TLS nem autenticação"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025):
+        self.host = host
+        self.port = port
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        RECEIVED["smtp_connections"] += 1
+
+        async def reply(line: str):
+            writer.write((line + "\r\n").encode())
+            await writer.drain()
+
+        await reply("220 localhost SMTP stand-in")
+        envelope = {"from": None, "to": []}
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                await reply("250 localhost")
+            elif verb == "MAIL":
+                envelope = {"from": command[10:].strip("<> "), "to": []}
+                await reply("250 OK")
+            elif verb == "RCPT":
+                envelope["to"].append(command[8:].strip("<> "))
+                await reply("250 OK")
+            elif verb == "DATA":
+                await reply("354 Fim com <CRLF>.<CRLF>")
+                body = []
+                while True:
+                    data = await reader.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    body.append(data.decode(errors="replace"))
+                RECEIVED["emails"].append({**envelope, "data": "".join(body), "received_at": time.time()})
+                await reply("250 OK")
+            elif verb in ("NOOP", "RSET"):
+                await reply("250 OK")
+            elif verb == "QUIT":
+                await reply("221 Bye")
+                break
+            else:
+                await reply("502 Comando não implementado")
+        writer.close()
+
+    async def serve(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+
+class TelegramStandIn(BaseHTTPRequestHandler):
+    """Aceita POST /bot<token>/sendMessage como a API do Telegram"""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        fields = parse_qs(self.rfile.read(length).decode())
+        RECEIVED["telegram"].append({
+            "path": self.path,
+            **{name: values[0] for name, values in fields.items()},
+            "received_at": time.time(),
+        })
+        self._json({"ok": True, "result": {"message_id": len(RECEIVED["telegram"])}})
+
+    def do_GET(self):
+        if self.path == "/messages":
+            self._json(RECEIVED)
+        else:
+            self.send_error(404)
+
+    def _json(self, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_http(host: str = "127.0.0.1", port: int = 8025) -> ThreadingHTTPServer:
+    """Iniciar o stand-in HTTP em uma thread daemon"""
+    server = ThreadingHTTPServer((host, port), TelegramStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    serve_http()
+    print("📨 SMTP em localhost:1025, Telegram em http://localhost:8025 (mensagens em /messages)")
+    asyncio.run(SMTPStandIn().serve())
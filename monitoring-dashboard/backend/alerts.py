@@ -1,57 +1,317 @@
-import smtplib
-import requests
-from email.mime.text import MimeText
-import logging
-
-class AlertSystem:
-    def __init__(self):
-        self.telegram_bot_token = "YOUR_BOT_TOKEN"
-        self.telegram_chat_id = "YOUR_CHAT_ID"
-        
-    def send_email_alert(self, subject, message, to_email):
-        """Envia alerta por email"""
-        try:
-            # Configuração do email (usando Gmail como exemplo)
-            msg = MimeText(message)
-            msg['Subject'] = subject
-            msg['From'] = 'your_email@gmail.com'
-            msg['To'] = to_email
-            
-            # Usar SMTP do Gmail
-            with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-                server.login('your_email@gmail.com', 'your_app_password')
-                server.send_message(msg)
-            
-            logging.info(f"📧 Alerta enviado por email para {to_email}")
-        except Exception as e:
-            logging.error(f"Erro ao enviar email: {e}")
-    
-    def send_telegram_alert(self, message):
-        """Envia alerta para Telegram"""
-        try:
-            url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
-            data = {
-                "chat_id": self.telegram_chat_id,
-                "text": f"🚨 ALERTA DO SERVIDOR:\n{message}",
-                "parse_mode": "Markdown"
-            }
-            requests.post(url, data=data)
-            logging.info("📱 Alerta enviado para Telegram")
-        except Exception as e:
-            logging.error(f"Erro ao enviar para Telegram: {e}")
-    
-    def check_and_alert(self, metrics):
-        """Verifica métricas e envia alertas se necessário"""
-        alerts = []
-        
-        if metrics["cpu"]["percent"] > 85:
-            alert_msg = f"🚨 CRÍTICO: CPU em {metrics['cpu']['percent']}%"
-            alerts.append(alert_msg)
-            self.send_telegram_alert(alert_msg)
-            
-        if metrics["memory"]["percent"] > 90:
-            alert_msg = f"🚨 CRÍTICO: Memória em {metrics['memory']['percent']}%"
-            alerts.append(alert_msg)
-            self.send_telegram_alert(alert_msg)
-            
-        return alerts
+# monitoring-dashboard/backend/alerts.py
+import asyncio
+import logging
+import os
+import smtplib
+import threading
+import time
+from collections import deque
+from email.mime.text import MIMEText
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import requests
+
+from sampler import STATUS_THRESHOLDS, status_for
+
+logger = logging.getLogger(__name__)
+
+LABELS = {"cpu": "CPU", "memory": "Memória", "disk": "Disco"}
+SEVERITY_LABELS = {"warning": "⚠️ ALERTA", "critical": "🚨 CRÍTICO"}
+
+
+class Alert(NamedTuple):
+    metric: str
+    severity: str
+    value: float
+    message: str
+    timestamp: float
+
+
+class AlertSystem:
+    """
+    Envio de alertas por Telegram e email
+
+    A sessão HTTP e a conexão SMTP são criadas uma vez e reaproveitadas;
+    se o servidor SMTP fechar a conexão ociosa, ela é reaberta no envio
+    seguinte. Canais sem configuração são ignorados. Os envios bloqueiam:
+    no app, quem chama é o AlertDispatcher, fora do event loop.
+    """
+
+    def __init__(self):
+        self.telegram_bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
+        self.telegram_chat_id = os.getenv("TELEGRAM_CHAT_ID")
+        # Base da API configurável para apontar para um servidor local em testes
+        self.telegram_api = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+
+        self.smtp_host = os.getenv("ALERT_SMTP_HOST", "smtp.gmail.com")
+        self.smtp_port = int(os.getenv("ALERT_SMTP_PORT", 465))
+        self.smtp_ssl = os.getenv("ALERT_SMTP_SSL", "1") == "1"
+        self.smtp_user = os.getenv("ALERT_SMTP_USER")
+        self.smtp_password = os.getenv("ALERT_SMTP_PASSWORD")
+        self.email_from = os.getenv("ALERT_EMAIL_FROM", self.smtp_user or "")
+        self.email_to = os.getenv("ALERT_EMAIL_TO")
+
+        self.timeout = float(os.getenv("ALERT_TIMEOUT", 10))
+        self.session = requests.Session()
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_lock = threading.Lock()
+
+    @property
+    def telegram_enabled(self) -> bool:
+        return bool(self.telegram_bot_token and self.telegram_chat_id)
+
+    @property
+    def email_enabled(self) -> bool:
+        return bool(self.email_to and self.email_from)
+
+    def _connect_smtp(self) -> smtplib.SMTP:
+        if self.smtp_ssl:
+            server = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=self.timeout)
+        if self.smtp_user:
+            server.login(self.smtp_user, self.smtp_password or "")
+        return server
+
+    def send_email_alert(self, subject, message, to_email=None):
+        """Envia alerta por email (reaproveitando a conexão SMTP)"""
+        msg = MIMEText(message)
+        msg['Subject'] = subject
+        msg['From'] = self.email_from
+        msg['To'] = to_email or self.email_to
+
+        with self._smtp_lock:
+            for attempt in (1, 2):
+                try:
+                    if self._smtp is None:
+                        self._smtp = self._connect_smtp()
+                    self._smtp.send_message(msg)
+                    break
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    # Conexão ociosa fechada pelo servidor: reabrir uma vez
+                    self._smtp = None
+                    if attempt == 2:
+                        raise
+
+        logger.info(f"📧 Alerta enviado por email para {msg['To']}")
+
+    def send_telegram_alert(self, message):
+        """Envia alerta para Telegram"""
+        url = f"{self.telegram_api}/bot{self.telegram_bot_token}/sendMessage"
+        data = {
+            "chat_id": self.telegram_chat_id,
+            "text": f"🚨 ALERTA DO SERVIDOR:\n{message}",
+            "parse_mode": "Markdown"
+        }
+        response = self.session.post(url, data=data, timeout=self.timeout)
+        response.raise_for_status()
+        logger.info("📱 Alerta enviado para Telegram")
+
+    def send(self, subject: str, message: str) -> int:
+        """
+        Enviar por todos os canais configurados
+
+        Returns:
+            Número de canais que falharam
+        """
+        failures = 0
+        if self.telegram_enabled:
+            try:
+                self.send_telegram_alert(message)
+            except Exception as e:
+                failures += 1
+                logger.error(f"Erro ao enviar para Telegram: {e}")
+        if self.email_enabled:
+            try:
+                self.send_email_alert(subject, message)
+            except Exception as e:
+                failures += 1
+                logger.error(f"Erro ao enviar email: {e}")
+        if not (self.telegram_enabled or self.email_enabled):
+            logger.warning(f"{subject}\n{message}")
+        return failures
+
+    def close(self):
+        with self._smtp_lock:
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except smtplib.SMTPException:
+                    pass
+                self._smtp = None
+        self.session.close()
+
+    @staticmethod
+    def evaluate(metrics) -> List[Alert]:
+        """Alertas para um snapshot do sampler (sem enviar nada)"""
+        alerts = []
+        now = metrics.get("timestamp") or time.time()
+        for metric in STATUS_THRESHOLDS:
+            value = (metrics.get(metric) or {}).get("percent")
+            if value is None:
+                continue
+            # Mesmos limites do status dos cards: card crítico = alerta crítico
+            severity = status_for(metric, value)
+            if severity != "normal":
+                message = f"{SEVERITY_LABELS[severity]}: {LABELS[metric]} em {value}%"
+                alerts.append(Alert(metric, severity, value, message, now))
+        return alerts
+
+    def check_and_alert(self, metrics):
+        """
+        Verifica métricas e envia alertas se necessário
+
+        Mantido por compatibilidade com a API anterior ao AlertDispatcher:
+        só CPU e memória em nível crítico, enviados apenas pelo Telegram,
+        sem deduplicação. O app usa o AlertDispatcher.
+        """
+        alerts = [alert.message for alert in self.evaluate(metrics)
+                  if alert.severity == "critical" and alert.metric in ("cpu", "memory")]
+        for alert_msg in alerts:
+            if not self.telegram_enabled:
+                continue
+            try:
+                self.send_telegram_alert(alert_msg)
+            except Exception as e:
+                logger.error(f"Erro ao enviar para Telegram: {e}")
+        return alerts
+
+
+class AlertDispatcher:
+    """
+    Fila assíncrona de alertas com deduplicação, limite e resumo
+
+    `check` é um listener do MetricsSampler: avalia o snapshot e só
+    enfileira, sem bloquear. Um mesmo (métrica, severidade) é enviado no
+    máximo uma vez a cada `cooldown` segundos; repetições nesse período
+    são contadas e informadas no envio seguinte. Se o resumo falhar em
+    todos os canais, o cooldown dos seus alertas é liberado. Alertas que chegam
+    dentro de `batch_window` segundos do primeiro vão juntos em uma única
+    mensagem, enviada fora do event loop.
+    """
+
+    def __init__(self, system: AlertSystem = None, cooldown: float = None,
+                 batch_window: float = None, max_batch: int = 20, queue_size: int = 100):
+        self.system = system or AlertSystem()
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv("ALERT_COOLDOWN", 300))
+        self.batch_window = batch_window if batch_window is not None else float(os.getenv("ALERT_BATCH_WINDOW", 5))
+        self.max_batch = max_batch
+        self.queue_size = queue_size
+        self.queue: "deque[Alert]" = deque()
+        self._ready: Optional[asyncio.Event] = None
+        self._last_sent: Dict[Tuple[str, str], float] = {}
+        self._suppressed: Dict[Tuple[str, str], int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # Contadores
+        self.submitted = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self.digests = 0
+        self.delivered = 0
+        self.undelivered = 0
+        self.failed_digests = 0
+        self.failures = 0
+
+    def check(self, snapshot: Dict):
+        """Listener do MetricsSampler"""
+        for alert in self.system.evaluate(snapshot):
+            self.submit(alert)
+
+    def submit(self, alert: Alert) -> bool:
+        """Enfileirar um alerta; False se foi suprimido ou descartado"""
+        key = (alert.metric, alert.severity)
+        last = self._last_sent.get(key)
+        if last is not None and alert.timestamp - last < self.cooldown:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            self.suppressed += 1
+            return False
+        if len(self.queue) >= self.queue_size:
+            self.dropped += 1
+            return False
+        self._last_sent[key] = alert.timestamp
+        self.queue.append(alert)
+        self.submitted += 1
+        if self._ready is not None:
+            self._ready.set()
+        return True
+
+    def _digest(self, batch: List[Alert]) -> Tuple[str, str]:
+        lines = []
+        for alert in batch:
+            repeats = self._suppressed.pop((alert.metric, alert.severity), 0)
+            suffix = f" (+{repeats} repetições suprimidas)" if repeats else ""
+            lines.append(f"{alert.message}{suffix}")
+        if len(batch) == 1:
+            return "Alerta do servidor", lines[0]
+        critical = sum(alert.severity == "critical" for alert in batch)
+        subject = f"{len(batch)} alertas do servidor ({critical} críticos)"
+        return subject, "\n".join(f"• {line}" for line in lines)
+
+    async def start(self):
+        if self._task is None:
+            self._ready = asyncio.Event()
+            if self.queue:
+                self._ready.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self.system.close)
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            # Janela de agrupamento: o que chegar junto do primeiro alerta vai no mesmo envio
+            await asyncio.sleep(self.batch_window)
+            self._ready.clear()
+            batch = [self.queue.popleft() for _ in range(min(self.max_batch, len(self.queue)))]
+            if self.queue:
+                self._ready.set()
+            if not batch:
+                continue
+            subject, message = self._digest(batch)
+            channels = self.system.telegram_enabled + self.system.email_enabled
+            try:
+                failures = await asyncio.to_thread(self.system.send, subject, message)
+            except Exception as e:
+                failures = max(channels, 1)
+                logger.error(f"Erro ao enviar alertas: {e}")
+            self.digests += 1
+            self.failures += failures
+            # Entregue = ao menos um canal aceitou; sem canais o alerta só vai para o log
+            if failures < channels:
+                self.delivered += len(batch)
+            else:
+                self.undelivered += len(batch)
+                if channels:
+                    self.failed_digests += 1
+                    # Nenhum canal aceitou: liberar o cooldown para a próxima ocorrência ser reenviada
+                    for alert in batch:
+                        key = (alert.metric, alert.severity)
+                        if self._last_sent.get(key) == alert.timestamp:
+                            del self._last_sent[key]
+
+    def stats(self) -> Dict:
+        return {
+            "channels": [name for name, enabled in (("telegram", self.system.telegram_enabled),
+                                                    ("email", self.system.email_enabled)) if enabled],
+            "queued": len(self.queue),
+            "submitted": self.submitted,
+            "suppressed": self.suppressed,
+            "dropped": self.dropped,
+            "digests": self.digests,
+            "delivered": self.delivered,
+            "undelivered": self.undelivered,
+            "failed_digests": self.failed_digests,
+            "failures": self.failures,
+            "cooldown": self.cooldown,
+            "batch_window": self.batch_window,
+        }
@@ -0,0 +1,114 @@
+# monitoring-dashboard/backend/broadcast.py
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+logger = logging.getLogger(__name__)
+
+
+class ClientQueue:
+    """Fila limitada de um cliente: se encher, descarta o frame mais antigo"""
+
+    def __init__(self, maxsize: int):
+        self.frames = deque(maxlen=maxsize)
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    def push(self, frame: str):
+        if len(self.frames) == self.frames.maxlen:
+            self.dropped += 1
+        self.frames.append(frame)
+        self.ready.set()
+
+
+class BroadcastHub:
+    """
+    Difusão de snapshots para todos os WebSockets conectados
+
+    Cada snapshot é serializado uma única vez e colocado na fila de cada
+    cliente; uma task por conexão envia os frames. Um cliente lento só
+    perde frames antigos, sem atrasar os demais nem o produtor.
+    """
+
+    def __init__(self, queue_size: int = 8, on_send: Optional[Callable[[float], None]] = None):
+        self.queue_size = queue_size
+        self.on_send = on_send  # recebe a duração (s) de cada envio
+        self.clients: Set[ClientQueue] = set()
+
+        # Contadores
+        self.connections = 0
+        self.disconnections = 0
+        self.published = 0
+        self.sent = 0
+        self.dropped = 0
+        self.send_errors = 0
+
+    def publish(self, snapshot: Dict):
+        """Enfileirar um snapshot para todos os clientes (não bloqueia)"""
+        frame = json.dumps(snapshot)
+        self.published += 1
+        for client in self.clients:
+            client.push(frame)
+
+    async def serve(self, websocket: WebSocket, initial: Dict = None):
+        """Atender uma conexão até o cliente desconectar"""
+        await websocket.accept()
+        client = ClientQueue(self.queue_size)
+        if initial is not None:
+            client.push(json.dumps(initial))
+        self.clients.add(client)
+        self.connections += 1
+
+        # O cliente não envia nada, mas ler é o que detecta o fechamento
+        receiver = asyncio.create_task(self._drain(websocket))
+        try:
+            while not receiver.done():
+                waiter = asyncio.create_task(client.ready.wait())
+                await asyncio.wait({waiter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                client.ready.clear()
+                while client.frames:
+                    started = time.perf_counter()
+                    await websocket.send_text(client.frames.popleft())
+                    if self.on_send is not None:
+                        self.on_send(time.perf_counter() - started)
+                    client.sent += 1
+                    self.sent += 1
+        except (WebSocketDisconnect, RuntimeError, ConnectionError) as e:
+            if not isinstance(e, WebSocketDisconnect):
+                self.send_errors += 1
+        finally:
+            receiver.cancel()
+            self.clients.discard(client)
+            self.dropped += client.dropped
+            self.disconnections += 1
+
+    @staticmethod
+    async def _drain(websocket: WebSocket):
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+        except (WebSocketDisconnect, RuntimeError):
+            return
+
+    def stats(self) -> Dict:
+        return {
+            "connected": len(self.clients),
+            "connections": self.connections,
+            "disconnections": self.disconnections,
+            "published": self.published,
+            "sent": self.sent,
+            # Descartes de clientes ainda conectados + dos que já saíram
+            "dropped": self.dropped + sum(client.dropped for client in self.clients),
+            "send_errors": self.send_errors,
+            "queue_size": self.queue_size,
+            "max_queue_depth": max((len(client.frames) for client in self.clients), default=0),
+        }
@@ -0,0 +1,453 @@
+# monitoring-dashboard/backend/metrics_log.py
+import json
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from timeseries import flatten_metrics
+
+logger = logging.getLogger(__name__)
+
+# Arquivo: MAGIC | u32 tamanho do cabeçalho | cabeçalho JSON (colunas, passo)
+# preenchido até múltiplo de 8 | registros de largura fixa em float64:
+# (timestamp, coluna 0, coluna 1, ...). Valores ausentes são NaN.
+MAGIC = b"MLOG0001"
+_PREFIX = struct.Struct("<8sI")
+
+RAW_PREFIX = "raw-"          # amostras como chegaram do sampler
+SEGMENT_PREFIX = "seg60-"    # médias por minuto, geradas na compactação
+SEGMENT_STEP = 60
+SUFFIX = ".log"
+
+
+def _file_start(name: str) -> int:
+    """Timestamp inicial contido no nome ('raw-1700000000.log' -> 1700000000)"""
+    return int(name.rsplit("-", 1)[1][: -len(SUFFIX)])
+
+
+def _encode_header(columns: List[str], step: int) -> bytes:
+    header = json.dumps({"columns": columns, "step": step}).encode()
+    header += b" " * (-(_PREFIX.size + len(header)) % 8)
+    return _PREFIX.pack(MAGIC, len(header)) + header
+
+
+def _fsync_dir(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class LogFile:
+    """
+    Leitura de um arquivo do log via mmap
+
+    Os registros são vistos como um único memoryview de float64; uma coluna
+    é um fatiamento com passo (sem cópia) sobre esse buffer.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, header_size = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"Arquivo de métricas inválido: {path}")
+            header = json.loads(f.read(header_size))
+            self.columns: List[str] = header["columns"]
+            self.step: int = header["step"]
+            self.offset = _PREFIX.size + header_size
+            self.stride = 1 + len(self.columns)
+            size = os.fstat(f.fileno()).st_size
+            # Registro incompleto no fim (queda durante a escrita) é ignorado
+            self.rows = (size - self.offset) // (8 * self.stride)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.rows else None
+        self._view = None
+        if self._mmap is not None:
+            end = self.offset + self.rows * self.stride * 8
+            self._view = memoryview(self._mmap)[self.offset:end].cast("d")
+
+    def _time(self, row: int) -> float:
+        return self._view[row * self.stride]
+
+    def first_row_at(self, timestamp: float, after: bool = False) -> int:
+        """Primeira linha com tempo >= timestamp (> timestamp com `after`), por busca binária"""
+        low, high = 0, self.rows
+        while low < high:
+            middle = (low + high) // 2
+            value = self._time(middle)
+            if value < timestamp or (after and value == timestamp):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def bounds(self) -> Optional[Tuple[float, float]]:
+        if not self.rows:
+            return None
+        return self._time(0), self._time(self.rows - 1)
+
+    def column(self, metric: str, since: float, until: float) -> Tuple[memoryview, memoryview]:
+        """(tempos, valores) de uma coluna no intervalo [since, until], como views do mmap"""
+        if not self.rows or metric not in self.columns:
+            return memoryview(b"").cast("d"), memoryview(b"").cast("d")
+        first = self.first_row_at(since)
+        # Inclusivo em `until`: somar um épsilon não muda timestamps da ordem de 1e9
+        last = self.first_row_at(until, after=True)
+        index = 1 + self.columns.index(metric)
+        stride = self.stride
+        return (
+            self._view[first * stride:last * stride:stride],
+            self._view[first * stride + index:last * stride:stride],
+        )
+
+    def records(self) -> Iterator[memoryview]:
+        """Cada registro (timestamp, valores...) como view de float64"""
+        for row in range(self.rows):
+            yield self._view[row * self.stride:(row + 1) * self.stride]
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MetricsLog:
+    """
+    Log persistente das métricas do host, com compactação e limite de disco
+
+    Cada snapshot do sampler vira um registro de largura fixa acrescentado
+    ao arquivo bruto corrente; um novo arquivo começa a cada `raw_span`
+    segundos ou quando o conjunto de métricas muda. Arquivos brutos mais
+    antigos que `raw_retention` são compactados em médias por minuto.
+    Segmentos além de `retention` ou do orçamento de disco são apagados,
+    sempre a partir do mais antigo.
+    """
+
+    def __init__(self, directory: str = None, raw_span: int = None, raw_retention: int = None,
+                 retention: int = None, max_bytes: int = None, fsync_every: int = None):
+        self.directory = directory or os.getenv(
+            "METRICS_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics-data"))
+        self.raw_span = raw_span or int(os.getenv("METRICS_RAW_SPAN", 3600))
+        self.raw_retention = raw_retention or int(os.getenv("METRICS_RAW_RETENTION", 86400))
+        self.retention = retention or int(os.getenv("METRICS_RETENTION", 30 * 86400))
+        self.max_bytes = max_bytes or int(float(os.getenv("METRICS_DISK_BUDGET_MB", 256)) * 1024 * 1024)
+        # fsync a cada N registros: limita o que uma queda de energia pode levar
+        self.fsync_every = fsync_every or int(os.getenv("METRICS_FSYNC_EVERY", 30))
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._path: Optional[str] = None
+        self._columns: List[str] = []
+        self._opened_at = 0.0
+        self._unsynced = 0
+        # Registros aguardando a thread de gravação
+        self._queue: "queue.Queue" = queue.Queue(maxsize=int(os.getenv("METRICS_LOG_QUEUE_SIZE", 1000)))
+        self._writer: Optional[threading.Thread] = None
+
+        # Contadores
+        self.appended = 0
+        self.dropped = 0
+        self.compacted = 0
+        self.deleted = 0
+        self.errors = 0
+
+        self._recover()
+
+    # -- escrita -----------------------------------------------------------
+
+    def _files(self, prefix: str = None) -> List[str]:
+        """Arquivos do log em ordem cronológica"""
+        names = [name for name in os.listdir(self.directory)
+                 if name.endswith(SUFFIX) and name.startswith((RAW_PREFIX, SEGMENT_PREFIX))]
+        if prefix:
+            names = [name for name in names if name.startswith(prefix)]
+        return sorted(names, key=lambda name: (_file_start(name), name.startswith(RAW_PREFIX)))
+
+    def _recover(self):
+        """Arrumar o diretório após uma queda: temporários e brutos já compactados"""
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                os.remove(path)
+            elif name.startswith(RAW_PREFIX) and name.endswith(SUFFIX):
+                segment = SEGMENT_PREFIX + name[len(RAW_PREFIX):]
+                # A queda aconteceu entre o os.replace do segmento e a remoção do bruto
+                if os.path.exists(os.path.join(self.directory, segment)):
+                    os.remove(path)
+
+    def _open(self, columns: List[str], timestamp: float):
+        self._close()
+        start = int(timestamp)
+        path = os.path.join(self.directory, f"{RAW_PREFIX}{start}{SUFFIX}")
+        while os.path.exists(path):  # reinício dentro do mesmo segundo
+            start += 1
+            path = os.path.join(self.directory, f"{RAW_PREFIX}{start}{SUFFIX}")
+        self._file = open(path, "wb")
+        self._file.write(_encode_header(columns, 0))
+        self._path, self._columns, self._opened_at = path, columns, timestamp
+
+    def _sync(self):
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def _close(self):
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+        self._file = self._path = None
+
+    def start(self):
+        """Iniciar a thread de gravação (append passa a só enfileirar)"""
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run, name="metrics-log-writer", daemon=True)
+            self._writer.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._write(*item)
+            except Exception as e:
+                # A thread de gravação precisa sobreviver a qualquer erro inesperado
+                self.errors += 1
+                logger.error(f"Erro inesperado ao gravar métricas: {e}")
+
+    def append(self, snapshot: Dict):
+        """
+        Gravar um snapshot (listener do MetricsSampler)
+
+        Com a thread de gravação iniciada, apenas enfileira: escrita e fsync
+        não rodam no event loop, e a fila FIFO mantém os registros em ordem
+        de tempo. Sem start(), grava na hora (scripts e testes).
+        """
+        timestamp = snapshot.get("timestamp")
+        if timestamp is None:
+            return
+        values = dict(flatten_metrics(snapshot))
+        if not values:
+            return
+        if self._writer is None:
+            self._write(timestamp, values)
+            return
+        try:
+            self._queue.put_nowait((timestamp, values))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self, timestamp: float, values: Dict[str, float]):
+        columns = sorted(values)
+        try:
+            with self._lock:
+                if (self._file is None or columns != self._columns
+                        or timestamp - self._opened_at >= self.raw_span):
+                    self._open(columns, timestamp)
+                record = array("d", [timestamp])
+                record.extend(values[name] for name in columns)
+                self._file.write(record.tobytes())
+                self._unsynced += 1
+                self.appended += 1
+                if self._unsynced >= self.fsync_every:
+                    self._sync()
+        except OSError as e:
+            self.errors += 1
+            logger.error(f"Erro ao gravar métricas em disco: {e}")
+
+    def close(self):
+        """Gravar o que estiver na fila e fechar o arquivo corrente"""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        with self._lock:
+            self._close()
+
+    # -- compactação e retenção -------------------------------------------
+
+    def _write_atomic(self, path: str, columns: List[str], step: int, records: array):
+        """Gravar um arquivo completo: temporário + fsync + os.replace"""
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_encode_header(columns, step))
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _fsync_dir(self.directory)
+
+    def _downsample(self, source: LogFile) -> array:
+        """Média por minuto de cada coluna (NaN ignorado)"""
+        width = len(source.columns)
+        output = array("d")
+        bucket = None
+        sums = [0.0] * width
+        counts = [0] * width
+
+        def close_bucket():
+            output.append(bucket)
+            output.extend(s / c if c else float("nan") for s, c in zip(sums, counts))
+
+        for record in source.records():
+            timestamp = record[0]
+            current = timestamp - timestamp % SEGMENT_STEP
+            if current != bucket:
+                if bucket is not None:
+                    close_bucket()
+                bucket, sums, counts = current, [0.0] * width, [0] * width
+            for i in range(width):
+                value = record[1 + i]
+                if value == value:  # não é NaN
+                    sums[i] += value
+                    counts[i] += 1
+        if bucket is not None:
+            close_bucket()
+        return output
+
+    def compact(self, now: float = None) -> Dict:
+        """
+        Compactar brutos antigos e aplicar retenção e orçamento de disco
+
+        Seguro contra quedas: cada segmento é gravado por inteiro antes de o
+        bruto correspondente ser apagado, e _recover() conclui a troca se o
+        processo cair no meio.
+
+        Returns:
+            Dict com arquivos compactados e apagados nesta execução
+        """
+        now = now or time.time()
+        compacted = deleted = 0
+        with self._lock:
+            active = self._path
+            self._sync()
+
+        for name in self._files(RAW_PREFIX):
+            path = os.path.join(self.directory, name)
+            if path == active:
+                continue
+            try:
+                with LogFile(path) as source:
+                    bounds = source.bounds()
+                    if bounds is not None and bounds[1] > now - self.raw_retention:
+                        continue
+                    records = self._downsample(source) if bounds is not None else None
+                    columns = source.columns
+                if records is not None:
+                    segment = SEGMENT_PREFIX + name[len(RAW_PREFIX):]
+                    self._write_atomic(os.path.join(self.directory, segment), columns, SEGMENT_STEP, records)
+                os.remove(path)
+                compacted += 1
+            except (OSError, ValueError) as e:
+                self.errors += 1
+                logger.error(f"Erro ao compactar {name}: {e}")
+
+        # Retenção por idade e depois por tamanho, do mais antigo ao mais novo
+        files = [name for name in self._files() if os.path.join(self.directory, name) != active]
+        sizes = {name: os.path.getsize(os.path.join(self.directory, name)) for name in files}
+        total = sum(sizes.values()) + (os.path.getsize(active) if active else 0)
+        for name in files:
+            expired = _file_start(name) + self.raw_span < now - self.retention
+            if not expired and total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= sizes[name]
+            deleted += 1
+
+        self.compacted += compacted
+        self.deleted += deleted
+        if compacted or deleted:
+            logger.info(f"🗜️ Log de métricas: {compacted} arquivo(s) compactado(s), {deleted} apagado(s)")
+        return {"compacted": compacted, "deleted": deleted}
+
+    # -- leitura -----------------------------------------------------------
+
+    def query(self, metric: str, seconds: int, now: float, max_points: int = 1000) -> Dict:
+        """
+        Pontos de uma métrica lidos do disco, reduzidos a no máximo `max_points`
+
+        Só a coluna pedida é percorrida, direto do mmap de cada arquivo.
+
+        Raises:
+            KeyError: métrica sem pontos no intervalo
+        """
+        since = now - seconds
+        step = max(1, -(-seconds // max_points))  # passo que mantém no máximo max_points pontos
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+        buckets: Dict[float, List[float]] = {}
+        for name in self._files():
+            start = _file_start(name)
+            if start > now:
+                break
+            path = os.path.join(self.directory, name)
+            try:
+                source = LogFile(path)
+            except (OSError, ValueError):
+                continue  # apagado pela compactação entre a listagem e a leitura
+            with source:
+                bounds = source.bounds()
+                if bounds is None or bounds[1] < since:
+                    continue
+                times, values = source.column(metric, since, now)
+                for timestamp, value in zip(times.tolist(), values.tolist()):
+                    if value != value:
+                        continue
+                    bucket = timestamp - timestamp % step
+                    total = buckets.get(bucket)
+                    if total is None:
+                        buckets[bucket] = [value, 1]
+                    else:
+                        total[0] += value
+                        total[1] += 1
+                times.release()
+                values.release()
+
+        if not buckets:
+            raise KeyError(metric)
+        timestamps = sorted(buckets)
+        return {
+            "metric": metric,
+            "range": seconds,
+            "resolution": step,
+            "timestamps": timestamps,
+            "values": [round(buckets[t][0] / buckets[t][1], 3) for t in timestamps],
+            "source": "disk",
+        }
+
+    def stats(self) -> Dict:
+        files = self._files()
+        return {
+            "directory": self.directory,
+            "raw_files": sum(name.startswith(RAW_PREFIX) for name in files),
+            "segments": sum(name.startswith(SEGMENT_PREFIX) for name in files),
+            "bytes": sum(os.path.getsize(os.path.join(self.directory, name)) for name in files),
+            "max_bytes": self.max_bytes,
+            "retention": self.retention,
+            "appended": self.appended,
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped,
+            "compacted": self.compacted,
+            "deleted": self.deleted,
+            "errors": self.errors,
+        }
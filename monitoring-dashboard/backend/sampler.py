@@ -0,0 +1,292 @@
+# monitoring-dashboard/backend/sampler.py
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+GB = 1024 ** 3
+MB = 1024 ** 2
+
+# (alerta, crítico) em %, comparados com >=: única tabela de limites, usada
+# pela cor dos cards do dashboard.html e pelos alertas (AlertSystem.evaluate)
+STATUS_THRESHOLDS = {"cpu": (60, 80), "memory": (70, 85), "disk": (75, 90)}
+
+
+def status_for(kind: str, percent: float) -> str:
+    warning, critical = STATUS_THRESHOLDS[kind]
+    if percent >= critical:
+        return "critical"
+    if percent >= warning:
+        return "warning"
+    return "normal"
+
+
+class CounterRates:
+    """
+    Taxas por segundo a partir de contadores acumulados do psutil
+
+    Guarda a leitura anterior; a primeira chamada (e qualquer contador que
+    volte atrás, como após reiniciar uma interface) resulta em taxa 0.
+    """
+
+    def __init__(self):
+        self._previous: Optional[Dict[str, float]] = None
+        self._time = 0.0
+
+    def update(self, counters: Dict[str, float]) -> Dict[str, float]:
+        now = time.monotonic()
+        previous, elapsed = self._previous, now - self._time
+        self._previous, self._time = counters, now
+        if previous is None or elapsed <= 0:
+            return {name: 0.0 for name in counters}
+        return {name: round(max(0.0, value - previous.get(name, value)) / elapsed, 1)
+                for name, value in counters.items()}
+
+
+def collect_cpu() -> Dict:
+    # interval=None: percentual desde a chamada anterior, sem bloquear
+    percent = psutil.cpu_percent(interval=None)
+    load = psutil.getloadavg()
+    return {
+        "percent": percent,
+        "cores": psutil.cpu_count(),
+        "per_core": psutil.cpu_percent(interval=None, percpu=True),
+        "load": {"1m": round(load[0], 2), "5m": round(load[1], 2), "15m": round(load[2], 2)},
+        "status": status_for("cpu", percent),
+    }
+
+
+def collect_memory() -> Dict:
+    memory = psutil.virtual_memory()
+    return {
+        "percent": memory.percent,
+        "used": round(memory.used / GB, 2),
+        "total": round(memory.total / GB, 2),
+        "status": status_for("memory", memory.percent),
+    }
+
+
+class DiskCollector:
+    """
+    Uso do disco (METRICS_DISK_PATH) e taxas de E/S de todos os discos
+
+    O uso muda devagar: é lido no máximo a cada `usage_interval` segundos
+    (METRICS_DISK_USAGE_INTERVAL) e repetido entre leituras. As taxas de
+    E/S são atualizadas a cada coleta.
+    """
+
+    def __init__(self, path: str = None, usage_interval: float = None):
+        self.path = path or os.getenv("METRICS_DISK_PATH", "/")
+        self.usage_interval = (usage_interval if usage_interval is not None
+                               else float(os.getenv("METRICS_DISK_USAGE_INTERVAL", 30.0)))
+        self.rates = CounterRates()
+        self._usage: Optional[Dict] = None
+        self._usage_read_at = 0.0
+
+    def _read_usage(self) -> Dict:
+        now = time.monotonic()
+        if self._usage is None or now - self._usage_read_at >= self.usage_interval:
+            usage = psutil.disk_usage(self.path)
+            self._usage = {
+                "percent": usage.percent,
+                "used": round(usage.used / GB, 2),
+                "total": round(usage.total / GB, 2),
+                "status": status_for("disk", usage.percent),
+            }
+            self._usage_read_at = now
+        return self._usage
+
+    def __call__(self) -> Dict:
+        result = dict(self._read_usage())
+        # Pode ser None (por exemplo, em alguns contêineres)
+        io = psutil.disk_io_counters()
+        if io is not None:
+            result["io"] = self.rates.update({
+                "read_bytes_per_s": io.read_bytes,
+                "write_bytes_per_s": io.write_bytes,
+                "reads_per_s": io.read_count,
+                "writes_per_s": io.write_count,
+            })
+        return result
+
+
+class NetworkCollector:
+    """Totais enviados/recebidos (MB) e taxas de bytes e pacotes por segundo"""
+
+    def __init__(self):
+        self.rates = CounterRates()
+
+    def __call__(self) -> Dict:
+        io = psutil.net_io_counters()
+        return {
+            "sent": round(io.bytes_sent / MB, 2),
+            "received": round(io.bytes_recv / MB, 2),
+            "rates": self.rates.update({
+                "sent_bytes_per_s": io.bytes_sent,
+                "recv_bytes_per_s": io.bytes_recv,
+                "packets_sent_per_s": io.packets_sent,
+                "packets_recv_per_s": io.packets_recv,
+            }),
+        }
+
+
+def collect_process_count() -> int:
+    return len(psutil.pids())
+
+
+class TopProcesses:
+    """Os N processos que mais usam CPU (e memória, no empate)"""
+
+    ATTRS = ["pid", "name", "username", "cpu_percent", "memory_percent"]
+
+    def __init__(self, limit: int = None):
+        self.limit = limit or int(os.getenv("METRICS_TOP_PROCESSES", 5))
+        # A primeira leitura de cpu_percent de cada processo é sempre 0:
+        # enumerar uma vez já na criação para a primeira tabela ter valores
+        for _ in psutil.process_iter(["cpu_percent"]):
+            pass
+
+    def __call__(self) -> List[Dict]:
+        # process_iter reaproveita os objetos Process entre chamadas, então
+        # cpu_percent é medido desde a enumeração anterior
+        processes = [process.info for process in psutil.process_iter(self.ATTRS)]
+        processes.sort(key=lambda p: (p["cpu_percent"] or 0.0, p["memory_percent"] or 0.0), reverse=True)
+        return [{
+            "pid": p["pid"],
+            "name": p["name"],
+            "user": p["username"],
+            "cpu_percent": p["cpu_percent"] or 0.0,
+            "memory_percent": round(p["memory_percent"] or 0.0, 2),
+        } for p in processes[:self.limit]]
+
+
+class MetricsSampler:
+    """
+    Coleta periódica de métricas em segundo plano
+
+    Uma única task coleta todas as métricas a cada `interval` segundos e
+    publica um snapshot compartilhado; os endpoints apenas devolvem o
+    último snapshot, sem chamar o psutil.
+    """
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or float(os.getenv("METRICS_INTERVAL", 2.0))
+        self.collectors: Dict[str, Callable[[], Any]] = {
+            "cpu": collect_cpu,
+            "memory": collect_memory,
+            "disk": DiskCollector(),
+            "network": NetworkCollector(),
+            "processes": collect_process_count,
+        }
+        # Coletores caros rodam com intervalo próprio; entre execuções o
+        # snapshot repete o último valor
+        self.min_intervals: Dict[str, float] = {}
+        self._last_values: Dict[str, Any] = {}
+        self._last_runs: Dict[str, float] = {}
+        self.add_collector("top_processes", TopProcesses(),
+                           min_interval=float(os.getenv("METRICS_PROCESS_INTERVAL", 10.0)))
+        self.listeners: List[Callable[[Dict], None]] = []
+        self.timing_listeners: List[Callable[[str, float], None]] = []
+        self.snapshot: Dict = {"status": "starting"}
+        self.samples = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def add_collector(self, name: str, collect: Callable[[], Any], min_interval: float = 0.0):
+        """
+        Registrar uma métrica extra (a função roda fora do event loop)
+
+        Args:
+            name: Chave no snapshot
+            collect: Função sem argumentos que devolve o valor
+            min_interval: Segundos mínimos entre duas execuções (0 = todo ciclo)
+        """
+        self.collectors[name] = collect
+        if min_interval > 0:
+            self.min_intervals[name] = min_interval
+
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """Função chamada (no event loop, sem bloquear) a cada novo snapshot"""
+        self.listeners.append(listener)
+
+    def add_timing_listener(self, listener: Callable[[str, float], None]):
+        """Função chamada com (coletor, segundos) a cada coleta; 'sample' = ciclo completo"""
+        self.timing_listeners.append(listener)
+
+    def _report_timing(self, name: str, seconds: float):
+        for listener in self.timing_listeners:
+            listener(name, seconds)
+
+    def _publish(self, snapshot: Dict):
+        self.snapshot = snapshot
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Erro ao publicar snapshot: {e}")
+
+    def sample(self) -> Dict:
+        """Coletar todas as métricas (síncrono; chamado em uma thread)"""
+        snapshot = {}
+        started = now = time.monotonic()
+        for name, collect in self.collectors.items():
+            min_interval = self.min_intervals.get(name)
+            if min_interval and name in self._last_values and now - self._last_runs[name] < min_interval:
+                snapshot[name] = self._last_values[name]
+                continue
+            collect_started = time.perf_counter()
+            try:
+                snapshot[name] = self._last_values[name] = collect()
+                self._last_runs[name] = now
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Erro ao coletar {name}: {e}")
+            self._report_timing(name, time.perf_counter() - collect_started)
+        self._report_timing("sample", time.monotonic() - started)
+        snapshot["status"] = "online"
+        snapshot["timestamp"] = time.time()
+        snapshot["interval"] = self.interval
+        return snapshot
+
+    async def start(self):
+        """Iniciar a coleta (chamado na inicialização do app)"""
+        if self._task is not None:
+            return
+        # A primeira leitura de cpu_percent(interval=None) só define a referência
+        psutil.cpu_percent(interval=None)
+        psutil.cpu_percent(interval=None, percpu=True)
+        await asyncio.sleep(0.1)
+        self._publish(await asyncio.to_thread(self.sample))
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"📈 Coleta de métricas iniciada (a cada {self.interval}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_run = loop.time() + self.interval
+        while True:
+            await asyncio.sleep(max(0.0, next_run - loop.time()))
+            # Intervalo fixo: o tempo de coleta não desloca os próximos ciclos
+            next_run = max(next_run + self.interval, loop.time())
+            try:
+                # psutil faz chamadas de sistema: fora do event loop
+                self._publish(await asyncio.to_thread(self.sample))
+                self.samples += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Erro no ciclo de coleta: {e}")
@@ -0,0 +1,180 @@
+# monitoring-dashboard/backend/self_metrics.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 ** 2
+
+# Limites superiores dos buckets, em milissegundos
+DEFAULT_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class LatencyHistogram:
+    """Histograma de durações com buckets fixos (memória constante)"""
+
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)  # último = acima do maior limite
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()  # os coletores observam a partir de threads
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000
+        index = bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += ms
+            if ms > self.max:
+                self.max = ms
+
+    def _quantile(self, q: float) -> Optional[float]:
+        """Limite superior do bucket que contém o quantil (estimativa conservadora)"""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets_ms[index] if index < len(self.buckets_ms) else round(self.max, 3)
+        return round(self.max, 3)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "mean_ms": round(self.total / self.count, 3) if self.count else None,
+                "max_ms": round(self.max, 3),
+                "p50_ms": self._quantile(0.50),
+                "p95_ms": self._quantile(0.95),
+                "p99_ms": self._quantile(0.99),
+                "buckets_ms": {str(le): count for le, count in zip(self.buckets_ms + ("+Inf",), self.counts)},
+            }
+
+
+class EndpointTimer:
+    """
+    Middleware ASGI que mede a latência de cada rota HTTP
+
+    A rota é identificada pelo padrão (ex.: '/api/metrics/history'), não
+    pela URL, para o número de séries não depender dos parâmetros.
+    """
+
+    def __init__(self, app, self_metrics: "SelfMetrics"):
+        self.app = app
+        self.self_metrics = self_metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            self.self_metrics.observe_endpoint(getattr(route, "path", "unmatched"), time.perf_counter() - started)
+
+
+class SelfMetrics:
+    """
+    Custo do próprio backend: coleta, event loop, memória, rotas e WebSockets
+
+    Os demais componentes apenas chamam os métodos observe_*; o atraso do
+    event loop é medido por uma task que dorme `lag_interval` segundos e
+    compara com o tempo realmente decorrido.
+    """
+
+    def __init__(self, lag_interval: float = None):
+        self.lag_interval = lag_interval or float(os.getenv("SELF_LAG_INTERVAL", 0.5))
+        self.collectors: Dict[str, LatencyHistogram] = {}
+        self.endpoints: Dict[str, LatencyHistogram] = {}
+        self.sample_cycle = LatencyHistogram()
+        self.ws_send = LatencyHistogram()
+        self.loop_lag = LatencyHistogram()
+        self.last_lag_ms = 0.0
+
+        self.process = psutil.Process()
+        self.started_at = time.time()
+        self.rss_start = self.process.memory_info().rss
+        self.rss_peak = self.rss_start
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _histogram(table: Dict[str, LatencyHistogram], name: str) -> LatencyHistogram:
+        histogram = table.get(name)
+        if histogram is None:
+            histogram = table.setdefault(name, LatencyHistogram())
+        return histogram
+
+    def observe_collector(self, name: str, seconds: float):
+        """Listener de tempos do MetricsSampler ('sample' = ciclo completo)"""
+        if name == "sample":
+            self.sample_cycle.observe(seconds)
+        else:
+            self._histogram(self.collectors, name).observe(seconds)
+
+    def observe_endpoint(self, route: str, seconds: float):
+        self._histogram(self.endpoints, route).observe(seconds)
+
+    def observe_ws_send(self, seconds: float):
+        self.ws_send.observe(seconds)
+
+    async def start(self):
+        if self._task is None:
+            self.process.cpu_percent(interval=None)  # referência para a primeira leitura
+            # Crescimento de RSS medido a partir do início do atendimento, não do import
+            self.rss_start = self.rss_peak = self.process.memory_info().rss
+            self._task = asyncio.create_task(self._watch_loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _watch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            # Quanto o loop demorou a retomar a task além do combinado
+            lag = max(0.0, loop.time() - expected)
+            self.last_lag_ms = round(lag * 1000, 3)
+            self.loop_lag.observe(lag)
+
+    def snapshot(self) -> Dict:
+        memory = self.process.memory_info()
+        self.rss_peak = max(self.rss_peak, memory.rss)
+        return {
+            "uptime": round(time.time() - self.started_at, 1),
+            "process": {
+                "cpu_percent": self.process.cpu_percent(interval=None),
+                "threads": self.process.num_threads(),
+                "rss_mb": round(memory.rss / MB, 2),
+                "rss_start_mb": round(self.rss_start / MB, 2),
+                "rss_peak_mb": round(self.rss_peak / MB, 2),
+                "rss_growth_mb": round((memory.rss - self.rss_start) / MB, 2),
+            },
+            "event_loop_lag": {"last_ms": self.last_lag_ms, **self.loop_lag.summary()},
+            "sampler": {
+                "cycle": self.sample_cycle.summary(),
+                "collectors": {name: h.summary() for name, h in sorted(self.collectors.items())},
+            },
+            "endpoints": {route: h.summary() for route, h in sorted(self.endpoints.items())},
+            "websocket_send": self.ws_send.summary(),
+        }
@@ -1,10 +1,75 @@
 # monitoring-dashboard/backend/guaranteed_server.py
-from fastapi import FastAPI
+import asyncio
+import logging
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query, WebSocket
 from fastapi.responses import HTMLResponse
-import psutil
 import uvicorn
 
-app = FastAPI()
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from sampler import MetricsSampler
+from broadcast import BroadcastHub
+from timeseries import TimeSeriesStore, parse_range
+from metrics_log import MetricsLog
+from self_metrics import EndpointTimer, SelfMetrics
+from alerts import AlertDispatcher
+
+# Custo do próprio backend, exposto em /api/self
+self_metrics = SelfMetrics()
+
+# Coleta em segundo plano; intervalo configurável por METRICS_INTERVAL (segundos)
+sampler = MetricsSampler()
+sampler.add_timing_listener(self_metrics.observe_collector)
+
+# Cada snapshot é enviado a todos os WebSockets de /ws
+hub = BroadcastHub(queue_size=int(os.getenv("WS_QUEUE_SIZE", 8)), on_send=self_metrics.observe_ws_send)
+sampler.add_listener(hub.publish)
+
+# Histórico em memória fixa (1 s por 10 min, 10 s por 24 h, 1 min por 30 dias)
+history = TimeSeriesStore()
+sampler.add_listener(history.ingest)
+
+# Alertas avaliados a cada snapshot; envio agrupado e deduplicado fora do event loop
+alerts = AlertDispatcher()
+sampler.add_listener(alerts.check)
+
+# Cópia em disco (sobrevive a reinícios), gravada por uma thread própria;
+# compactação a cada METRICS_COMPACT_INTERVAL segundos
+metrics_log = MetricsLog()
+sampler.add_listener(metrics_log.append)
+COMPACT_INTERVAL = float(os.getenv("METRICS_COMPACT_INTERVAL", 600))
+
+logger = logging.getLogger(__name__)
+
+async def compact_periodically():
+    while True:
+        try:
+            await asyncio.to_thread(metrics_log.compact)
+        except Exception as e:
+            # Uma falha na compactação não pode encerrar a tarefa
+            logger.error(f"Erro na compactação do log de métricas: {e}")
+        await asyncio.sleep(COMPACT_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app):
+    await self_metrics.start()
+    await alerts.start()
+    metrics_log.start()
+    await sampler.start()
+    compactor = asyncio.create_task(compact_periodically())
+    yield
+    compactor.cancel()
+    await sampler.stop()
+    await alerts.stop()
+    await self_metrics.stop()
+    await asyncio.to_thread(metrics_log.close)
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(EndpointTimer, self_metrics=self_metrics)
 
 HTML = """
 <!DOCTYPE html>
@@ -63,15 +128,56 @@ async def root():
 
 @app.get("/api/metrics")
 async def get_metrics():
-    """Endpoint simples de métricas"""
-    cpu_percent = psutil.cpu_percent(interval=1)
-    memory = psutil.virtual_memory()
-    
-    return {
-        "cpu": {"percent": cpu_percent},
-        "memory": {"percent": memory.percent},
-        "status": "online"
-    }
+    """Endpoint simples de métricas (último snapshot da coleta em segundo plano)"""
+    return sampler.snapshot
+
+@app.get("/api/metrics/history")
+async def get_metrics_history(metric: str = "cpu.percent", range_: str = Query("10m", alias="range")):
+    """Série histórica de uma métrica (ex.: ?metric=memory.percent&range=24h)"""
+    try:
+        seconds = parse_range(range_)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    now = time.time()
+    try:
+        result = history.query(metric, seconds, now)
+        # Memória cobre o intervalo pedido (o processo já roda há tempo suficiente)
+        if result["timestamps"] and result["timestamps"][0] <= now - seconds + result["resolution"]:
+            return result
+    except KeyError:
+        result = None
+    try:
+        # Senão, lê do log em disco via mmap, fora do event loop
+        return await asyncio.to_thread(metrics_log.query, metric, seconds, now)
+    except KeyError:
+        if result is not None:
+            return result
+        raise HTTPException(status_code=404, detail=f"Métrica desconhecida: {metric}. Disponíveis: {history.metrics()}")
+
+@app.get("/api/metrics/storage")
+async def get_metrics_storage():
+    """Uso de memória do histórico e de disco do log de métricas"""
+    return {"memory": history.stats(), "disk": await asyncio.to_thread(metrics_log.stats)}
+
+@app.websocket("/ws")
+async def websocket_metrics(websocket: WebSocket):
+    """Snapshots em tempo real (o primeiro frame é o snapshot atual)"""
+    await hub.serve(websocket, sampler.snapshot)
+
+@app.get("/api/ws/stats")
+async def get_ws_stats():
+    """Conexões, frames enviados e descartados pelos clientes lentos"""
+    return hub.stats()
+
+@app.get("/api/self")
+async def get_self_metrics():
+    """Custo do backend: tempo por coletor, atraso do event loop, RSS, latência por rota e envios WebSocket"""
+    return self_metrics.snapshot()
+
+@app.get("/api/alerts/stats")
+async def get_alert_stats():
+    """Alertas enfileirados, suprimidos pela deduplicação e enviados"""
+    return alerts.stats()
 
 if __name__ == "__main__":
     print("🚀 INICIANDO SERVIDOR GARANTIDO...")
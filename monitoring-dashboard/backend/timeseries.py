@@ -0,0 +1,171 @@
+# monitoring-dashboard/backend/timeseries.py
+import re
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# (passo em segundos, janela em segundos): 1 s por 10 min, 10 s por 24 h, 1 min por 30 dias
+RESOLUTIONS = ((1, 600), (10, 86400), (60, 30 * 86400))
+
+_RANGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_range(text: str) -> int:
+    """Converter '90s', '10m', '24h', '30d' (ou segundos) em segundos"""
+    match = re.fullmatch(r"\s*(\d+)\s*([smhd]?)\s*", text or "")
+    if not match:
+        raise ValueError(f"Intervalo inválido: {text!r} (use, por exemplo, 10m, 24h ou 30d)")
+    return int(match.group(1)) * _RANGE_UNITS[match.group(2) or "s"]
+
+
+IGNORED_FIELDS = frozenset({"timestamp", "interval"})
+
+
+def flatten_metrics(snapshot: Dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Métricas numéricas de um snapshot: ('cpu.percent', 12.5), ('memory.percent', 40.1), ..."""
+    for key, value in snapshot.items():
+        if key in IGNORED_FIELDS:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten_metrics(value, name + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, float(value)
+
+
+class RingBuffer:
+    """
+    Série (timestamp, valor) de capacidade fixa em dois array('d')
+
+    A memória é alocada uma vez; ao encher, cada novo ponto sobrescreve o
+    mais antigo.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.start = 0  # posição do ponto mais antigo
+        self.count = 0
+
+    def append(self, timestamp: float, value: float):
+        if self.count < self.capacity:
+            index = (self.start + self.count) % self.capacity
+            self.count += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[index] = timestamp
+        self.values[index] = value
+
+    def _segments(self) -> List[Tuple[int, int]]:
+        """Trechos contíguos [início, fim) do array, em ordem cronológica"""
+        end = self.start + self.count
+        if end <= self.capacity:
+            return [(self.start, end)]
+        return [(self.start, self.capacity), (0, end - self.capacity)]
+
+    def since(self, timestamp: float) -> Iterator[Tuple[memoryview, memoryview]]:
+        """Pontos com tempo >= timestamp, como memoryviews (sem cópia) por trecho"""
+        times = memoryview(self.times)
+        values = memoryview(self.values)
+        for begin, end in self._segments():
+            # Tempos crescentes dentro de cada trecho: busca binária no array
+            first = bisect_left(self.times, timestamp, begin, end)
+            if first < end:
+                yield times[first:end], values[first:end]
+
+    def nbytes(self) -> int:
+        return (len(self.times) + len(self.values)) * self.times.itemsize
+
+
+class Resolution:
+    """Uma resolução: média dos pontos de cada passo, gravada ao fechar o passo"""
+
+    def __init__(self, step: int, window: int):
+        self.step = step
+        self.window = window
+        self.buffer = RingBuffer(window // step)
+        self._bucket: Optional[float] = None
+        self._sum = 0.0
+        self._count = 0
+
+    def add(self, timestamp: float, value: float):
+        bucket = timestamp - timestamp % self.step
+        if bucket != self._bucket:
+            if self._count:
+                self.buffer.append(self._bucket, self._sum / self._count)
+            self._bucket, self._sum, self._count = bucket, 0.0, 0
+        self._sum += value
+        self._count += 1
+
+    def pending(self) -> Optional[Tuple[float, float]]:
+        """Passo ainda aberto (média parcial)"""
+        if not self._count:
+            return None
+        return self._bucket, self._sum / self._count
+
+
+class TimeSeriesStore:
+    """
+    Histórico das métricas do host em várias resoluções, com memória fixa
+
+    Cada snapshot do sampler é decomposto em métricas numéricas
+    ('cpu.percent', 'memory.percent', ...) e a redução para as
+    resoluções mais grossas acontece na ingestão.
+    """
+
+    def __init__(self, resolutions=RESOLUTIONS):
+        self.resolutions = tuple(resolutions)
+        self.series: Dict[str, List[Resolution]] = {}
+
+    def ingest(self, snapshot: Dict):
+        """Adicionar um snapshot (listener do MetricsSampler)"""
+        timestamp = snapshot.get("timestamp")
+        if timestamp is None:
+            return
+        for name, value in flatten_metrics(snapshot):
+            series = self.series.get(name)
+            if series is None:
+                series = self.series[name] = [Resolution(step, window) for step, window in self.resolutions]
+            for resolution in series:
+                resolution.add(timestamp, value)
+
+    def metrics(self) -> List[str]:
+        return sorted(self.series)
+
+    def query(self, metric: str, seconds: int, now: float) -> Dict:
+        """
+        Pontos dos últimos `seconds` segundos na resolução mais fina que cobre o intervalo
+
+        Raises:
+            KeyError: métrica desconhecida
+        """
+        series = self.series[metric]
+        resolution = next((r for r in series if r.window >= seconds), series[-1])
+        since = now - seconds
+
+        timestamps: List[float] = []
+        values: List[float] = []
+        for times, vals in resolution.buffer.since(since):
+            timestamps.extend(times.tolist())
+            values.extend(vals.tolist())
+        pending = resolution.pending()
+        if pending is not None and pending[0] >= since:
+            timestamps.append(pending[0])
+            values.append(pending[1])
+
+        return {
+            "metric": metric,
+            "range": seconds,
+            "resolution": resolution.step,
+            "timestamps": timestamps,
+            "values": [round(value, 3) for value in values],
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "metrics": len(self.series),
+            "resolutions": [{"step": step, "window": window} for step, window in self.resolutions],
+            "bytes": sum(r.buffer.nbytes() for series in self.series.values() for r in series),
+        }
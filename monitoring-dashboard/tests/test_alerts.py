@@ -0,0 +1,167 @@
+# monitoring-dashboard/tests/test_alerts.py
+import asyncio
+
+import pytest
+
+from alert_standins import RECEIVED, serve_http
+from alerts import Alert, AlertDispatcher, AlertSystem
+from sampler import STATUS_THRESHOLDS, status_for
+
+CHANNEL_ENV = ("TELEGRAM_BOT_TOKEN", "TELEGRAM_CHAT_ID", "TELEGRAM_API_URL", "ALERT_SMTP_HOST",
+               "ALERT_SMTP_PORT", "ALERT_SMTP_SSL", "ALERT_SMTP_USER", "ALERT_EMAIL_FROM", "ALERT_EMAIL_TO")
+
+
+class FakeSystem:
+    """AlertSystem sem rede: registra os envios e devolve `failures` canais com falha"""
+
+    evaluate = staticmethod(AlertSystem.evaluate)
+
+    def __init__(self, channels=1, failures=0):
+        self.telegram_enabled = channels >= 1
+        self.email_enabled = channels >= 2
+        self.failures = failures
+        self.sent = []
+
+    def send(self, subject, message):
+        self.sent.append((subject, message))
+        return self.failures
+
+    def close(self):
+        pass
+
+
+def _alert(metric="cpu", severity="critical", value=95.0, timestamp=1000.0):
+    return Alert(metric, severity, value, f"{metric} em {value}%", timestamp)
+
+
+def _dispatch(dispatcher, alerts):
+    async def main():
+        await dispatcher.start()
+        for alert in alerts:
+            dispatcher.submit(alert)
+        while dispatcher.queue or dispatcher.digests == 0:
+            await asyncio.sleep(0.01)
+        await dispatcher.stop()
+
+    asyncio.run(asyncio.wait_for(main(), 5))
+    return dispatcher.stats()
+
+
+@pytest.fixture
+def no_channels(monkeypatch):
+    for name in CHANNEL_ENV:
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_evaluate_picks_the_highest_severity():
+    alerts = AlertSystem.evaluate({"timestamp": 1.0, "cpu": {"percent": 90}, "memory": {"percent": 80},
+                                   "disk": {"percent": 10}})
+
+    assert [(a.metric, a.severity) for a in alerts] == [("cpu", "critical"), ("memory", "warning")]
+
+
+def test_critical_card_status_is_a_critical_alert():
+    # Acima do limite crítico do sampler: o card fica vermelho e o alerta é crítico
+    snapshot = {"timestamp": 1.0}
+    for metric, (_, critical) in STATUS_THRESHOLDS.items():
+        snapshot[metric] = {"percent": critical + 0.5}
+        assert status_for(metric, critical + 0.5) == "critical"
+
+    alerts = AlertSystem.evaluate(snapshot)
+
+    assert {(a.metric, a.severity) for a in alerts} == {(metric, "critical") for metric in STATUS_THRESHOLDS}
+
+
+def test_repeats_within_cooldown_are_suppressed_and_reported():
+    system = FakeSystem()
+    dispatcher = AlertDispatcher(system, cooldown=60, batch_window=0.01)
+
+    assert dispatcher.submit(_alert(timestamp=1000))
+    assert not dispatcher.submit(_alert(timestamp=1030))
+    assert not dispatcher.submit(_alert(timestamp=1040))
+    _dispatch(dispatcher, [])
+
+    assert dispatcher.suppressed == 2
+    assert system.sent == [("Alerta do servidor", "cpu em 95.0% (+2 repetições suprimidas)")]
+    # Passado o cooldown, o alerta volta a ser enviado
+    assert dispatcher.submit(_alert(timestamp=1061))
+
+
+def test_alerts_in_the_batch_window_go_in_one_digest():
+    system = FakeSystem()
+    stats = _dispatch(AlertDispatcher(system, cooldown=60, batch_window=0.1),
+                      [_alert("cpu"), _alert("memory", "warning", 82.0), _alert("disk")])
+
+    assert stats["digests"] == 1 and stats["delivered"] == 3
+    subject, message = system.sent[0]
+    assert subject == "3 alertas do servidor (2 críticos)"
+    assert message.count("• ") == 3
+
+
+def test_full_queue_drops_new_alerts():
+    dispatcher = AlertDispatcher(FakeSystem(), cooldown=0, queue_size=2)
+    accepted = [dispatcher.submit(_alert(metric, timestamp=1000)) for metric in ("cpu", "memory", "disk")]
+
+    assert accepted == [True, True, False]
+    assert dispatcher.dropped == 1
+
+
+@pytest.mark.parametrize("channels, failures, delivered, undelivered, failed_digests", [
+    (2, 1, 1, 0, 0),  # um canal entregou
+    (2, 2, 0, 1, 1),  # todos os canais falharam
+    (0, 0, 0, 1, 0),  # sem canais: só vai para o log
+])
+def test_delivery_is_counted_only_when_a_channel_accepts(channels, failures, delivered, undelivered,
+                                                         failed_digests):
+    stats = _dispatch(AlertDispatcher(FakeSystem(channels, failures), batch_window=0.01), [_alert()])
+
+    assert (stats["delivered"], stats["undelivered"], stats["failed_digests"], stats["failures"]) == \
+        (delivered, undelivered, failed_digests, failures)
+
+
+def test_failed_digest_releases_the_cooldown():
+    dispatcher = AlertDispatcher(FakeSystem(channels=2, failures=2), cooldown=60, batch_window=0.01)
+    _dispatch(dispatcher, [_alert(timestamp=1000)])
+
+    assert dispatcher.failed_digests == 1
+    # Nada foi entregue: a próxima ocorrência volta para a fila em vez de ser suprimida
+    assert dispatcher.submit(_alert(timestamp=1010))
+    assert dispatcher.suppressed == 0
+
+
+def test_check_and_alert_keeps_the_critical_only_behaviour(no_channels):
+    system = AlertSystem()
+    alerts = system.check_and_alert({"cpu": {"percent": 99}, "memory": {"percent": 75},
+                                     "disk": {"percent": 99}})
+
+    assert alerts == ["🚨 CRÍTICO: CPU em 99%"]
+
+
+def test_digest_reaches_the_telegram_stand_in(monkeypatch, no_channels):
+    server = serve_http(port=0)
+    RECEIVED["telegram"].clear()
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "teste")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "1")
+    monkeypatch.setenv("TELEGRAM_API_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    try:
+        stats = _dispatch(AlertDispatcher(AlertSystem(), batch_window=0.01), [_alert()])
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert stats["channels"] == ["telegram"] and stats["delivered"] == 1
+    [message] = RECEIVED["telegram"]
+    assert message["path"] == "/botteste/sendMessage"
+    assert "cpu em 95.0%" in message["text"]
+
+
+def test_unreachable_channel_is_not_counted_as_delivered(monkeypatch, no_channels):
+    monkeypatch.setenv("ALERT_SMTP_HOST", "127.0.0.1")
+    monkeypatch.setenv("ALERT_SMTP_PORT", "9")
+    monkeypatch.setenv("ALERT_SMTP_SSL", "0")
+    monkeypatch.setenv("ALERT_EMAIL_FROM", "monitor@localhost")
+    monkeypatch.setenv("ALERT_EMAIL_TO", "ops@localhost")
+
+    stats = _dispatch(AlertDispatcher(AlertSystem(), batch_window=0.01), [_alert()])
+
+    assert (stats["delivered"], stats["undelivered"], stats["failed_digests"]) == (0, 1, 1)
@@ -0,0 +1,94 @@
+# monitoring-dashboard/tests/test_broadcast.py
+import asyncio
+import json
+
+from broadcast import BroadcastHub, ClientQueue
+
+
+class FakeWebSocket:
+    """WebSocket mínimo para BroadcastHub.serve; `gate` segura os envios (cliente lento)"""
+
+    def __init__(self, gate: asyncio.Event = None):
+        self.sent = []
+        self.gate = gate
+        self.closed = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+    async def receive(self):
+        await self.closed.wait()
+        return {"type": "websocket.disconnect"}
+
+
+async def _until(predicate, timeout=2):
+    async def wait():
+        while not predicate():
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(wait(), timeout)
+
+
+def test_client_queue_drops_oldest_frames():
+    async def main():
+        queue = ClientQueue(2)
+        for frame in "abc":
+            queue.push(frame)
+        return list(queue.frames), queue.dropped
+
+    assert asyncio.run(main()) == (["b", "c"], 1)
+
+
+def test_every_client_receives_each_snapshot():
+    async def main():
+        hub = BroadcastHub(queue_size=8)
+        sockets = [FakeWebSocket() for _ in range(3)]
+        tasks = [asyncio.create_task(hub.serve(ws, initial={"n": 0})) for ws in sockets]
+        await _until(lambda: len(hub.clients) == 3)
+
+        for n in (1, 2):
+            hub.publish({"n": n})
+        await _until(lambda: all(len(ws.sent) == 3 for ws in sockets))
+
+        for ws in sockets:
+            ws.closed.set()
+        await asyncio.gather(*tasks)
+        return hub, sockets
+
+    hub, sockets = asyncio.run(main())
+
+    assert all(ws.sent == [{"n": 0}, {"n": 1}, {"n": 2}] for ws in sockets)
+    stats = hub.stats()
+    assert (stats["connected"], stats["disconnections"], stats["sent"]) == (0, 3, 9)
+
+
+def test_slow_client_only_loses_its_own_old_frames():
+    async def main():
+        hub = BroadcastHub(queue_size=2)
+        gate = asyncio.Event()
+        slow, fast = FakeWebSocket(gate), FakeWebSocket()
+        tasks = [asyncio.create_task(hub.serve(ws)) for ws in (slow, fast)]
+        await _until(lambda: len(hub.clients) == 2)
+
+        hub.publish({"n": 1})
+        await _until(lambda: len(fast.sent) == 1)  # o lento está preso enviando n=1
+        for n in range(2, 6):
+            hub.publish({"n": n})
+            await _until(lambda: len(fast.sent) == n)
+
+        gate.set()
+        await _until(lambda: len(slow.sent) == 3)
+        for ws in (slow, fast):
+            ws.closed.set()
+        await asyncio.gather(*tasks)
+        return hub, slow, fast
+
+    hub, slow, fast = asyncio.run(main())
+
+    assert [frame["n"] for frame in fast.sent] == [1, 2, 3, 4, 5]
+    assert [frame["n"] for frame in slow.sent] == [1, 4, 5]
+    assert hub.stats()["dropped"] == 2
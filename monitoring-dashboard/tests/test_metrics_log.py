@@ -0,0 +1,142 @@
+# monitoring-dashboard/tests/test_metrics_log.py
+import os
+
+import pytest
+
+from metrics_log import RAW_PREFIX, SEGMENT_PREFIX, LogFile, MetricsLog
+
+T0 = 1_700_000_000
+
+
+def _log(tmp_path, **options):
+    options = {"raw_span": 600, "raw_retention": 3600, "retention": 86400, "fsync_every": 1, **options}
+    return MetricsLog(directory=str(tmp_path), **options)
+
+
+def _snapshot(timestamp, cpu, memory=50.0):
+    return {"timestamp": timestamp, "status": "online", "cpu": {"percent": cpu}, "memory": {"percent": memory}}
+
+
+def _files(tmp_path, prefix):
+    return sorted(name for name in os.listdir(tmp_path) if name.startswith(prefix))
+
+
+def test_append_and_query(tmp_path):
+    log = _log(tmp_path)
+    for i in range(120):
+        log.append(_snapshot(T0 + i, float(i)))
+
+    result = log.query("cpu.percent", 60, now=T0 + 119, max_points=60)
+    log.close()
+
+    assert result["source"] == "disk"
+    assert result["timestamps"][0] == T0 + 59
+    assert result["values"][-1] == 119.0
+    with pytest.raises(KeyError):
+        log.query("gpu.percent", 60, now=T0 + 119)
+
+
+def test_new_file_when_metric_set_changes_or_span_ends(tmp_path):
+    log = _log(tmp_path, raw_span=60)
+    log.append(_snapshot(T0, 1.0))
+    log.append({"timestamp": T0 + 1, "cpu": {"percent": 2.0}})  # sem memória: outras colunas
+    log.append(_snapshot(T0 + 61, 3.0))
+    log.close()
+
+    assert len(_files(tmp_path, RAW_PREFIX)) == 3
+
+
+def test_writer_thread_keeps_records_in_order(tmp_path):
+    log = _log(tmp_path, fsync_every=50)
+    log.start()
+    for i in range(500):
+        log.append(_snapshot(T0 + i, float(i)))
+    log.close()
+
+    [name] = _files(tmp_path, RAW_PREFIX)
+    with LogFile(os.path.join(tmp_path, name)) as source:
+        times = [record[0] for record in source.records()]
+    assert times == [float(T0 + i) for i in range(500)]
+    assert log.stats()["dropped"] == 0
+
+
+def test_writer_thread_survives_unexpected_errors(tmp_path):
+    log = _log(tmp_path)
+    write = log._write
+
+    def flaky_write(timestamp, values):
+        if timestamp == T0:
+            raise ValueError("registro inválido")
+        write(timestamp, values)
+
+    log._write = flaky_write
+    log.start()
+    for i in range(3):
+        log.append(_snapshot(T0 + i, float(i)))
+    log.close()
+
+    assert log.stats()["errors"] == 1
+    result = log.query("cpu.percent", 60, now=T0 + 2)
+    assert result["values"] == [1.0, 2.0]
+
+
+def test_compaction_replaces_old_raw_files_with_minute_averages(tmp_path):
+    log = _log(tmp_path, raw_span=120)
+    for i in range(240):
+        log.append(_snapshot(T0 + i, float(i % 60)))
+    log.close()
+    assert len(_files(tmp_path, RAW_PREFIX)) == 2
+
+    result = MetricsLog(directory=str(tmp_path), raw_span=120, raw_retention=60).compact(now=T0 + 4000)
+
+    assert result == {"compacted": 2, "deleted": 0}
+    assert _files(tmp_path, RAW_PREFIX) == []
+    with LogFile(os.path.join(tmp_path, _files(tmp_path, SEGMENT_PREFIX)[0])) as segment:
+        assert segment.step == 60
+        records = [list(record) for record in segment.records()]
+    # T0 cai no segundo 20 do minuto: o primeiro arquivo cobre três minutos
+    minute = T0 - T0 % 60
+    assert records == [[minute, 19.5, 50.0], [minute + 60, 29.5, 50.0], [minute + 120, 49.5, 50.0]]
+
+
+def test_retention_and_disk_budget_delete_oldest_first(tmp_path):
+    log = _log(tmp_path, raw_span=60)
+    for i in range(0, 600, 5):
+        log.append(_snapshot(T0 + i, 1.0))
+    log.close()
+    files = _files(tmp_path, RAW_PREFIX)
+
+    budget = sum(os.path.getsize(os.path.join(tmp_path, name)) for name in files[-3:])
+    result = MetricsLog(directory=str(tmp_path), raw_span=60, raw_retention=10 ** 9,
+                        max_bytes=budget).compact(now=T0 + 600)
+
+    assert result["deleted"] == len(files) - 3
+    assert _files(tmp_path, RAW_PREFIX) == files[-3:]
+
+
+def test_recovery_finishes_an_interrupted_compaction(tmp_path):
+    log = _log(tmp_path)
+    log.append(_snapshot(T0, 1.0))
+    log.close()
+    [raw] = _files(tmp_path, RAW_PREFIX)
+    segment = SEGMENT_PREFIX + raw[len(RAW_PREFIX):]
+    # Queda entre gravar o segmento e apagar o bruto, com um temporário sobrando
+    (tmp_path / segment).write_bytes((tmp_path / raw).read_bytes())
+    (tmp_path / (segment + ".tmp")).write_bytes(b"parcial")
+
+    _log(tmp_path)
+
+    assert sorted(os.listdir(tmp_path)) == [segment]
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    log = _log(tmp_path)
+    for i in range(3):
+        log.append(_snapshot(T0 + i, float(i)))
+    log.close()
+    [raw] = _files(tmp_path, RAW_PREFIX)
+    with open(tmp_path / raw, "ab") as f:
+        f.write(b"\0" * 10)  # registro pela metade (queda durante a escrita)
+
+    with LogFile(os.path.join(tmp_path, raw)) as source:
+        assert source.rows == 3
@@ -0,0 +1,150 @@
+# monitoring-dashboard/tests/test_sampler.py
+import asyncio
+from types import SimpleNamespace
+
+from sampler import GB, CounterRates, DiskCollector, MetricsSampler, NetworkCollector, TopProcesses, status_for
+
+
+def test_status_thresholds():
+    assert status_for("cpu", 59.9) == "normal"
+    assert status_for("cpu", 60) == "warning"
+    assert status_for("disk", 95) == "critical"
+
+
+def test_counter_rates(monkeypatch):
+    clock = iter([100.0, 102.0, 103.0])
+    monkeypatch.setattr("sampler.time.monotonic", lambda: next(clock))
+    rates = CounterRates()
+
+    assert rates.update({"sent": 1000}) == {"sent": 0.0}
+    assert rates.update({"sent": 3000}) == {"sent": 1000.0}
+    # Contador que volta atrás (interface reiniciada) não gera taxa negativa
+    assert rates.update({"sent": 10}) == {"sent": 0.0}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_disk_usage_is_read_at_most_once_per_interval(monkeypatch):
+    clock = FakeClock()
+    usage_reads = []
+    io = SimpleNamespace(read_bytes=0, write_bytes=0, read_count=0, write_count=0)
+    monkeypatch.setattr("sampler.time.monotonic", clock)
+    monkeypatch.setattr("sampler.psutil.disk_usage", lambda path: usage_reads.append(path) or
+                        SimpleNamespace(percent=50.0 + len(usage_reads), used=GB, total=4 * GB))
+    monkeypatch.setattr("sampler.psutil.disk_io_counters", lambda: io)
+    disk = DiskCollector("/dados", usage_interval=30)
+
+    first = disk()
+    clock.now += 10
+    io.read_bytes = 5000
+    second = disk()
+    clock.now += 30
+    third = disk()
+
+    assert usage_reads == ["/dados", "/dados"]
+    # Entre leituras o uso é repetido, mas as taxas de E/S continuam atualizadas
+    assert first["percent"] == second["percent"] == 51.0 and third["percent"] == 52.0
+    assert second["io"]["read_bytes_per_s"] == 500.0
+    assert second["used"] == 1.0 and second["status"] == "normal"
+
+
+def test_network_rates_are_deltas_and_survive_counter_resets(monkeypatch):
+    clock = FakeClock()
+    counters = iter([(10 * 1024 * 1024, 0, 100, 0), (10 * 1024 * 1024 + 4000, 2000, 140, 20), (500, 100, 1, 1)])
+    monkeypatch.setattr("sampler.time.monotonic", clock)
+    monkeypatch.setattr("sampler.psutil.net_io_counters", lambda: SimpleNamespace(
+        **dict(zip(("bytes_sent", "bytes_recv", "packets_sent", "packets_recv"), next(counters)))))
+    network = NetworkCollector()
+
+    first = network()
+    clock.now += 2
+    second = network()
+    clock.now += 2
+    third = network()
+
+    assert first["sent"] == 10.0 and set(first["rates"].values()) == {0.0}
+    assert second["rates"] == {"sent_bytes_per_s": 2000.0, "recv_bytes_per_s": 1000.0,
+                               "packets_sent_per_s": 20.0, "packets_recv_per_s": 10.0}
+    # Contadores zerados (interface reiniciada): taxa 0, nunca negativa
+    assert set(third["rates"].values()) == {0.0}
+
+
+def test_top_processes_are_ordered_and_cpu_is_primed(monkeypatch):
+    calls = []
+    processes = [
+        {"pid": 1, "name": "a", "username": "root", "cpu_percent": 5.0, "memory_percent": 1.0},
+        {"pid": 2, "name": "b", "username": "root", "cpu_percent": None, "memory_percent": 9.0},
+        {"pid": 3, "name": "c", "username": "app", "cpu_percent": 30.0, "memory_percent": 2.123},
+        {"pid": 4, "name": "d", "username": "app", "cpu_percent": 5.0, "memory_percent": 3.0},
+    ]
+
+    def process_iter(attrs):
+        calls.append(attrs)
+        return [SimpleNamespace(info=info) for info in processes]
+
+    monkeypatch.setattr("sampler.psutil.process_iter", process_iter)
+    top = TopProcesses(limit=3)
+
+    # A criação já faz a primeira leitura de CPU (sempre 0 no psutil)
+    assert calls == [["cpu_percent"]]
+    table = top()
+    assert [p["pid"] for p in table] == [3, 4, 1]  # CPU e, no empate, memória
+    assert table[0] == {"pid": 3, "name": "c", "user": "app", "cpu_percent": 30.0, "memory_percent": 2.12}
+    assert calls[1] == TopProcesses.ATTRS
+
+
+def _sampler():
+    sampler = MetricsSampler(interval=0.05)
+    sampler.collectors = {}
+    sampler.min_intervals = {}
+    return sampler
+
+
+def test_slow_collectors_respect_min_interval():
+    sampler = _sampler()
+    calls = []
+    sampler.add_collector("caro", lambda: calls.append(1) or len(calls), min_interval=60)
+
+    first = sampler.sample()
+    second = sampler.sample()
+
+    assert calls == [1]
+    assert first["caro"] == second["caro"] == 1
+
+
+def test_failing_collector_does_not_break_the_snapshot():
+    sampler = _sampler()
+    sampler.add_collector("ok", lambda: 1)
+    sampler.add_collector("falha", lambda: 1 / 0)
+
+    snapshot = sampler.sample()
+
+    assert snapshot["ok"] == 1 and "falha" not in snapshot
+    assert snapshot["status"] == "online"
+    assert sampler.errors == 1
+
+
+def test_background_task_publishes_to_listeners():
+    sampler = _sampler()
+    sampler.add_collector("valor", lambda: 42)
+    received, timings = [], []
+    sampler.add_listener(received.append)
+    sampler.add_listener(lambda snapshot: 1 / 0)  # um listener com erro não afeta os demais
+    sampler.add_timing_listener(lambda name, seconds: timings.append(name))
+
+    async def main():
+        await sampler.start()
+        await asyncio.sleep(0.2)
+        await sampler.stop()
+
+    asyncio.run(main())
+
+    assert len(received) >= 2
+    assert sampler.snapshot["valor"] == 42
+    assert {"valor", "sample"} <= set(timings)
@@ -0,0 +1,63 @@
+# monitoring-dashboard/tests/test_self_metrics.py
+import asyncio
+
+from self_metrics import EndpointTimer, LatencyHistogram, SelfMetrics
+
+
+def test_histogram_quantiles_use_bucket_upper_bounds():
+    histogram = LatencyHistogram(buckets_ms=(1, 10, 100))
+    for seconds in [0.0005] * 90 + [0.005] * 9 + [0.5]:
+        histogram.observe(seconds)
+
+    summary = histogram.summary()
+
+    assert summary["count"] == 100
+    assert (summary["p50_ms"], summary["p95_ms"]) == (1, 10)
+    # Acima do maior limite: o quantil é o máximo observado
+    assert summary["p99_ms"] == 10 and summary["max_ms"] == 500.0
+    assert summary["buckets_ms"] == {"1": 90, "10": 9, "100": 0, "+Inf": 1}
+
+
+def test_empty_histogram():
+    summary = LatencyHistogram().summary()
+    assert summary["count"] == 0 and summary["p50_ms"] is None and summary["mean_ms"] is None
+
+
+def test_endpoint_timer_groups_by_route_pattern():
+    metrics = SelfMetrics(lag_interval=0.01)
+
+    class Route:
+        path = "/api/metrics/history"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route()
+
+    async def main():
+        timer = EndpointTimer(app, metrics)
+        for query in ("range=1h", "range=24h"):
+            await timer({"type": "http", "query_string": query.encode()}, None, None)
+        await timer({"type": "lifespan"}, None, None)
+
+    asyncio.run(main())
+
+    assert list(metrics.endpoints) == ["/api/metrics/history"]
+    assert metrics.endpoints["/api/metrics/history"].count == 2
+
+
+def test_snapshot_reports_collectors_and_event_loop_lag():
+    metrics = SelfMetrics(lag_interval=0.01)
+    metrics.observe_collector("cpu", 0.002)
+    metrics.observe_collector("sample", 0.003)
+
+    async def main():
+        await metrics.start()
+        await asyncio.sleep(0.1)
+        await metrics.stop()
+
+    asyncio.run(main())
+    snapshot = metrics.snapshot()
+
+    assert snapshot["sampler"]["collectors"]["cpu"]["count"] == 1
+    assert snapshot["sampler"]["cycle"]["count"] == 1
+    assert snapshot["event_loop_lag"]["count"] >= 1
+    assert snapshot["process"]["rss_mb"] > 0
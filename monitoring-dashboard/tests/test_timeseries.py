@@ -0,0 +1,55 @@
+# monitoring-dashboard/tests/test_timeseries.py
+import pytest
+
+from timeseries import RingBuffer, TimeSeriesStore, flatten_metrics, parse_range
+
+
+def _points(buffer, since=0):
+    return [(t, v) for times, values in buffer.since(since) for t, v in zip(times.tolist(), values.tolist())]
+
+
+def test_parse_range():
+    assert parse_range("90") == 90
+    assert parse_range("10m") == 600
+    assert parse_range("24h") == 86400
+    assert parse_range("30d") == 30 * 86400
+    with pytest.raises(ValueError):
+        parse_range("1 semana")
+
+
+def test_flatten_metrics_keeps_numbers_only():
+    snapshot = {"timestamp": 1.0, "status": "online", "online": True,
+                "cpu": {"percent": 12.5, "cores": [1, 2]}, "memory": {"percent": 40}}
+
+    assert dict(flatten_metrics(snapshot)) == {"cpu.percent": 12.5, "memory.percent": 40.0}
+
+
+def test_ring_buffer_overwrites_oldest_points():
+    buffer = RingBuffer(4)
+    for t in range(6):
+        buffer.append(float(t), t * 10.0)
+
+    assert _points(buffer) == [(2.0, 20.0), (3.0, 30.0), (4.0, 40.0), (5.0, 50.0)]
+    # Trecho que dá a volta no array continua em ordem e filtrado por tempo
+    assert _points(buffer, since=3.5) == [(4.0, 40.0), (5.0, 50.0)]
+    assert buffer.nbytes() == 2 * 4 * 8
+
+
+def test_store_downsamples_into_coarser_resolutions():
+    store = TimeSeriesStore(resolutions=((1, 60), (10, 600)))
+    for t in range(100, 125):
+        store.ingest({"timestamp": float(t), "cpu": {"percent": float(t % 10)}})
+
+    fine = store.query("cpu.percent", 30, now=124.5)
+    coarse = store.query("cpu.percent", 300, now=124.5)
+
+    assert fine["resolution"] == 1 and len(fine["timestamps"]) == 25
+    assert coarse["resolution"] == 10
+    # Médias de 100-109 e 110-119, mais o passo 120-124 ainda aberto
+    assert coarse["timestamps"] == [100.0, 110.0, 120.0]
+    assert coarse["values"] == [4.5, 4.5, 2.0]
+
+
+def test_unknown_metric_raises_key_error():
+    with pytest.raises(KeyError):
+        TimeSeriesStore().query("gpu.percent", 60, now=0)
@@ -1,9 +1,31 @@
 import os
-from flask import Flask, render_template, request, jsonify
-from flask_sqlalchemy import SQLAlchemy
+import sys
+import csv
+import io
+import json
+import atexit
+import time
+import click
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
 from datetime import datetime, timedelta
 import logging
 
+# Módulos auxiliares em src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from models import db
+from database import get_weather_page, iter_weather_data
+from rollups import backfill_rollups, default_range, get_aggregates
+from migrations import ensure_indexes
+from partitions import all_rows, ensure_views, prune_partitions, rollover_partitions
+from archive import ArchiveReader, export_archive
+from weather_cache import WeatherCache, make_key
+from refresher import CacheRefresher
+from live_updates import LiveUpdates
+from response_cache import ResponseCache
+from write_buffer import WriteBehindBuffer
+from rate_limiter import create_rate_limiter
+from metrics import CONTENT_TYPE, REGISTRY, Counter, Gauge, Histogram
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,7 +35,8 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///weather.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-db = SQLAlchemy(app)
+# Mesma instância usada pelos modelos em src/ (WeatherData)
+db.init_app(app)
 
 # Modelo para histórico de consultas
 class WeatherQuery(db.Model):
@@ -23,6 +46,12 @@ class WeatherQuery(db.Model):
     temperature = db.Column(db.Float)
     description = db.Column(db.String(100))
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # /api/history ordena por timestamp; renovação do cache agrupa por cidade
+        db.Index('ix_weather_query_timestamp', timestamp.desc()),
+        db.Index('ix_weather_query_city_timestamp', city, timestamp.desc()),
+    )
 
 # Simulação da API de Clima
 class WeatherAPI:
@@ -62,13 +91,191 @@ class WeatherAPI:
                 'wind_speed': round(random.uniform(0, 12), 1)
             })
         return forecasts
+    
+    def get_many_current(self, cities, country_code=None):
+        """Simulação - consulta sequencial de várias cidades"""
+        return [self.get_current_weather(city, cc or country_code) for city, cc in cities]
+    
+    def get_many_forecasts(self, cities, country_code=None, days=5):
+        """Simulação - previsão sequencial de várias cidades"""
+        return [self.get_weather_forecast(city, cc or country_code, days) for city, cc in cities]
+
+USE_OPENWEATHER = os.getenv('WEATHER_BACKEND', 'simulado') == 'openweather'
+
+def create_weather_backend(rate_limiter=None):
+    """Backend de clima: simulação (padrão) ou OpenWeather real via cliente assíncrono"""
+    if USE_OPENWEATHER:
+        from async_weather_api import AsyncWeatherAPI, BlockingWeatherClient
+        return BlockingWeatherClient(AsyncWeatherAPI(
+            concurrency=int(os.getenv('WEATHER_CONCURRENCY', 10)),
+            timeout=float(os.getenv('WEATHER_HTTP_TIMEOUT', 10)),
+            rate_limiter=rate_limiter
+        ))
+    return WeatherAPI()
+
+# Cota da OpenWeather compartilhada por todos os workers (só no backend real)
+rate_limiter = create_rate_limiter() if USE_OPENWEATHER else None
+weather_api = create_weather_backend(rate_limiter)
+
+# Cache de respostas (clima atual e previsão com TTLs separados)
+weather_cache = WeatherCache(
+    maxsize=int(os.getenv('WEATHER_CACHE_SIZE', 256)),
+    current_ttl=float(os.getenv('WEATHER_CACHE_TTL_CURRENT', 600)),
+    forecast_ttl=float(os.getenv('WEATHER_CACHE_TTL_FORECAST', 1800)),
+    stale_ttl=float(os.getenv('WEATHER_CACHE_STALE_TTL', 3600))
+)
+
+def get_hot_cities(limit):
+    """Cidades mais consultadas nas últimas horas: [(cidade, país, consultas)]"""
+    since = datetime.utcnow() - timedelta(hours=int(os.getenv('WEATHER_REFRESH_WINDOW_HOURS', 24)))
+    with app.app_context():
+        queries = all_rows(WeatherQuery)
+        total = db.func.count(queries.id)
+        rows = db.session.query(queries.city, queries.country, total) \
+            .filter(queries.timestamp >= since) \
+            .group_by(queries.city, queries.country) \
+            .order_by(total.desc()) \
+            .limit(limit).all()
+    return [(city, country, hits) for city, country, hits in rows]
+
+# Renovação antecipada das cidades mais consultadas
+cache_refresher = CacheRefresher(
+    weather_cache,
+    fetch=weather_api.get_current_weather,
+    hot_cities=get_hot_cities,
+    top_k=int(os.getenv('WEATHER_REFRESH_TOP_K', 10)),
+    interval=float(os.getenv('WEATHER_REFRESH_INTERVAL', 30)),
+    refresh_ahead=float(os.getenv('WEATHER_REFRESH_AHEAD', 60))
+)
+
+# Respostas JSON pré-codificadas (ETag/Last-Modified) para as rotas mais chamadas
+response_cache = ResponseCache(
+    maxsize=int(os.getenv('WEATHER_RESPONSE_CACHE_SIZE', 512)),
+    enabled=os.getenv('WEATHER_RESPONSE_CACHE', '1') == '1'
+)
+
+# Outros workers também gravam consultas: o histórico em cache vale no máximo isto
+HISTORY_CACHE_SECONDS = float(os.getenv('WEATHER_HISTORY_CACHE_SECONDS', 5))
+
+def cached_json(key, version, build):
+    """
+    Resposta JSON a partir do cache de respostas, com 304 para GETs condicionais
+    
+    Args:
+        key: Recurso (rota e parâmetros)
+        version: Versão dos dados; enquanto não muda, `build` não é chamado
+        build: Monta o payload da resposta
+    """
+    entry = response_cache.get(key, version, build)
+    if entry.not_modified(request.headers.get('If-None-Match'), request.headers.get('If-Modified-Since')):
+        response = Response(status=304)
+    else:
+        response = Response(entry.body, mimetype='application/json')
+    response.headers['ETag'] = entry.etag
+    response.headers['Last-Modified'] = entry.last_modified_http
+    response.headers['Cache-Control'] = 'no-cache'  # sempre revalidar
+    return response
 
-weather_api = WeatherAPI()
+# Difusão de leituras para clientes SSE (/api/weather/stream), pelo mesmo cache das rotas
+live_updates = LiveUpdates(
+    lambda specs: weather_cache.get_many_current(lambda missing: weather_api.get_many_current(missing), specs),
+    interval=float(os.getenv('WEATHER_STREAM_INTERVAL', 15)),
+    queue_size=int(os.getenv('WEATHER_STREAM_QUEUE_SIZE', 100))
+)
+atexit.register(live_updates.stop)
+
+DB_WRITE_LATENCY = Histogram('weather_db_write_duration_seconds',
+                             'Duração das gravações em lote no banco', ('table',))
+DB_WRITE_ROWS = Counter('weather_db_rows_written_total', 'Linhas gravadas no banco', ('table',))
+
+def flush_weather_queries(rows):
+    """Gravar um lote de consultas com um único insert (executemany)"""
+    started = time.perf_counter()
+    with app.app_context():
+        db.session.execute(WeatherQuery.__table__.insert(), rows)
+        db.session.commit()
+    DB_WRITE_LATENCY.observe(time.perf_counter() - started, 'weather_query')
+    DB_WRITE_ROWS.inc('weather_query', amount=len(rows))
+
+# Gravação do histórico de consultas fora do caminho crítico da requisição
+query_buffer = WriteBehindBuffer(
+    flush_weather_queries,
+    max_batch=int(os.getenv('WEATHER_QUERY_BATCH_SIZE', 100)),
+    flush_interval=float(os.getenv('WEATHER_QUERY_FLUSH_MS', 500)) / 1000,
+    max_queue=int(os.getenv('WEATHER_QUERY_QUEUE_SIZE', 10000)),
+    policy=os.getenv('WEATHER_QUERY_QUEUE_POLICY', 'drop_oldest')
+)
+
+# Tabelas particionadas por mês e sua respectiva coluna de data
+PARTITIONED_TABLES = {
+    'weather_data': 'created_at',
+    'weather_query': 'timestamp',
+}
 
 # Criar tabelas antes do primeiro request
 with app.app_context():
     db.create_all()
     logger.info("✅ Tabelas do banco de dados criadas")
+    
+    # Bancos existentes: create_all não cria índices em tabelas já existentes
+    created = ensure_indexes(db.engine, db.metadata)
+    if created:
+        logger.info(f"✅ Índices criados: {', '.join(created)}")
+    
+    # Leituras de histórico passam por <tabela>_all (tabela principal + partições)
+    ensure_views(db.engine, PARTITIONED_TABLES)
+
+query_buffer.start()
+atexit.register(query_buffer.stop)
+
+if os.getenv('WEATHER_REFRESH_ENABLED', '1') == '1':
+    cache_refresher.start()
+
+# Métricas no formato do Prometheus (expostas em /metrics)
+REQUEST_COUNT = Counter('http_requests_total', 'Requisições HTTP atendidas', ('method', 'route', 'status'))
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Latência das requisições HTTP',
+                            ('method', 'route'))
+REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'Requisições HTTP em andamento')
+
+def _cache_metric(field):
+    return lambda: {(name,): weather_cache.stats()[name][field] for name in ('current', 'forecast')}
+
+Counter('weather_cache_hits_total', 'Acertos do cache de clima', ('cache',), fn=_cache_metric('hits'))
+Counter('weather_cache_misses_total', 'Faltas do cache de clima', ('cache',), fn=_cache_metric('misses'))
+Gauge('weather_cache_hit_ratio', 'Taxa de acerto do cache de clima', ('cache',), fn=_cache_metric('hit_ratio'))
+Gauge('weather_cache_entries', 'Entradas no cache de clima', ('cache',), fn=_cache_metric('size'))
+Gauge('weather_write_buffer_queue_depth', 'Consultas aguardando gravação',
+      fn=lambda: {(): query_buffer.stats()['queue_depth']})
+Gauge('weather_stream_subscribers', 'Clientes conectados a /api/weather/stream',
+      fn=lambda: {(): live_updates.stats()['subscribers']})
+Counter('weather_write_buffer_dropped_total', 'Consultas descartadas pela fila de gravação',
+        fn=lambda: {(): query_buffer.stats()['dropped']})
+if rate_limiter is not None:
+    Gauge('openweather_rate_limit_queue_depth', 'Requisições aguardando cota da OpenWeather', ('priority',),
+          fn=lambda: {(priority,): data['queue_depth']
+                      for priority, data in rate_limiter.stats()['priorities'].items()})
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+@app.after_request
+def record_response_status(response):
+    g.response_status = response.status_code
+    return response
+
+@app.teardown_request
+def record_request_metrics(exc):
+    # teardown roda sempre, mesmo quando uma exceção pula o after_request
+    started = g.pop('request_started', None)
+    if started is not None:
+        REQUESTS_IN_FLIGHT.dec()
+        # Rota do url_map (não o caminho), para não criar uma série por cidade/parâmetro
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = g.pop('response_status', None) or 500
+        REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, route)
+        REQUEST_COUNT.inc(request.method, route, str(status))
 
 @app.route('/')
 def index():
@@ -82,19 +289,22 @@ def get_current_weather():
     country = request.args.get('country', 'BR')
     
     try:
-        weather_data = weather_api.get_current_weather(city, country)
-        
-        # Salvar no banco
-        query = WeatherQuery(
-            city=city,
-            country=country,
-            temperature=weather_data['temperature'],
-            description=weather_data['description']
+        weather_data = weather_cache.get_current(
+            lambda: weather_api.get_current_weather(city, country),
+            city, country
         )
-        db.session.add(query)
-        db.session.commit()
         
-        return jsonify({
+        # Salvar no banco (em lote, pela thread de gravação)
+        query_buffer.submit({
+            'city': city,
+            'country': country,
+            'temperature': weather_data['temperature'],
+            'description': weather_data['description'],
+            'timestamp': datetime.utcnow()
+        })
+        
+        # O dict do cache é a versão: a resposta só é recodificada quando ele muda
+        return cached_json(('current',) + make_key(city, country), weather_data, lambda: {
             'success': True,
             'data': weather_data
         })
@@ -113,7 +323,10 @@ def get_weather_forecast():
     days = int(request.args.get('days', 5))
     
     try:
-        forecast_data = weather_api.get_weather_forecast(city, country, days)
+        forecast_data = weather_cache.get_forecast(
+            lambda: weather_api.get_weather_forecast(city, country, days),
+            city, country, days
+        )
         return jsonify({
             'success': True,
             'data': forecast_data
@@ -125,21 +338,203 @@ def get_weather_forecast():
             'error': 'Erro ao obter previsão'
         }), 500
 
+@app.route('/api/weather/batch')
+def get_weather_batch():
+    """API para obter clima atual (ou previsão) de várias cidades de uma vez"""
+    cities = [c.strip() for c in request.args.get('cities', '').split(',') if c.strip()]
+    country = request.args.get('country', 'BR')
+    kind = request.args.get('type', 'current')
+    days = int(request.args.get('days', 5))
+    
+    if not cities:
+        return jsonify({
+            'success': False,
+            'error': 'Informe ao menos uma cidade em "cities"'
+        }), 400
+    
+    specs = [(city, country) for city in cities]
+    try:
+        if kind == 'forecast':
+            results = weather_cache.get_many_forecasts(
+                lambda missing: weather_api.get_many_forecasts(missing, country, days),
+                specs, days
+            )
+        else:
+            results = weather_cache.get_many_current(
+                lambda missing: weather_api.get_many_current(missing, country),
+                specs
+            )
+        return jsonify({
+            'success': True,
+            'data': dict(zip(cities, results))
+        })
+    except Exception as e:
+        logger.error(f"Erro na consulta em lote: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Erro interno do servidor'
+        }), 500
+
+@app.route('/api/weather/stream')
+def stream_weather():
+    """Atualizações ao vivo (Server-Sent Events) do clima atual das cidades informadas"""
+    cities = [c.strip() for c in request.args.get('cities', '').split(',') if c.strip()]
+    country = request.args.get('country', 'BR')
+    
+    if not cities:
+        return jsonify({
+            'success': False,
+            'error': 'Informe ao menos uma cidade em "cities"'
+        }), 400
+    
+    subscription = live_updates.subscribe([(city, country) for city in cities])
+    heartbeat = float(os.getenv('WEATHER_STREAM_HEARTBEAT', 15))
+    return Response(subscription.stream(heartbeat), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # nginx: não acumular o stream
+    })
+
+@app.route('/api/weather/refresher')
+def get_refresher_status():
+    """Agenda, atraso e falhas da renovação antecipada do cache"""
+    return jsonify({
+        'success': True,
+        'data': cache_refresher.status()
+    })
+
 @app.route('/api/history')
 def get_query_history():
     """Histórico de consultas"""
-    queries = WeatherQuery.query.order_by(WeatherQuery.timestamp.desc()).limit(10).all()
-    history = [{
-        'city': q.city,
-        'country': q.country,
-        'temperature': q.temperature,
-        'description': q.description,
-        'timestamp': q.timestamp.isoformat()
-    } for q in queries]
+    def build():
+        weather_queries = all_rows(WeatherQuery)
+        queries = db.session.query(weather_queries).order_by(weather_queries.timestamp.desc()).limit(10).all()
+        history = [{
+            'city': q.city,
+            'country': q.country,
+            'temperature': q.temperature,
+            'description': q.description,
+            'timestamp': q.timestamp.isoformat()
+        } for q in queries]
+        return {
+            'success': True,
+            'data': history
+        }
+    
+    # Versão: lotes gravados por este worker + janela de tempo (gravações de outros workers)
+    version = (query_buffer.stats()['flushed'], int(time.time() // HISTORY_CACHE_SECONDS))
+    return cached_json(('history',), version, build)
+
+def _requested_fields():
+    fields = request.args.get('fields')
+    return [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+
+@app.route('/api/weather/data')
+def get_weather_data_page():
+    """Registros de WeatherData paginados por cursor"""
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'limit deve ser um número inteiro'
+        }), 400
+    limit = max(1, min(limit, 500))
+    
+    try:
+        rows, next_cursor = get_weather_page(
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            city=request.args.get('city'),
+            fields=_requested_fields()
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     
     return jsonify({
         'success': True,
-        'data': history
+        'data': rows,
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/weather/data/export')
+def export_weather_data():
+    """Exportação completa de WeatherData em NDJSON ou CSV, via streaming"""
+    export_format = request.args.get('format', 'ndjson')
+    city = request.args.get('city')
+    fields = _requested_fields()
+    
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({
+            'success': False,
+            'error': 'Formato inválido (use ndjson ou csv)'
+        }), 400
+    
+    try:
+        rows = iter_weather_data(city=city, fields=fields)
+        first = next(rows, None)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    def generate_ndjson():
+        if first is None:
+            return
+        yield json.dumps(first, ensure_ascii=False) + '\n'
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+    
+    def generate_csv():
+        if first is None:
+            return
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(first))
+        writer.writeheader()
+        writer.writerow(first)
+        for row in rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(row)
+        yield buffer.getvalue()
+    
+    if export_format == 'csv':
+        return Response(stream_with_context(generate_csv()), mimetype='text/csv',
+                        headers={'Content-Disposition': 'attachment; filename=weather_data.csv'})
+    return Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+
+@app.route('/api/weather/aggregate')
+def get_weather_aggregate():
+    """Mínima/máxima/média por hora ou dia, a partir das tabelas de agregados"""
+    city = request.args.get('city')
+    bucket = request.args.get('bucket', 'hour')
+    
+    if not city:
+        return jsonify({
+            'success': False,
+            'error': 'Parâmetro "city" é obrigatório'
+        }), 400
+    
+    try:
+        start, end = default_range(bucket)
+        if request.args.get('from'):
+            start = datetime.fromisoformat(request.args['from'])
+        if request.args.get('to'):
+            end = datetime.fromisoformat(request.args['to'])
+        data = get_aggregates(city, bucket, start, end)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'data': data
     })
 
 @app.route('/api/health')
@@ -149,14 +544,65 @@ def health_check():
         'status': 'healthy',
         'timestamp': datetime.utcnow().isoformat(),
         'service': 'Weather Monitoring API',
-        'database': 'SQLite'
+        'database': 'SQLite',
+        'cache': weather_cache.stats(),
+        'write_buffer': query_buffer.stats(),
+        'rate_limiter': rate_limiter.stats() if rate_limiter is not None else None,
+        'live_updates': live_updates.stats(),
+        'response_cache': response_cache.stats()
     })
 
+@app.route('/metrics')
+def metrics():
+    """Métricas no formato texto do Prometheus"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 @app.route('/dashboard')
 def dashboard():
     """Dashboard de monitoramento climático"""
     return render_template('dashboard.html')
 
+@app.cli.command('rollover-partitions')
+def rollover_partitions_command():
+    """Mover dados de meses anteriores para partições mensais e aplicar retenção"""
+    hot_months = int(os.getenv('WEATHER_PARTITION_HOT_MONTHS', 1))
+    retention_months = int(os.getenv('WEATHER_RETENTION_MONTHS', 12))
+    
+    for table, column in PARTITIONED_TABLES.items():
+        moved = rollover_partitions(db.engine, table, column, hot_months)
+        dropped = prune_partitions(db.engine, table, retention_months)
+        logger.info(f"{table}: {sum(moved.values())} linhas movidas para {len(moved)} partições, "
+                    f"{len(dropped)} partições removidas")
+
+@app.cli.command('backfill-rollups')
+@click.option('--since', type=click.DateTime(), help='Início (UTC; padrão: leitura mais antiga)')
+@click.option('--until', type=click.DateTime(), help='Fim, exclusivo (UTC; padrão: leitura mais recente)')
+def backfill_rollups_command(since, until):
+    """Recalcular os agregados horários e diários a partir de weather_data e partições"""
+    processed = backfill_rollups(since, until)
+    logger.info(f"✅ Agregados recalculados a partir de {processed} leituras")
+
+@app.cli.command('export-archive')
+@click.argument('path')
+@click.option('--since', type=click.DateTime(), help='Início (inclusivo, UTC)')
+@click.option('--until', type=click.DateTime(), help='Fim (exclusivo, UTC)')
+def export_archive_command(path, since, until):
+    """Exportar weather_data para o arquivo colunar compacto"""
+    exported = export_archive(path, since, until)
+    logger.info(f"✅ {exported} leituras exportadas para {path}")
+
+@app.cli.command('archive-summary')
+@click.argument('path')
+@click.option('--since', type=click.DateTime(), help='Início (inclusivo, UTC)')
+@click.option('--until', type=click.DateTime(), help='Fim (exclusivo, UTC)')
+def archive_summary_command(path, since, until):
+    """Agregados por cidade lidos direto do arquivo colunar"""
+    with ArchiveReader(path) as reader:
+        click.echo(json.dumps({
+            'archive': reader.stats(),
+            'cities': reader.aggregate_by_city(since, until)
+        }, ensure_ascii=False, indent=2))
+
 if __name__ == '__main__':
     # Criar diretório para banco de dados
     os.makedirs('instance', exist_ok=True)
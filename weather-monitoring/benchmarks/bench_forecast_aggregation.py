@@ -0,0 +1,83 @@
+"""
+Micro-benchmark da agregação diária de previsões
+
+Compara o laço original (parse_forecast por cidade) com a versão vetorizada
+(aggregate_forecasts) em respostas sintéticas de /forecast, conferindo que
+as duas produzem exatamente o mesmo resultado. As respostas usam fusos
+horários variados (city.timezone), e algumas não informam o fuso.
+
+Desde que o dia local passou a ser calculado por aritmética inteira, as
+duas versões custam o mesmo; por isso get_many_forecasts usa o laço.
+
+Uso:
+    python benchmarks/bench_forecast_aggregation.py [cidades ...]
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from forecast_agg import aggregate_forecasts  # noqa: E402
+from weather_api import parse_forecast  # noqa: E402
+
+DESCRIPTIONS = ['céu limpo', 'nuvens dispersas', 'chuva leve', 'nublado']
+# Deslocamentos UTC (s): São Paulo, Lisboa, Nova Délhi, Tóquio, Honolulu e sem fuso
+TIMEZONES = [-10800, 0, 19800, 32400, -36000, None]
+
+
+def make_payload(rng: random.Random, start: int, entries: int = 40) -> dict:
+    """Resposta sintética de /forecast com entradas a cada 3 horas"""
+    items = []
+    for i in range(entries):
+        temp = round(rng.uniform(12, 34), 2)
+        items.append({
+            'dt': start + i * 10800,
+            'main': {
+                'temp': temp,
+                'temp_min': round(temp - rng.uniform(0, 2), 2),
+                'temp_max': round(temp + rng.uniform(0, 2), 2),
+                'humidity': rng.randint(30, 95)
+            },
+            'weather': [{'description': rng.choice(DESCRIPTIONS), 'icon': '03d'}],
+            'wind': {'speed': round(rng.uniform(0, 12), 2)},
+            'pop': round(rng.random(), 2)
+        })
+    city = {'name': f"Cidade {rng.randint(0, 10 ** 6)}", 'country': 'BR'}
+    timezone = rng.choice(TIMEZONES)
+    if timezone is not None:
+        city['timezone'] = timezone
+    return {'list': items, 'city': city}
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000]
+    rng = random.Random(7)
+    start = 1_700_000_000 - 1_700_000_000 % 10800
+
+    print(f"{'cidades':>8} {'laço (ms)':>12} {'numpy (ms)':>12} {'ganho':>8}")
+    for cities in sizes:
+        payloads = [make_payload(rng, start) for _ in range(cities)]
+
+        loop = [parse_forecast(p, 5) for p in payloads]
+        vectorized = aggregate_forecasts(payloads, 5)
+        assert json.dumps(loop) == json.dumps(vectorized), "resultados divergentes"
+
+        loop_ms = best_of(lambda: [parse_forecast(p, 5) for p in payloads])
+        numpy_ms = best_of(lambda: aggregate_forecasts(payloads, 5))
+        print(f"{cities:>8} {loop_ms:>12.2f} {numpy_ms:>12.2f} {loop_ms / numpy_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
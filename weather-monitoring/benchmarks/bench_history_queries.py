@@ -0,0 +1,90 @@
+"""
+Benchmark das consultas de histórico com e sem os índices compostos
+
+Mede, para tamanhos crescentes de tabela, as duas consultas quentes:
+    - histórico por cidade (get_weather_by_city): WHERE city = ? ORDER BY created_at DESC
+    - últimos registros (/api/history): ORDER BY created_at DESC LIMIT 10
+
+Uso:
+    python benchmarks/bench_history_queries.py [linhas ...]
+"""
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+CITIES = [f"cidade_{i}" for i in range(200)]
+
+SCHEMA = """
+CREATE TABLE weather_data (
+    id INTEGER PRIMARY KEY,
+    city VARCHAR(100) NOT NULL,
+    country VARCHAR(10),
+    temperature FLOAT NOT NULL,
+    humidity INTEGER,
+    pressure INTEGER,
+    description VARCHAR(200),
+    wind_speed FLOAT,
+    created_at DATETIME
+)
+"""
+
+INDEXES = [
+    "CREATE INDEX ix_weather_data_city_created_at ON weather_data (city, created_at DESC)",
+    "CREATE INDEX ix_weather_data_created_at ON weather_data (created_at DESC)",
+]
+
+QUERIES = {
+    'por cidade': ("SELECT * FROM weather_data WHERE city = ? ORDER BY created_at DESC LIMIT 50", True),
+    'recentes': ("SELECT * FROM weather_data ORDER BY created_at DESC LIMIT 10", False),
+}
+
+
+def build_db(rows: int, indexed: bool) -> sqlite3.Connection:
+    conn = sqlite3.connect(':memory:')
+    conn.execute(SCHEMA)
+    if indexed:
+        for statement in INDEXES:
+            conn.execute(statement)
+
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    conn.executemany(
+        "INSERT INTO weather_data (city, country, temperature, humidity, pressure, description, "
+        "wind_speed, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (rng.choice(CITIES), 'BR', rng.uniform(10, 35), rng.randint(30, 90), rng.randint(1000, 1020),
+             'Nublado', rng.uniform(0, 15), (start + timedelta(seconds=30 * i)).isoformat(sep=' '))
+            for i in range(rows)
+        )
+    )
+    conn.commit()
+    return conn
+
+
+def time_query(conn: sqlite3.Connection, sql: str, per_city: bool, repeat: int = 50) -> float:
+    """Tempo médio por consulta, em milissegundos"""
+    started = time.perf_counter()
+    for i in range(repeat):
+        params = (CITIES[i % len(CITIES)],) if per_city else ()
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 500_000]
+
+    print(f"{'linhas':>10} {'consulta':<12} {'sem índice (ms)':>16} {'com índice (ms)':>16}")
+    for rows in sizes:
+        plain = build_db(rows, indexed=False)
+        indexed = build_db(rows, indexed=True)
+        for name, (sql, per_city) in QUERIES.items():
+            print(f"{rows:>10} {name:<12} {time_query(plain, sql, per_city):>16.3f} "
+                  f"{time_query(indexed, sql, per_city):>16.3f}")
+        plain.close()
+        indexed.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark do cache de respostas JSON pré-codificadas
+
+Mede o tempo de CPU por requisição (time.process_time) de /api/history e
+/api/weather/current pelo cliente de teste do Flask, em quatro modos:
+
+    sem cache (json)     monta o dict e codifica a cada requisição (como o jsonify)
+    sem cache (orjson)   idem, com o encoder orjson
+    cache                corpo servido do cache enquanto a versão não muda
+    cache + 304          GET condicional com If-None-Match
+
+Usa um banco SQLite temporário com consultas sintéticas.
+
+Uso:
+    python benchmarks/bench_response_cache.py [requisições]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['WEATHER_REFRESH_ENABLED'] = '0'
+os.environ['WEATHER_HISTORY_CACHE_SECONDS'] = '3600'
+sys.path.insert(0, BASE_DIR)
+
+import logging  # noqa: E402
+logging.disable(logging.INFO)
+
+import app as weather_app  # noqa: E402
+from response_cache import _dumps_json, _dumps_orjson, orjson  # noqa: E402
+
+
+def seed(rows: int = 200):
+    now = datetime.utcnow()
+    weather_app.flush_weather_queries([{
+        'city': f'Cidade {i % 20}', 'country': 'BR', 'temperature': 20 + i % 10,
+        'description': 'Céu Limpo', 'timestamp': now - timedelta(minutes=i)
+    } for i in range(rows)])
+
+
+def cpu_per_request(client, path: str, requests: int, headers: dict = None) -> float:
+    started = time.process_time()
+    for _ in range(requests):
+        response = client.get(path, headers=headers or {})
+        assert response.status_code in (200, 304), response.status_code
+    return (time.process_time() - started) / requests * 1e6
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    seed()
+    client = weather_app.app.test_client()
+    cache = weather_app.response_cache
+    weather_app.query_buffer.stop()  # manter a versão do histórico estável durante a medição
+
+    modes = [('sem cache (json)', False, _dumps_json, False)]
+    if orjson is not None:
+        modes.append(('sem cache (orjson)', False, _dumps_orjson, False))
+    modes += [('cache', True, cache.encoder, False), ('cache + 304', True, cache.encoder, True)]
+
+    print(f"{'rota':<24} {'modo':<20} {'CPU/req (µs)':>14}")
+    for path in ('/api/history', '/api/weather/current?city=Recife&country=BR'):
+        for name, enabled, encoder, conditional in modes:
+            cache.enabled, cache.encoder = enabled, encoder
+            cache.clear()
+            first = client.get(path)
+            headers = {'If-None-Match': first.headers['ETag']} if conditional else None
+            micros = cpu_per_request(client, path, requests, headers)
+            print(f"{path.split('?')[0]:<24} {name:<20} {micros:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Servidor local que imita a OpenWeather API (/data/2.5/weather e /forecast)
+
+Permite medir cache, pool de conexões e limites de taxa sem depender da
+API real. Latência, taxa de erros e limite de requisições são configuráveis.
+
+Uso:
+    python benchmarks/fake_openweather.py --port 8081 --latency-ms 80 --error-rate 0.02 --rate-limit 600
+
+    WEATHER_BACKEND=openweather OPENWEATHER_BASE_URL=http://localhost:8081/data/2.5 python app.py
+
+Endpoints de controle:
+    GET  /__stats  contadores de chamadas por rota, erros e 429
+    POST /__reset  zerar contadores
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DESCRIPTIONS = [('céu limpo', '01d'), ('nuvens dispersas', '03d'), ('chuva leve', '10d'), ('nublado', '04d')]
+
+
+def _seed(name: str) -> int:
+    return int(hashlib.md5(name.casefold().encode()).hexdigest()[:8], 16)
+
+
+def current_payload(name: str, lat: float = None, lon: float = None) -> dict:
+    """Resposta determinística por cidade (varia lentamente com o tempo)"""
+    rng = random.Random(_seed(name) + int(time.time() // 600))
+    description, icon = rng.choice(DESCRIPTIONS)
+    now = int(time.time())
+    temp = round(rng.uniform(10, 34), 2)
+    return {
+        'coord': {'lat': lat if lat is not None else round(rng.uniform(-33, 5), 4),
+                  'lon': lon if lon is not None else round(rng.uniform(-73, -34), 4)},
+        'weather': [{'id': 800, 'main': 'Clear', 'description': description, 'icon': icon}],
+        'main': {'temp': temp, 'feels_like': round(temp + rng.uniform(-2, 2), 2),
+                 'temp_min': temp - 1, 'temp_max': temp + 1,
+                 'pressure': rng.randint(1000, 1025), 'humidity': rng.randint(30, 95)},
+        'visibility': 10000,
+        'wind': {'speed': round(rng.uniform(0, 12), 2), 'deg': rng.randint(0, 359)},
+        'clouds': {'all': rng.randint(0, 100)},
+        'dt': now,
+        'sys': {'country': 'BR', 'sunrise': now - now % 86400 + 32400, 'sunset': now - now % 86400 + 75600},
+        'timezone': -10800,
+        'name': name.split(',')[0].title()
+    }
+
+
+def forecast_payload(name: str, cnt: int = 40) -> dict:
+    rng = random.Random(_seed(name))
+    start = int(time.time()) // 10800 * 10800 + 10800
+    items = []
+    for i in range(cnt):
+        temp = round(rng.uniform(10, 34), 2)
+        description, icon = rng.choice(DESCRIPTIONS)
+        items.append({
+            'dt': start + i * 10800,
+            'main': {'temp': temp, 'temp_min': round(temp - rng.uniform(0, 2), 2),
+                     'temp_max': round(temp + rng.uniform(0, 2), 2), 'humidity': rng.randint(30, 95)},
+            'weather': [{'description': description, 'icon': icon}],
+            'wind': {'speed': round(rng.uniform(0, 12), 2)},
+            'pop': round(rng.random(), 2)
+        })
+    return {
+        'cnt': cnt,
+        'list': items,
+        'city': {'name': name.split(',')[0].title(), 'country': 'BR', 'timezone': -10800}
+    }
+
+
+class FakeOpenWeather:
+    """Estado compartilhado: configuração, limite de taxa e contadores"""
+
+    def __init__(self, latency_ms: float = 50, jitter_ms: float = 20, error_rate: float = 0.0,
+                 rate_limit: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # requisições por minuto (0 = sem limite)
+        self._window = deque()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = {}
+            self.errors = 0
+            self.rate_limited = 0
+            self._window.clear()
+
+    def admit(self) -> bool:
+        """Janela deslizante de 60 s para o limite de requisições"""
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            while self._window and now - self._window[0] >= 60:
+                self._window.popleft()
+            if len(self._window) >= self.rate_limit:
+                self.rate_limited += 1
+                return False
+            self._window.append(now)
+            return True
+
+    def count(self, path: str):
+        with self._lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'total': sum(self.calls.values()),
+                'errors': self.errors,
+                'rate_limited': self.rate_limited
+            }
+
+
+def make_handler(state: FakeOpenWeather):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: dict, headers: dict = None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if self.path == '/__reset':
+                state.reset()
+                return self._send(200, {'reset': True})
+            self._send(404, {'cod': '404', 'message': 'not found'})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+            if url.path == '/__stats':
+                return self._send(200, state.stats())
+
+            state.count(url.path)
+            if not state.admit():
+                return self._send(429, {'cod': 429, 'message': 'rate limit'}, {'Retry-After': '1'})
+
+            delay = max(0.0, random.gauss(state.latency_ms, state.jitter_ms)) / 1000
+            time.sleep(delay)
+
+            if random.random() < state.error_rate:
+                with state._lock:
+                    state.errors += 1
+                return self._send(random.choice([500, 502, 503]), {'cod': 500, 'message': 'upstream error'})
+
+            if url.path.endswith('/weather'):
+                if 'q' in params:
+                    return self._send(200, current_payload(params['q']))
+                if 'lat' in params and 'lon' in params:
+                    lat, lon = float(params['lat']), float(params['lon'])
+                    return self._send(200, current_payload(f"{lat:.2f},{lon:.2f}", lat, lon))
+            elif url.path.endswith('/forecast') and 'q' in params:
+                return self._send(200, forecast_payload(params['q'], int(params.get('cnt', 40))))
+
+            self._send(404, {'cod': '404', 'message': 'city not found'})
+
+    return Handler
+
+
+def serve(port: int = 8081, **options) -> ThreadingHTTPServer:
+    """Criar o servidor (use serve_forever() ou uma thread para rodá-lo)"""
+    server = ThreadingHTTPServer(('0.0.0.0', port), make_handler(FakeOpenWeather(**options)))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local que imita a OpenWeather API')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=50, help='latência média')
+    parser.add_argument('--jitter-ms', type=float, default=20, help='desvio padrão da latência')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fração de respostas 5xx')
+    parser.add_argument('--rate-limit', type=int, default=0, help='requisições por minuto (0 = sem limite)')
+    args = parser.parse_args()
+
+    server = serve(args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                   error_rate=args.error_rate, rate_limit=args.rate_limit)
+    print(f"🌦️  Fake OpenWeather em http://localhost:{args.port}/data/2.5")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
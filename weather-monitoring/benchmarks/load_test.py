@@ -0,0 +1,160 @@
+"""
+Teste de carga com taxa fixa para a API do weather-monitoring
+
+Dispara requisições a uma taxa constante (malha aberta: a latência é medida
+a partir do horário agendado, sem "coordinated omission") e reporta, por
+endpoint, vazão e latências p50/p95/p99. Se --upstream apontar para o
+benchmarks/fake_openweather.py, reporta também quantas chamadas chegaram à
+"OpenWeather" durante o teste.
+
+Uso:
+    python benchmarks/load_test.py --target http://localhost:5000 --rps 100 --duration 30 \\
+        --upstream http://localhost:8081
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlparse
+
+DEFAULT_CITIES = ['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Curitiba', 'Porto Alegre',
+                  'Salvador', 'Recife', 'Fortaleza', 'Manaus', 'Brasília']
+
+ENDPOINTS = {
+    'current': '/api/weather/current?city={city}&country=BR',
+    'forecast': '/api/weather/forecast?city={city}&country=BR&days=5',
+    'history': '/api/history',
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Client:
+    """Conexão HTTP keep-alive por thread"""
+
+    def __init__(self, target: str, timeout: float = 10):
+        parsed = urlparse(target)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self, path: str) -> int:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            raise
+
+
+def upstream_stats(upstream: Optional[str]) -> Optional[Dict]:
+    if not upstream:
+        return None
+    parsed = urlparse(upstream)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=5)
+    try:
+        conn.request('GET', '/__stats')
+        return json.loads(conn.getresponse().read())
+    except (OSError, ValueError):
+        return None
+    finally:
+        conn.close()
+
+
+def run(target: str, rps: float, duration: float, endpoints: List[str], cities: List[str],
+        workers: int = 64, upstream: str = None) -> Dict:
+    client = Client(target)
+    results = {name: {'latencies': [], 'errors': 0} for name in endpoints}
+    lock = threading.Lock()
+    rng = random.Random(1)
+    before = upstream_stats(upstream)
+
+    def fire(name: str, path: str, scheduled: float):
+        try:
+            ok = client.get(path) < 500
+        except Exception:
+            ok = False
+        elapsed = (time.perf_counter() - scheduled) * 1000
+        with lock:
+            results[name]['latencies'].append(elapsed)
+            if not ok:
+                results[name]['errors'] += 1
+
+    total = int(rps * duration)
+    interval = 1.0 / rps
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i in range(total):
+            scheduled = started + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            name = endpoints[i % len(endpoints)]
+            path = ENDPOINTS[name].format(city=quote(rng.choice(cities)))
+            pool.submit(fire, name, path, scheduled)
+
+    wall = time.perf_counter() - started
+    after = upstream_stats(upstream)
+
+    report = {'target_rps': rps, 'duration_s': round(wall, 2), 'endpoints': {}}
+    for name, data in results.items():
+        latencies = data['latencies']
+        report['endpoints'][name] = {
+            'requests': len(latencies),
+            'errors': data['errors'],
+            'throughput_rps': round(len(latencies) / wall, 1),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+        }
+    if before and after:
+        report['upstream_calls'] = after['total'] - before['total']
+        report['upstream_errors'] = after['errors'] - before['errors']
+        report['upstream_rate_limited'] = after['rate_limited'] - before['rate_limited']
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga com taxa fixa')
+    parser.add_argument('--target', default='http://localhost:5000')
+    parser.add_argument('--rps', type=float, default=50)
+    parser.add_argument('--duration', type=float, default=30, help='segundos')
+    parser.add_argument('--endpoints', default='current,forecast,history')
+    parser.add_argument('--cities', default=','.join(DEFAULT_CITIES))
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--upstream', help='URL do fake_openweather para contar chamadas')
+    args = parser.parse_args()
+
+    endpoints = [name for name in args.endpoints.split(',') if name in ENDPOINTS]
+    report = run(args.target, args.rps, args.duration, endpoints, args.cities.split(','),
+                 args.workers, args.upstream)
+
+    print(f"{'endpoint':<10} {'req':>6} {'erros':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, data in report['endpoints'].items():
+        print(f"{name:<10} {data['requests']:>6} {data['errors']:>6} {data['throughput_rps']:>7} "
+              f"{data['p50_ms']:>8} {data['p95_ms']:>8} {data['p99_ms']:>8}")
+    if 'upstream_calls' in report:
+        print(f"\nChamadas à OpenWeather: {report['upstream_calls']} "
+              f"(erros: {report['upstream_errors']}, 429: {report['upstream_rate_limited']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+import json
+import mmap
+import os
+import struct
+import logging
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, or_
+
+from models import db, WeatherData
+from partitions import all_rows
+
+logger = logging.getLogger(__name__)
+
+# Arquivo colunar compacto para leituras de WeatherData
+#
+# Layout (little-endian):
+#
+#     b'WXARCH01' | u32 tamanho do cabeçalho | cabeçalho JSON | colunas
+#
+# Cada coluna começa alinhada em 64 bytes, no offset indicado no cabeçalho:
+#
+#     city, country, description   u16  códigos do dicionário (cabeçalho)
+#     ts_delta                     u32  segundos desde a leitura anterior
+#     ts_anchor                    i64  timestamp absoluto a cada `anchor_every` linhas
+#     temperature, humidity,
+#     pressure, wind_speed         f32  NaN para valores ausentes
+#
+# As linhas ficam em ordem crescente de created_at; as âncoras permitem
+# localizar um intervalo de tempo decodificando só os blocos das bordas.
+# O leitor mapeia o arquivo com mmap e cria views NumPy sem copiar dados.
+
+MAGIC = b'WXARCH01'
+ALIGNMENT = 64
+DEFAULT_ANCHOR_EVERY = 4096
+
+DICTIONARY_COLUMNS = ('city', 'country', 'description')
+MEASUREMENT_COLUMNS = ('temperature', 'humidity', 'pressure', 'wind_speed')
+
+_DTYPES = {
+    'city': '<u2', 'country': '<u2', 'description': '<u2',
+    'ts_delta': '<u4', 'ts_anchor': '<i8',
+    'temperature': '<f4', 'humidity': '<f4', 'pressure': '<f4', 'wind_speed': '<f4',
+}
+_ARRAY_TYPECODES = {'<u2': 'H', '<u4': 'I', '<i8': 'q', '<f4': 'f'}
+
+
+def _to_epoch(value: datetime) -> int:
+    """Segundos desde a época; datetimes sem fuso são tratados como UTC (como created_at)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _from_epoch(seconds: int) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class _Dictionary:
+    """Dicionário valor -> código (u16)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.values: List[Optional[str]] = []
+        self._codes: Dict[Optional[str], int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            if len(self.values) >= 0xFFFF:
+                raise ValueError(f"Valores distintos demais na coluna {self.name}")
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def write_archive(path: str, rows: Iterable[Dict], anchor_every: int = DEFAULT_ANCHOR_EVERY) -> int:
+    """
+    Gravar leituras no formato colunar
+
+    Args:
+        path: Arquivo de destino (gravado em um temporário e renomeado)
+        rows: Dicionários com as colunas de WeatherData, em ordem crescente de created_at
+        anchor_every: Intervalo (em linhas) entre timestamps absolutos
+
+    Returns:
+        Número de linhas gravadas
+    """
+    dictionaries = {name: _Dictionary(name) for name in DICTIONARY_COLUMNS}
+    columns = {name: array(_ARRAY_TYPECODES[_DTYPES[name]]) for name in _DTYPES}
+    nan = float('nan')
+    previous = None
+
+    for row in rows:
+        ts = _to_epoch(row['created_at'])
+        if previous is not None and ts < previous:
+            raise ValueError("As leituras devem estar em ordem crescente de created_at")
+
+        count = len(columns['ts_delta'])
+        if count % anchor_every == 0:
+            columns['ts_anchor'].append(ts)
+            columns['ts_delta'].append(0)
+        else:
+            columns['ts_delta'].append(ts - previous)
+        previous = ts
+
+        for name in DICTIONARY_COLUMNS:
+            columns[name].append(dictionaries[name].encode(row.get(name)))
+        for name in MEASUREMENT_COLUMNS:
+            value = row.get(name)
+            columns[name].append(nan if value is None else value)
+
+    row_count = len(columns['ts_delta'])
+    header = {
+        'version': 1,
+        'rows': row_count,
+        'anchor_every': anchor_every,
+        'min_ts': columns['ts_anchor'][0] if row_count else None,
+        'max_ts': previous,
+        'dictionaries': {name: dictionary.values for name, dictionary in dictionaries.items()},
+        'columns': {}
+    }
+
+    # Offsets dependem do tamanho do cabeçalho, que depende dos offsets: reservar
+    # espaço suficiente calculando com um cabeçalho provisório
+    sizes = {name: len(column) * column.itemsize for name, column in columns.items()}
+    header['columns'] = {name: {'dtype': _DTYPES[name], 'offset': 0, 'length': len(columns[name])}
+                         for name in columns}
+    provisional = len(json.dumps(header).encode()) + 32 * len(columns) + 16
+    offset = _align(len(MAGIC) + 4 + provisional)
+    for name in columns:
+        header['columns'][name]['offset'] = offset
+        offset = _align(offset + sizes[name])
+
+    header_bytes = json.dumps(header).encode().ljust(provisional)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for name, column in columns.items():
+            f.write(b'\0' * (header['columns'][name]['offset'] - f.tell()))
+            column.tofile(f)
+        f.write(b'\0' * (offset - f.tell()))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    logger.info(f"Arquivo colunar gravado: {path} ({row_count} leituras, {offset} bytes)")
+    return row_count
+
+
+class ArchiveReader:
+    """
+    Leitura de um arquivo colunar via mmap
+
+    As colunas são views NumPy sobre o mmap: abrir o arquivo não lê os
+    dados, e uma consulta por intervalo toca apenas as páginas necessárias.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Arquivo inválido: {path}")
+        (header_size,) = struct.unpack_from('<I', self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(self._mmap[start:start + header_size]))
+
+        self.rows = self.header['rows']
+        self.anchor_every = self.header['anchor_every']
+        self.dictionaries = self.header['dictionaries']
+        self.columns = {
+            name: np.frombuffer(self._mmap, dtype=spec['dtype'], count=spec['length'], offset=spec['offset'])
+            for name, spec in self.header['columns'].items()
+        }
+
+    def __enter__(self) -> 'ArchiveReader':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def close(self):
+        # As views NumPy mantêm o mmap exportado; soltá-las antes de fechar
+        self.columns = {}
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Ainda há arrays do chamador apontando para o mmap: o GC fecha depois
+            pass
+        self._file.close()
+
+    def timestamps(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """Timestamps (segundos, UTC) das linhas [start, stop)"""
+        stop = self.rows if stop is None else stop
+        if start >= stop:
+            return np.empty(0, dtype=np.int64)
+
+        # Decodificar a partir da âncora do primeiro bloco envolvido
+        block = start // self.anchor_every
+        block_start = block * self.anchor_every
+        deltas = self.columns['ts_delta'][block_start:stop].astype(np.int64)
+        anchor_rows = np.arange(block_start, stop, self.anchor_every) - block_start
+        ts = np.cumsum(deltas)
+
+        # Reiniciar a soma em cada âncora
+        anchors = self.columns['ts_anchor'][block:block + len(anchor_rows)]
+        offsets = anchors - ts[anchor_rows]
+        ts += np.repeat(offsets, np.diff(np.append(anchor_rows, len(ts))))
+        return ts[start - block_start:]
+
+    def _first_row_at(self, epoch: int) -> int:
+        """Primeira linha com timestamp >= epoch"""
+        # Último bloco cuja âncora é < epoch: a resposta está nele ou no início do seguinte
+        block = max(0, int(np.searchsorted(self.columns['ts_anchor'], epoch, side='left')) - 1)
+        start = block * self.anchor_every
+        ts = self.timestamps(start, min(self.rows, start + self.anchor_every))
+        return start + int(np.searchsorted(ts, epoch, side='left'))
+
+    def row_range(self, since: datetime = None, until: datetime = None) -> Tuple[int, int]:
+        """Linhas [start, stop) com since <= created_at < until"""
+        start = 0 if since is None or not self.rows else self._first_row_at(_to_epoch(since))
+        stop = self.rows if until is None or not self.rows else self._first_row_at(_to_epoch(until))
+        return start, max(start, stop)
+
+    def aggregate_by_city(self, since: datetime = None, until: datetime = None,
+                          metrics: Sequence[str] = MEASUREMENT_COLUMNS) -> List[Dict]:
+        """
+        Contagem, média, mínimo e máximo por cidade no intervalo
+
+        Calculado direto sobre as colunas mapeadas (bincount e reduceat),
+        sem materializar linhas.
+        """
+        start, stop = self.row_range(since, until)
+        codes = self.columns['city'][start:stop]
+        if not len(codes):
+            return []
+
+        city_names = self.dictionaries['city']
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        boundaries = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        present = sorted_codes[boundaries]
+        counts = np.diff(np.r_[boundaries, len(sorted_codes)])
+
+        results = [{'city': city_names[code], 'count': int(count)} for code, count in zip(present.tolist(), counts.tolist())]
+
+        for metric in metrics:
+            values = self.columns[metric][start:stop][order].astype(np.float64)
+            valid = ~np.isnan(values)
+            metric_counts = np.add.reduceat(valid, boundaries)
+            sums = np.add.reduceat(np.where(valid, values, 0.0), boundaries)
+            with np.errstate(invalid='ignore'):
+                # fmin/fmax ignoram NaN (valores ausentes)
+                mins = np.fmin.reduceat(values, boundaries)
+                maxs = np.fmax.reduceat(values, boundaries)
+
+            for result, n, total, low, high in zip(results, metric_counts.tolist(), sums.tolist(),
+                                                   mins.tolist(), maxs.tolist()):
+                result[metric] = {
+                    'count': n,
+                    'avg': round(total / n, 2) if n else None,
+                    'min': round(low, 2) if n else None,
+                    'max': round(high, 2) if n else None
+                }
+
+        return results
+
+    def iter_rows(self, since: datetime = None, until: datetime = None,
+                  batch_size: int = 4096) -> Iterator[Dict]:
+        """Reconstituir as leituras (mesmos campos de WeatherData, sem id)"""
+        start, stop = self.row_range(since, until)
+        for batch_start in range(start, stop, batch_size):
+            batch_stop = min(stop, batch_start + batch_size)
+            created = self.timestamps(batch_start, batch_stop).tolist()
+            decoded = {
+                name: [self.dictionaries[name][code] for code in self.columns[name][batch_start:batch_stop].tolist()]
+                for name in DICTIONARY_COLUMNS
+            }
+            measurements = {
+                name: [None if value != value else round(value, 2)
+                       for value in self.columns[name][batch_start:batch_stop].tolist()]
+                for name in MEASUREMENT_COLUMNS
+            }
+            for i, ts in enumerate(created):
+                row = {name: values[i] for name, values in decoded.items()}
+                row.update({name: values[i] for name, values in measurements.items()})
+                row['created_at'] = _from_epoch(ts).isoformat()
+                yield row
+
+    def stats(self) -> Dict:
+        return {
+            'rows': self.rows,
+            'bytes': os.path.getsize(self.path),
+            'cities': len(self.dictionaries['city']),
+            'since': _from_epoch(self.header['min_ts']).isoformat() if self.rows else None,
+            'until': _from_epoch(self.header['max_ts']).isoformat() if self.rows else None
+        }
+
+
+def iter_weather_rows(since: datetime = None, until: datetime = None,
+                      batch_size: int = 5000) -> Iterator[Dict]:
+    """Leituras de weather_data e partições em ordem crescente de created_at (paginação por chave)"""
+    weather = all_rows(WeatherData)
+    columns = (weather.id, weather.city, weather.country, weather.description,
+               weather.temperature, weather.humidity, weather.pressure,
+               weather.wind_speed, weather.created_at)
+    names = [column.key for column in columns]
+    last = None
+
+    while True:
+        query = db.session.query(*columns).filter(weather.created_at.isnot(None))
+        if since is not None:
+            query = query.filter(weather.created_at >= since)
+        if until is not None:
+            query = query.filter(weather.created_at < until)
+        if last is not None:
+            query = query.filter(or_(weather.created_at > last[0],
+                                     and_(weather.created_at == last[0], weather.id > last[1])))
+        rows = query.order_by(weather.created_at, weather.id).limit(batch_size).all()
+        if not rows:
+            return
+
+        for row in rows:
+            yield dict(zip(names, row))
+        last = (rows[-1].created_at, rows[-1].id)
+
+
+def export_archive(path: str, since: datetime = None, until: datetime = None,
+                   anchor_every: int = DEFAULT_ANCHOR_EVERY) -> int:
+    """
+    Exportar weather_data (ou um intervalo) para o formato colunar
+
+    Returns:
+        Número de leituras exportadas
+    """
+    return write_archive(path, iter_weather_rows(since, until), anchor_every)
@@ -0,0 +1,255 @@
+import asyncio
+import os
+import threading
+import time
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import aiohttp
+
+from forecast_agg import summarize_forecasts
+from http_client import (RETRY_STATUS, UPSTREAM_IN_FLIGHT, UPSTREAM_LATENCY, CircuitBreaker,
+                         backoff_delay)
+from rate_limiter import RateLimiter
+from weather_api import (OPENWEATHER_BASE_URL, build_query, parse_current_weather,
+                         parse_forecast)
+
+logger = logging.getLogger(__name__)
+
+# Uma cidade pode ser informada como "Cidade" ou ("Cidade", "BR")
+CitySpec = Union[str, Tuple[str, Optional[str]]]
+
+
+def _split_city(spec: CitySpec, default_country: str = None) -> Tuple[str, Optional[str]]:
+    if isinstance(spec, str):
+        return spec, default_country
+    city, country_code = spec
+    return city, country_code or default_country
+
+
+class AsyncWeatherAPI:
+    """Versão asyncio do WeatherAPI, com consultas concorrentes para várias cidades"""
+
+    def __init__(self, api_key: str = None, units: str = 'metric', lang: str = 'pt_br',
+                 concurrency: int = 10, timeout: float = 10, max_retries: int = 2,
+                 breaker: Optional[CircuitBreaker] = None, base_url: str = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        self.api_key = api_key or os.getenv('OPENWEATHER_API_KEY')
+        self.base_url = base_url or OPENWEATHER_BASE_URL
+        self.units = units
+        self.lang = lang
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        if not self.api_key:
+            logger.warning("OpenWeather API key não encontrada")
+
+    async def __aenter__(self) -> 'AsyncWeatherAPI':
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        """Criar a sessão (deve ser chamado dentro do event loop em uso)"""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get_json(self, path: str, params: Dict) -> Dict:
+        """GET com limite de concorrência e de taxa, timeout por chamada e novas tentativas"""
+        await self.open()
+        url = f"{self.base_url}/{path}"
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                if not self.breaker.allow_request():
+                    raise aiohttp.ClientError(f"Circuito aberto para {url}")
+                # A espera pelo token (SQLite) roda fora do event loop; to_thread
+                # copia o contexto, preservando a prioridade da requisição
+                if self.rate_limiter is not None and not await asyncio.to_thread(self.rate_limiter.acquire):
+                    raise aiohttp.ClientError(f"Limite de requisições atingido para {url}")
+
+                status = 'error'
+                started = time.perf_counter()
+                UPSTREAM_IN_FLIGHT.inc()
+                try:
+                    async with self._session.get(url, params=params, timeout=timeout) as response:
+                        status = str(response.status)
+                        if response.status not in RETRY_STATUS:
+                            self.breaker.record_success()
+                            response.raise_for_status()
+                            return await response.json()
+
+                        self.breaker.record_failure()
+                        retry_after = response.headers.get('Retry-After', '')
+                        if response.status == 429 and retry_after.isdigit() and self.rate_limiter is not None:
+                            await asyncio.to_thread(self.rate_limiter.on_throttled, float(retry_after))
+                        if attempt == self.max_retries:
+                            response.raise_for_status()
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                    self.breaker.record_failure()
+                    if attempt == self.max_retries:
+                        raise
+                finally:
+                    UPSTREAM_IN_FLIGHT.dec()
+                    UPSTREAM_LATENCY.observe(time.perf_counter() - started, path, status)
+
+                await asyncio.sleep(backoff_delay(attempt))
+
+    def _params(self, city: str, country_code: str = None, **extra) -> Dict:
+        params = {
+            'q': build_query(city, country_code),
+            'appid': self.api_key,
+            'units': self.units,
+            'lang': self.lang
+        }
+        params.update(extra)
+        return params
+
+    async def get_current_weather(self, city: str, country_code: str = None) -> Optional[Dict]:
+        """
+        Obter dados meteorológicos atuais para uma cidade
+
+        Returns:
+            Dict com dados meteorológicos ou None em caso de erro
+        """
+        try:
+            data = await self._get_json('weather', self._params(city, country_code))
+            return parse_current_weather(data)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Erro na requisição para {city}: {e}")
+        except KeyError as e:
+            logger.error(f"Dados incompletos da API para {city}: {e}")
+        except Exception as e:
+            logger.error(f"Erro inesperado para {city}: {e}")
+        return None
+
+    async def _fetch_forecast_payload(self, city: str, country_code: str = None, days: int = 5) -> Optional[Dict]:
+        """Resposta bruta de /forecast, ou None em caso de erro"""
+        try:
+            return await self._get_json('forecast', self._params(city, country_code, cnt=days * 8))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Erro na requisição de previsão para {city}: {e}")
+        except Exception as e:
+            logger.error(f"Erro inesperado na previsão para {city}: {e}")
+        return None
+
+    async def get_weather_forecast(self, city: str, country_code: str = None, days: int = 5) -> Optional[List[Dict]]:
+        """
+        Obter previsão do tempo para os próximos dias
+
+        Returns:
+            Lista de dicionários com previsão ou None em caso de erro
+        """
+        data = await self._fetch_forecast_payload(city, country_code, days)
+        if data is None:
+            return None
+        try:
+            return parse_forecast(data, days)
+        except KeyError as e:
+            logger.error(f"Dados incompletos da previsão para {city}: {e}")
+        except Exception as e:
+            logger.error(f"Erro inesperado na previsão para {city}: {e}")
+        return None
+
+    async def get_many_current(self, cities: Iterable[CitySpec], country_code: str = None) -> List[Optional[Dict]]:
+        """
+        Obter clima atual de várias cidades em paralelo
+
+        Args:
+            cities: Cidades ("Cidade" ou ("Cidade", "BR"))
+            country_code: País usado quando a cidade não informa um
+
+        Returns:
+            Lista alinhada com `cities` (None para as que falharam)
+        """
+        specs = [_split_city(spec, country_code) for spec in cities]
+        return await asyncio.gather(*(self.get_current_weather(city, cc) for city, cc in specs))
+
+    async def get_many_forecasts(self, cities: Iterable[CitySpec], country_code: str = None,
+                                 days: int = 5) -> List[Optional[List[Dict]]]:
+        """
+        Obter previsão de várias cidades em paralelo (lista alinhada com `cities`)
+
+        Cada dia traz também a temperatura média, a probabilidade máxima de
+        chuva e a condição predominante, calculadas de uma vez para todas
+        as cidades com summarize_forecasts.
+        """
+        specs = [_split_city(spec, country_code) for spec in cities]
+        payloads = await asyncio.gather(*(self._fetch_forecast_payload(city, cc, days) for city, cc in specs))
+
+        # parse_forecast por cidade: uma resposta incompleta afeta só a sua cidade
+        results = []
+        for index, ((city, _), data) in enumerate(zip(specs, payloads)):
+            try:
+                results.append(None if data is None else parse_forecast(data, days))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Dados incompletos da previsão para {city}: {e}")
+                results.append(None)
+                payloads[index] = None
+
+        try:
+            summaries = summarize_forecasts(payloads, days)
+        except (KeyError, TypeError, ValueError) as e:
+            # Sem o resumo a previsão continua válida
+            logger.error(f"Erro ao resumir previsões: {e}")
+            return results
+
+        # Mesmo agrupamento por dia local de parse_forecast: as listas são alinhadas
+        for forecast, summary in zip(results, summaries):
+            for day, stats in zip(forecast or [], summary or []):
+                day['temp_mean'] = stats['temp_mean']
+                day['precipitation_max'] = stats['precipitation_max']
+                day['dominant_description'] = stats['dominant_description']
+        return results
+
+
+class BlockingWeatherClient:
+    """
+    Interface síncrona para o AsyncWeatherAPI
+
+    Mantém um event loop próprio em uma thread de fundo, de modo que as
+    rotas Flask (em qualquer thread) compartilhem a mesma sessão e pool.
+    """
+
+    def __init__(self, api: AsyncWeatherAPI = None):
+        self.api = api or AsyncWeatherAPI()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='weather-async-loop', daemon=True)
+        self._thread.start()
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def get_current_weather(self, city: str, country_code: str = None) -> Optional[Dict]:
+        return self._run(self.api.get_current_weather(city, country_code))
+
+    def get_weather_forecast(self, city: str, country_code: str = None, days: int = 5) -> Optional[List[Dict]]:
+        return self._run(self.api.get_weather_forecast(city, country_code, days))
+
+    def get_many_current(self, cities: Sequence[CitySpec], country_code: str = None) -> List[Optional[Dict]]:
+        return self._run(self.api.get_many_current(cities, country_code))
+
+    def get_many_forecasts(self, cities: Sequence[CitySpec], country_code: str = None,
+                           days: int = 5) -> List[Optional[List[Dict]]]:
+        return self._run(self.api.get_many_forecasts(cities, country_code, days))
+
+    def close(self):
+        """Fechar a sessão e encerrar o event loop"""
+        self._run(self.api.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
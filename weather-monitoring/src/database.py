@@ -1,5 +1,16 @@
+import base64
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, or_
 from models import db, WeatherData
+from partitions import all_rows
+from rollups import update_rollups
+
+# Colunas disponíveis para projeção nas consultas paginadas
+WEATHER_FIELDS = ('id', 'city', 'country', 'temperature', 'humidity', 'pressure',
+                  'description', 'wind_speed', 'created_at')
 
 def init_db(app):
     """Initialize database"""
@@ -21,13 +32,111 @@ def save_weather_data(data):
     )
     
     db.session.add(weather)
+    update_rollups(weather)
     db.session.commit()
     return weather
 
 def get_all_weather_data():
-    """Get all weather data"""
-    return WeatherData.query.order_by(WeatherData.created_at.desc()).all()
+    """Get all weather data (tabela principal e partições mensais)"""
+    weather = all_rows(WeatherData)
+    return db.session.query(weather).order_by(weather.created_at.desc()).all()
 
 def get_weather_by_city(city):
-    """Get weather data by city"""
-    return WeatherData.query.filter_by(city=city.lower()).order_by(WeatherData.created_at.desc()).all()
\ No newline at end of file
+    """Get weather data by city (tabela principal e partições mensais)"""
+    weather = all_rows(WeatherData)
+    return db.session.query(weather).filter(weather.city == city.lower()) \
+        .order_by(weather.created_at.desc()).all()
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Codificar a posição (created_at, id) de uma linha como cursor opaco"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decodificar cursor gerado por encode_cursor (ValueError se inválido)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+def _columns(fields: Optional[Sequence[str]]) -> List[str]:
+    """Validar projeção; id e created_at são sempre incluídos (formam o cursor)"""
+    if not fields:
+        return list(WEATHER_FIELDS)
+    
+    unknown = set(fields) - set(WEATHER_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos inválidos: {', '.join(sorted(unknown))}")
+    
+    return [name for name in WEATHER_FIELDS if name in fields or name in ('id', 'created_at')]
+
+def _row_to_dict(row, names: List[str]) -> Dict:
+    data = dict(zip(names, row))
+    data['created_at'] = data['created_at'].isoformat()
+    return data
+
+def get_weather_page(limit: int = 50, cursor: str = None, city: str = None,
+                     fields: Sequence[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Obter uma página de registros, do mais recente para o mais antigo
+    
+    Usa paginação por cursor (keyset) em (created_at, id): o custo de cada
+    página não depende de quantas páginas vieram antes, ao contrário de OFFSET.
+    
+    Args:
+        limit: Registros por página
+        cursor: Cursor devolvido pela página anterior (None para a primeira)
+        city: Filtrar por cidade (opcional)
+        fields: Campos a retornar (padrão: todos)
+    
+    Returns:
+        (registros como dicts, cursor da próxima página ou None)
+    
+    Raises:
+        ValueError: limit menor que 1, cursor ou campos inválidos
+    """
+    if limit < 1:
+        # LIMIT negativo no SQLite significa "sem limite": a tabela inteira
+        raise ValueError(f"limit deve ser maior que zero (recebido: {limit})")
+    
+    names = _columns(fields)
+    # Lê pela view: registros já movidos para partições mensais continuam visíveis
+    weather = all_rows(WeatherData)
+    query = db.session.query(*(getattr(weather, name) for name in names))
+    
+    if city:
+        query = query.filter(weather.city == city.lower())
+    
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            weather.created_at < created_at,
+            and_(weather.created_at == created_at, weather.id < row_id)
+        ))
+    
+    rows = query.order_by(weather.created_at.desc(), weather.id.desc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = dict(zip(names, rows[-1]))
+        next_cursor = encode_cursor(last['created_at'], last['id'])
+    
+    return [_row_to_dict(row, names) for row in rows], next_cursor
+
+def iter_weather_data(city: str = None, fields: Sequence[str] = None,
+                      batch_size: int = 1000) -> Iterator[Dict]:
+    """
+    Percorrer todos os registros com memória limitada
+    
+    Busca lotes de `batch_size` via get_weather_page, sem carregar a tabela
+    inteira nem instanciar objetos WeatherData.
+    """
+    cursor = None
+    while True:
+        rows, cursor = get_weather_page(batch_size, cursor, city, fields)
+        yield from rows
+        if cursor is None:
+            return
@@ -0,0 +1,183 @@
+from datetime import date, datetime
+from itertools import chain
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from timezones import EPOCH_ORDINAL, SECONDS_PER_DAY, day_label, forecast_offset
+
+
+class ForecastColumns:
+    """
+    Entradas de 3 em 3 horas de várias respostas de /forecast em colunas
+
+    As entradas de todas as cidades ficam em arrays NumPy contíguos e são
+    agrupadas por (resposta, dia local no fuso da cidade). Cada grupo
+    equivale a uma previsão diária de parse_forecast.
+    """
+
+    def __init__(self, payloads: Sequence[Optional[Dict]], days: int = 5):
+        self.entries: List[Dict] = []
+        owners = []
+        offsets = np.zeros(len(payloads), dtype=np.int64)
+        known = np.zeros(len(payloads), dtype=bool)
+        for index, payload in enumerate(payloads):
+            if payload is None:
+                continue
+            entries = payload['list']
+            self.entries.extend(entries)
+            owners.append(np.full(len(entries), index, dtype=np.int64))
+            offset = forecast_offset(payload)
+            if offset is not None:
+                offsets[index] = offset
+                known[index] = True
+
+        self.size = len(payloads)
+        n = len(self.entries)
+        self.owner = np.concatenate(owners) if owners else np.empty(0, dtype=np.int64)
+
+        # Uma única passada pelos dicts para extrair as colunas numéricas
+        table = np.fromiter(
+            chain.from_iterable((e['dt'], e['main']['temp_min'], e['main']['temp_max']) for e in self.entries),
+            dtype=np.float64, count=3 * n
+        ).reshape(n, 3)
+        self.dt = table[:, 0].astype(np.int64)
+        self.temp_min = table[:, 1]
+        self.temp_max = table[:, 2]
+        self.day = self._local_days(self.dt, offsets[self.owner], known[self.owner])
+
+        # Início de cada grupo: muda a resposta ou muda o dia
+        boundary = np.ones(n, dtype=bool)
+        if n:
+            boundary[1:] = (self.owner[1:] != self.owner[:-1]) | (self.day[1:] != self.day[:-1])
+        self.starts = np.flatnonzero(boundary)
+        self.counts = np.diff(np.append(self.starts, n))
+        self.group = np.cumsum(boundary) - 1
+        self.group_owner = self.owner[self.starts]
+
+        # Posição do grupo dentro da sua resposta (limite de `days` dias)
+        positions = np.arange(len(self.starts))
+        first_of_owner = np.ones(len(self.starts), dtype=bool)
+        first_of_owner[1:] = self.group_owner[1:] != self.group_owner[:-1]
+        rank = positions - np.maximum.accumulate(np.where(first_of_owner, positions, 0))
+        self.keep = rank < days
+
+    @staticmethod
+    def _local_days(dt: np.ndarray, offsets: np.ndarray, known: np.ndarray) -> np.ndarray:
+        """Dia local (ordinal) de cada timestamp, no fuso de sua cidade"""
+        # Deslocamento constante por resposta: divisão inteira, sem conversões de data
+        days = (dt + offsets) // SECONDS_PER_DAY + EPOCH_ORDINAL
+        if not known.all():
+            # Respostas sem fuso: horário do servidor, convertendo cada timestamp
+            # distinto uma única vez
+            missing = ~known
+            unique, inverse = np.unique(dt[missing], return_inverse=True)
+            ordinals = np.fromiter((datetime.fromtimestamp(int(t)).toordinal() for t in unique),
+                                   dtype=np.int64, count=len(unique))
+            days[missing] = ordinals[inverse]
+        return days
+
+    def first_argmin(self, values: np.ndarray) -> np.ndarray:
+        """Índice da primeira entrada com o menor valor de cada grupo"""
+        if not len(values):
+            return np.empty(0, dtype=np.int64)
+        group_min = np.minimum.reduceat(values, self.starts)
+        candidates = np.flatnonzero(values == np.repeat(group_min, self.counts))
+        _, first = np.unique(self.group[candidates], return_index=True)
+        return candidates[first]
+
+    def group_days(self) -> List[date]:
+        return [date.fromordinal(int(day)) for day in self.day[self.starts]]
+
+
+def aggregate_forecasts(payloads: Sequence[Optional[Dict]], days: int = 5) -> List[Optional[List[Dict]]]:
+    """
+    Versão vetorizada de parse_forecast para várias respostas de uma vez
+
+    Produz exatamente o mesmo resultado que
+    `[parse_forecast(p, days) for p in payloads]` (None para respostas None).
+    Com o fuso calculado por aritmética inteira, o laço de parse_forecast
+    custa o mesmo (ver benchmarks/bench_forecast_aggregation.py), então o
+    cliente continua usando parse_forecast; esta versão serve de referência
+    no benchmark e nos testes de ForecastColumns, que também é a base de
+    summarize_forecasts (usado pelo AsyncWeatherAPI.get_many_forecasts).
+    As mínimas/máximas são escolhidas por índice, preservando o valor (e o
+    tipo) original da API, como em min()/max() no laço original.
+    """
+    columns = ForecastColumns(payloads, days)
+    entries = columns.entries
+    results: List[Optional[List[Dict]]] = [None if p is None else [] for p in payloads]
+
+    # Montagem dos dicts em Python puro: índices convertidos para listas uma só vez
+    kept = np.flatnonzero(columns.keep)
+    groups = zip(
+        columns.group_owner[kept].tolist(),
+        columns.starts[kept].tolist(),
+        columns.first_argmin(columns.temp_min)[kept].tolist(),
+        columns.first_argmin(-columns.temp_max)[kept].tolist(),
+        columns.day[columns.starts[kept]].tolist()
+    )
+
+    for owner, start, arg_min, arg_max, day in groups:
+        label, day_name = day_label(day)
+        first = entries[start]
+
+        results[owner].append({
+            'date': label,
+            'day_name': day_name,
+            'temp_min': entries[arg_min]['main']['temp_min'],
+            'temp_max': entries[arg_max]['main']['temp_max'],
+            'description': first['weather'][0]['description'].title(),
+            'icon': first['weather'][0]['icon'],
+            'humidity': first['main']['humidity'],
+            'wind_speed': first['wind']['speed'],
+            'precipitation': first.get('pop', 0) * 100  # Probabilidade de chuva em %
+        })
+
+    return results
+
+
+def summarize_forecasts(payloads: Sequence[Optional[Dict]], days: int = 5) -> List[Optional[List[Dict]]]:
+    """
+    Estatísticas diárias completas para várias respostas de uma vez
+
+    Para cada dia: temperatura mínima, máxima e média, probabilidade máxima
+    de chuva (%) e condição predominante (descrição mais frequente).
+    """
+    columns = ForecastColumns(payloads, days)
+    entries = columns.entries
+    starts = columns.starts
+    results: List[Optional[List[Dict]]] = [None if p is None else [] for p in payloads]
+    if not entries:
+        return results
+
+    temp = np.fromiter((e['main']['temp'] for e in entries), dtype=np.float64, count=len(entries))
+    pop = np.fromiter((e.get('pop', 0) for e in entries), dtype=np.float64, count=len(entries))
+    counts = columns.counts
+
+    temp_min = np.minimum.reduceat(columns.temp_min, starts)
+    temp_max = np.maximum.reduceat(columns.temp_max, starts)
+    temp_mean = np.add.reduceat(temp, starts) / counts
+    pop_max = np.maximum.reduceat(pop, starts) * 100
+
+    # Condição predominante: contagem de pares (grupo, descrição)
+    names, codes = np.unique([e['weather'][0]['description'] for e in entries], return_inverse=True)
+    pairs, pair_counts = np.unique(columns.group * len(names) + codes, return_counts=True)
+    pair_group = pairs // len(names)
+    best = np.lexsort((-pair_counts, pair_group))
+    first_pair = np.flatnonzero(np.r_[True, pair_group[best][1:] != pair_group[best][:-1]])
+    dominant = names[pairs[best][first_pair] % len(names)]
+
+    for group, day in enumerate(columns.group_days()):
+        if not columns.keep[group]:
+            continue
+        results[columns.group_owner[group]].append({
+            'date': day.strftime('%Y-%m-%d'),
+            'temp_min': float(temp_min[group]),
+            'temp_max': float(temp_max[group]),
+            'temp_mean': round(float(temp_mean[group]), 2),
+            'precipitation_max': round(float(pop_max[group]), 1),
+            'dominant_description': str(dominant[group]).title()
+        })
+
+    return results
@@ -0,0 +1,128 @@
+import math
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from weather_cache import TTLCache
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 6) -> str:
+    """
+    Codificar coordenadas em geohash
+
+    Precisão 6 corresponde a células de ~1,2 km x 0,6 km; precisão 7,
+    a ~150 m x 150 m.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+
+    return ''.join(chars)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância em km entre dois pontos na superfície da Terra"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class GeoCache:
+    """
+    Cache de clima por célula geográfica, com índice espacial de cidades
+
+    Coordenadas próximas (mesma célula geohash) compartilham a mesma
+    entrada de cache. O índice de cidades (grade regular de `grid_deg`
+    graus) responde "cidade em cache mais próxima em até R km" consultando
+    apenas as células vizinhas, sem acessar a rede.
+    """
+
+    def __init__(self, precision: int = 6, ttl: float = 600, maxsize: int = 1024,
+                 grid_deg: float = 0.5):
+        self.precision = precision
+        self.cells = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.grid_deg = grid_deg
+        self._grid: Dict[Tuple[int, int], Dict[Hashable, Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.nearest_hits = 0
+        self.nearest_misses = 0
+
+    def cell_key(self, lat: float, lon: float) -> str:
+        return geohash_encode(lat, lon, self.precision)
+
+    def get(self, lat: float, lon: float) -> Optional[Any]:
+        """Valor em cache para a célula que contém (lat, lon)"""
+        return self.cells.get(self.cell_key(lat, lon))
+
+    def set(self, lat: float, lon: float, value: Any):
+        self.cells.set(self.cell_key(lat, lon), value)
+
+    def _grid_cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.grid_deg), math.floor(lon / self.grid_deg)
+
+    def register_city(self, key: Hashable, lat: float, lon: float):
+        """Registrar a posição de uma cidade (chave do WeatherCache) no índice espacial"""
+        with self._lock:
+            self._grid.setdefault(self._grid_cell(lat, lon), {})[key] = (lat, lon)
+
+    def nearest_cities(self, lat: float, lon: float, radius_km: float) -> List[Tuple[float, Hashable]]:
+        """
+        Cidades registradas em até `radius_km`, da mais próxima para a mais distante
+
+        Returns:
+            Lista de (distância em km, chave)
+        """
+        # Número de células a percorrer em cada direção (longitude encolhe com a latitude)
+        lat_cells = math.ceil(radius_km / (self.grid_deg * KM_PER_DEGREE))
+        lon_km = self.grid_deg * KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01)
+        lon_cells = min(math.ceil(radius_km / lon_km), math.ceil(360 / self.grid_deg))
+        center_lat, center_lon = self._grid_cell(lat, lon)
+
+        found = []
+        with self._lock:
+            for i in range(center_lat - lat_cells, center_lat + lat_cells + 1):
+                for j in range(center_lon - lon_cells, center_lon + lon_cells + 1):
+                    for key, (city_lat, city_lon) in self._grid.get((i, j), {}).items():
+                        distance = haversine_km(lat, lon, city_lat, city_lon)
+                        if distance <= radius_km:
+                            found.append((distance, key))
+
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def stats(self) -> Dict:
+        stats = self.cells.stats()
+        stats.update({
+            'precision': self.precision,
+            'indexed_cities': sum(len(cell) for cell in self._grid.values()),
+            'nearest_hits': self.nearest_hits,
+            'nearest_misses': self.nearest_misses
+        })
+        return stats
@@ -0,0 +1,205 @@
+import random
+import threading
+import time
+import logging
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Gauge, Histogram
+from rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Status HTTP considerados transitórios (vale a pena tentar novamente)
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Métricas das chamadas à OpenWeather (cada tentativa é uma observação)
+UPSTREAM_LATENCY = Histogram('openweather_request_duration_seconds',
+                             'Latência das chamadas à OpenWeather', ('endpoint', 'status'))
+UPSTREAM_IN_FLIGHT = Gauge('openweather_requests_in_flight', 'Chamadas à OpenWeather em andamento')
+
+
+def upstream_endpoint(url: str) -> str:
+    """Último segmento do caminho (weather, forecast), usado como rótulo"""
+    return url.rstrip('/').rsplit('/', 1)[-1]
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Circuito aberto: a API está indisponível e a requisição nem foi enviada"""
+
+
+class RateLimitedError(requests.exceptions.RequestException):
+    """Sem cota de requisições disponível dentro do tempo máximo de espera"""
+
+
+class CircuitBreaker:
+    """
+    Disjuntor simples: abre após N falhas consecutivas e, passado o
+    `reset_timeout`, libera uma única requisição de teste (meio-aberto).
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Verificar se a requisição pode ser enviada"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and self._clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuito aberto após {self.failures} falhas consecutivas")
+                self.state = self.OPEN
+                self.opened_at = self._clock()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'rejected': self.rejected
+            }
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """Criar sessão HTTP com pool de conexões keep-alive"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+
+def backoff_delay(attempt: int, base: float = 0.25, cap: float = 4.0) -> float:
+    """Backoff exponencial com jitter completo"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ResilientHttpClient:
+    """Cliente HTTP com pool de conexões, novas tentativas, disjuntor e limite de taxa"""
+
+    def __init__(self, pool_size: int = 10, max_retries: int = 2, backoff_base: float = 0.25,
+                 backoff_cap: float = 4.0, timeout: float = 10,
+                 breaker: Optional[CircuitBreaker] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        self.session = create_session(pool_size)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter
+        self.retries = 0
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                if self.rate_limiter is not None:
+                    self.rate_limiter.on_throttled(float(retry_after))
+                delay = min(self.backoff_cap, max(delay, float(retry_after)))
+        return delay
+
+    def _send(self, url: str, params: Dict, timeout: float) -> requests.Response:
+        """Uma tentativa de GET, com latência registrada em UPSTREAM_LATENCY"""
+        status = 'error'
+        started = time.perf_counter()
+        UPSTREAM_IN_FLIGHT.inc()
+        try:
+            response = self.session.get(url, params=params, timeout=timeout)
+            status = str(response.status_code)
+            return response
+        finally:
+            UPSTREAM_IN_FLIGHT.dec()
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, upstream_endpoint(url), status)
+
+    def get(self, url: str, params: Dict = None, timeout: float = None) -> requests.Response:
+        """
+        Fazer GET com novas tentativas em 5xx/429 e erros de conexão
+
+        Returns:
+            Última resposta obtida (o chamador decide via raise_for_status)
+
+        Raises:
+            CircuitOpenError: se o disjuntor estiver aberto
+            RateLimitedError: se não houver cota dentro do tempo máximo de espera
+            requests.exceptions.RequestException: se todas as tentativas falharem
+        """
+        timeout = timeout or self.timeout
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow_request():
+                raise CircuitOpenError(f"Circuito aberto para {url}")
+            if self.rate_limiter is not None and not self.rate_limiter.acquire():
+                raise RateLimitedError(f"Limite de requisições atingido para {url}")
+
+            response = None
+            try:
+                response = self._send(url, params, timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    self.breaker.record_success()
+                    return response
+
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    return response
+                response.close()
+
+            self.retries += 1
+            delay = self._retry_delay(attempt, response)
+            logger.info(f"Nova tentativa {attempt + 1}/{self.max_retries} para {url} em {delay:.2f}s")
+            time.sleep(delay)
+
+    def stats(self) -> Dict:
+        return {
+            'retries': self.retries,
+            'circuit': self.breaker.stats(),
+            'rate_limiter': self.rate_limiter.stats() if self.rate_limiter is not None else None
+        }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,235 @@
+import json
+import threading
+import logging
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from rate_limiter import BACKGROUND, request_priority
+from weather_cache import normalize_city
+
+logger = logging.getLogger(__name__)
+
+CityKey = Tuple[str, str]
+
+# Campos que mudam a cada leitura sem que o clima tenha mudado
+VOLATILE_FIELDS = frozenset({'timestamp'})
+
+
+def city_key(city: str, country: Optional[str]) -> CityKey:
+    return normalize_city(city), (country or '').strip().upper()
+
+
+def format_event(event: str, data: Dict) -> str:
+    """Mensagem no formato Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+class Subscription:
+    """
+    Assinante com fila limitada
+
+    Se o cliente não consumir a tempo, as mensagens mais antigas são
+    descartadas e a próxima leitura envia um snapshot completo das suas
+    cidades, já que os deltas intermediários se perderam.
+    """
+
+    def __init__(self, hub: 'LiveUpdates', cities: Sequence[Tuple[str, str]], maxsize: int):
+        self.hub = hub
+        self.cities = {city_key(city, country): (city, country) for city, country in cities}
+        self._queue = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.resync = True  # o primeiro envio é sempre um snapshot
+        self.dropped = 0
+        self.closed = False
+
+    def push(self, message: str):
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+                self.resync = True
+            self._queue.append(message)
+            self._cond.notify()
+
+    def get(self, timeout: float) -> List[str]:
+        """Mensagens pendentes (lista vazia se nada chegou em `timeout` segundos)"""
+        with self._cond:
+            if not self._queue and not self.resync and not self.closed:
+                self._cond.wait(timeout)
+            if self.resync:
+                self.resync = False
+                self._queue.clear()
+                return self.hub.snapshot(self.cities)
+            messages = list(self._queue)
+            self._queue.clear()
+            return messages
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+    def stream(self, heartbeat: float = 15) -> Iterator[str]:
+        """Gerador para a resposta HTTP (comentário de keep-alive a cada `heartbeat` s)"""
+        try:
+            while not self.closed:
+                messages = self.get(heartbeat)
+                if messages:
+                    yield ''.join(messages)
+                else:
+                    yield ': keep-alive\n\n'
+        finally:
+            self.hub.unsubscribe(self)
+
+
+class LiveUpdates:
+    """
+    Difusão de leituras de clima para clientes SSE
+
+    Uma única thread produtora consulta (via cache) as cidades com
+    assinantes a cada `interval` segundos e, quando a leitura de uma
+    cidade muda, serializa o delta uma vez e o entrega a todos os
+    assinantes daquela cidade.
+    """
+
+    def __init__(self, fetch_many: Callable[[List[Tuple[str, str]]], List[Optional[Dict]]],
+                 interval: float = 15, queue_size: int = 100):
+        """
+        Args:
+            fetch_many: Função que recebe [(cidade, país)] e devolve leituras alinhadas
+            interval: Intervalo entre consultas, em segundos
+            queue_size: Mensagens pendentes por cliente antes de descartar as antigas
+        """
+        self.fetch_many = fetch_many
+        self.interval = interval
+        self.queue_size = queue_size
+
+        self._subscribers: Dict[CityKey, Set[Subscription]] = {}
+        self._specs: Dict[CityKey, Tuple[str, str]] = {}
+        self._latest: Dict[CityKey, Dict] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Contadores
+        self.cycles = 0
+        self.published = 0
+        self.unchanged = 0
+        self.failures = 0
+
+    def start(self):
+        """Iniciar a thread produtora (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='live-updates', daemon=True)
+        self._thread.start()
+        logger.info(f"Atualizações ao vivo iniciadas (a cada {self.interval}s)")
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        self._wakeup.set()
+        with self._lock:
+            subscriptions = {sub for subs in self._subscribers.values() for sub in subs}
+        for subscription in subscriptions:
+            subscription.close()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def subscribe(self, cities: Sequence[Tuple[str, str]]) -> Subscription:
+        subscription = Subscription(self, cities, self.queue_size)
+        with self._lock:
+            new_city = any(key not in self._specs for key in subscription.cities)
+            for key, spec in subscription.cities.items():
+                self._subscribers.setdefault(key, set()).add(subscription)
+                self._specs.setdefault(key, spec)
+        self.start()
+        if new_city:
+            # Cidade ainda sem leitura: consultar já, sem esperar o próximo ciclo
+            self._wakeup.set()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for key in subscription.cities:
+                subscribers = self._subscribers.get(key)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    # Ninguém mais acompanha a cidade: parar de consultá-la
+                    del self._subscribers[key]
+                    self._specs.pop(key, None)
+                    self._latest.pop(key, None)
+
+    def snapshot(self, cities: Dict[CityKey, Tuple[str, str]]) -> List[str]:
+        """Última leitura completa de cada cidade (para novos clientes ou após descarte)"""
+        with self._lock:
+            latest = [(cities[key], self._latest.get(key)) for key in cities]
+        return [format_event('snapshot', {'city': city, 'country': country, 'data': data})
+                for (city, country), data in latest if data is not None]
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Erro no ciclo de atualizações ao vivo: {e}")
+                with self._lock:
+                    self.failures += 1
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def run_once(self):
+        """Consultar as cidades assinadas e publicar as que mudaram"""
+        with self._lock:
+            keys = list(self._specs)
+            specs = [self._specs[key] for key in keys]
+        if not keys:
+            return
+
+        # Consultas da difusão cedem a cota da API para requisições de usuários
+        with request_priority(BACKGROUND):
+            readings = self.fetch_many(specs)
+
+        for key, (city, country), reading in zip(keys, specs, readings):
+            if reading is None:
+                continue
+            with self._lock:
+                previous = self._latest.get(key)
+                changes = {field: value for field, value in reading.items()
+                           if field not in VOLATILE_FIELDS and (previous is None or previous.get(field) != value)}
+                if not changes:
+                    self.unchanged += 1
+                    continue
+                self._latest[key] = reading
+                subscribers = list(self._subscribers.get(key, ()))
+                self.published += 1
+
+            if previous is None:
+                # Primeira leitura da cidade: assinantes recebem o snapshot completo
+                message = format_event('snapshot', {'city': city, 'country': country, 'data': reading})
+            else:
+                message = format_event('update', {'city': city, 'country': country, 'changes': changes,
+                                                  'timestamp': reading.get('timestamp')})
+            # Serializado uma vez; entregue a cada fila (sem bloquear em clientes lentos)
+            for subscription in subscribers:
+                subscription.push(message)
+
+        with self._lock:
+            self.cycles += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            subscriptions = {sub for subs in self._subscribers.values() for sub in subs}
+            return {
+                'running': bool(self._thread and self._thread.is_alive()),
+                'interval': self.interval,
+                'subscribers': len(subscriptions),
+                'cities': len(self._subscribers),
+                'cycles': self.cycles,
+                'published': self.published,
+                'unchanged': self.unchanged,
+                'failures': self.failures,
+                'dropped': sum(sub.dropped for sub in subscriptions)
+            }
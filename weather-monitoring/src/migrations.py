@@ -0,0 +1,35 @@
+import logging
+from typing import List
+
+from sqlalchemy import MetaData, inspect
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_indexes(engine: Engine, metadata: MetaData) -> List[str]:
+    """
+    Criar em bancos existentes os índices declarados nos modelos
+
+    `create_all` só cria índices junto com tabelas novas; para tabelas
+    já existentes os índices precisam ser criados à parte.
+
+    Returns:
+        Lista com os nomes dos índices criados
+    """
+    inspector = inspect(engine)
+    created = []
+
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            logger.info(f"Criando índice {index.name} em {table.name}")
+            index.create(bind=engine)
+            created.append(index.name)
+
+    return created
@@ -16,6 +16,12 @@ class WeatherData(db.Model):
     wind_speed = db.Column(db.Float)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Histórico por cidade (get_weather_by_city) e listagem geral por data
+        db.Index('ix_weather_data_city_created_at', city, created_at.desc()),
+        db.Index('ix_weather_data_created_at', created_at.desc()),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -27,4 +33,74 @@ class WeatherData(db.Model):
             'description': self.description,
             'wind_speed': self.wind_speed,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class WeatherRollup(db.Model):
+    """Agregados por cidade em buckets de uma hora ou um dia"""
+    __tablename__ = 'weather_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(100), nullable=False)
+    bucket = db.Column(db.String(4), nullable=False)  # 'hour' ou 'day'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    temperature_sum = db.Column(db.Float, nullable=False, default=0.0)
+    temperature_min = db.Column(db.Float)
+    temperature_max = db.Column(db.Float)
+    humidity_count = db.Column(db.Integer, nullable=False, default=0)
+    humidity_sum = db.Column(db.Float, nullable=False, default=0.0)
+    humidity_min = db.Column(db.Integer)
+    humidity_max = db.Column(db.Integer)
+    wind_speed_count = db.Column(db.Integer, nullable=False, default=0)
+    wind_speed_sum = db.Column(db.Float, nullable=False, default=0.0)
+    wind_speed_min = db.Column(db.Float)
+    wind_speed_max = db.Column(db.Float)
+    
+    __table_args__ = (
+        db.UniqueConstraint('city', 'bucket', 'bucket_start', name='uq_weather_rollup_bucket'),
+    )
+    
+    def add_observation(self, temperature, humidity=None, wind_speed=None):
+        """Incorporar uma leitura aos agregados do bucket"""
+        self.count = (self.count or 0) + 1
+        self.temperature_sum = (self.temperature_sum or 0.0) + temperature
+        self.temperature_min = temperature if self.temperature_min is None else min(self.temperature_min, temperature)
+        self.temperature_max = temperature if self.temperature_max is None else max(self.temperature_max, temperature)
+        
+        if humidity is not None:
+            self.humidity_count = (self.humidity_count or 0) + 1
+            self.humidity_sum = (self.humidity_sum or 0.0) + humidity
+            self.humidity_min = humidity if self.humidity_min is None else min(self.humidity_min, humidity)
+            self.humidity_max = humidity if self.humidity_max is None else max(self.humidity_max, humidity)
+        
+        if wind_speed is not None:
+            self.wind_speed_count = (self.wind_speed_count or 0) + 1
+            self.wind_speed_sum = (self.wind_speed_sum or 0.0) + wind_speed
+            self.wind_speed_min = wind_speed if self.wind_speed_min is None else min(self.wind_speed_min, wind_speed)
+            self.wind_speed_max = wind_speed if self.wind_speed_max is None else max(self.wind_speed_max, wind_speed)
+    
+    def to_dict(self):
+        def avg(total, count):
+            return round(total / count, 2) if count else None
+        
+        return {
+            'city': self.city,
+            'bucket': self.bucket,
+            'bucket_start': self.bucket_start.isoformat(),
+            'count': self.count,
+            'temperature': {
+                'min': self.temperature_min,
+                'max': self.temperature_max,
+                'avg': avg(self.temperature_sum, self.count)
+            },
+            'humidity': {
+                'min': self.humidity_min,
+                'max': self.humidity_max,
+                'avg': avg(self.humidity_sum, self.humidity_count)
+            },
+            'wind_speed': {
+                'min': self.wind_speed_min,
+                'max': self.wind_speed_max,
+                'avg': avg(self.wind_speed_sum, self.wind_speed_count)
+            }
+        }
@@ -0,0 +1,170 @@
+import re
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+from sqlalchemy import DateTime, bindparam, column as column_clause, inspect, table as table_clause, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import aliased
+
+logger = logging.getLogger(__name__)
+
+# Partições mensais: <tabela>_AAAAMM (ex.: weather_data_202401)
+_PARTITION_SUFFIX = re.compile(r'_(\d{4})(\d{2})$')
+
+
+def _sql(statement: str, *dates: str):
+    """SQL textual com parâmetros de data tipados (formato igual ao do ORM)"""
+    return text(statement).bindparams(*(bindparam(name, type_=DateTime) for name in dates))
+
+
+def month_start(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(dt: datetime, months: int) -> datetime:
+    """Somar (ou subtrair) meses a uma data no primeiro dia do mês"""
+    index = dt.year * 12 + (dt.month - 1) + months
+    return dt.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_{month:%Y%m}"
+
+
+def view_name(table: str) -> str:
+    return f"{table}_all"
+
+
+def list_partitions(engine: Engine, table: str) -> List[str]:
+    """Partições mensais existentes de uma tabela, da mais antiga para a mais nova"""
+    pattern = re.compile(rf'^{re.escape(table)}_\d{{6}}$')
+    return sorted(name for name in inspect(engine).get_table_names() if pattern.match(name))
+
+
+def refresh_view(conn, table: str):
+    """
+    (Re)criar a view <tabela>_all: tabela principal UNION ALL suas partições
+
+    Deve rodar na mesma transação que move ou remove partições, para que
+    as leituras nunca vejam o histórico pela metade.
+    """
+    view = view_name(table)
+    inspector = inspect(conn)
+    columns = ', '.join(c['name'] for c in inspector.get_columns(table))
+    sources = [table] + list_partitions(conn, table)
+    conn.execute(text(f'DROP VIEW IF EXISTS {view}'))
+    conn.execute(text(f'CREATE VIEW {view} AS ' +
+                      ' UNION ALL '.join(f'SELECT {columns} FROM {source}' for source in sources)))
+
+
+def ensure_views(engine: Engine, tables: Iterable[str]):
+    """Criar (ou atualizar) as views de leitura das tabelas particionadas"""
+    with engine.begin() as conn:
+        for table in tables:
+            refresh_view(conn, table)
+
+
+@lru_cache(maxsize=None)
+def all_rows(model):
+    """
+    Entidade ORM que lê pela view <tabela>_all (tabela principal + partições)
+
+    Use no lugar do modelo em toda leitura de histórico; gravações
+    continuam indo para a tabela principal.
+    """
+    view = table_clause(view_name(model.__tablename__),
+                        *(column_clause(c.name, c.type) for c in model.__table__.columns))
+    return aliased(model, view, adapt_on_names=True)
+
+
+def _ensure_partition(conn, table: str, partition: str, column: str):
+    conn.execute(text(f'CREATE TABLE IF NOT EXISTS {partition} AS SELECT * FROM {table} WHERE 1 = 0'))
+    conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{partition}_{column} ON {partition} ({column} DESC)'))
+    conn.execute(text(
+        f'CREATE INDEX IF NOT EXISTS ix_{partition}_city_{column} ON {partition} (city, {column} DESC)'
+    ))
+
+
+def rollover_partitions(engine: Engine, table: str, column: str, hot_months: int = 1,
+                        now: datetime = None) -> Dict[str, int]:
+    """
+    Mover linhas antigas da tabela principal para partições mensais
+
+    A tabela principal mantém apenas os `hot_months` meses mais recentes,
+    de modo que as consultas do dia a dia continuam rápidas à medida que
+    o histórico cresce. A view <tabela>_all é recriada na mesma transação,
+    então quem lê por all_rows() continua vendo as linhas movidas.
+    Funciona em SQLite e PostgreSQL.
+
+    Args:
+        engine: Engine do banco
+        table: Tabela principal (ex.: 'weather_data')
+        column: Coluna de data usada no particionamento
+        hot_months: Meses mantidos na tabela principal (incluindo o atual)
+        now: Data de referência (padrão: agora, em UTC)
+
+    Returns:
+        Dict {partição: linhas movidas}
+    """
+    cutoff = add_months(month_start(now or datetime.utcnow()), -(hot_months - 1))
+    moved = {}
+
+    with engine.begin() as conn:
+        oldest_query = _sql(f'SELECT MIN({column}) FROM {table} WHERE {column} < :cutoff', 'cutoff')
+
+        while True:
+            oldest = conn.execute(oldest_query, {'cutoff': cutoff}).scalar()
+            if oldest is None:
+                break
+            if isinstance(oldest, str):
+                # SQLite devolve datas como texto em consultas textuais
+                oldest = datetime.fromisoformat(oldest)
+
+            # Só meses que de fato possuem linhas ganham partição
+            month = month_start(oldest)
+            partition = partition_name(table, month)
+            bounds = {'start': month, 'end': min(add_months(month, 1), cutoff)}
+
+            _ensure_partition(conn, table, partition, column)
+            result = conn.execute(_sql(
+                f'INSERT INTO {partition} SELECT * FROM {table} '
+                f'WHERE {column} >= :start AND {column} < :end', 'start', 'end'
+            ), bounds)
+            conn.execute(_sql(
+                f'DELETE FROM {table} WHERE {column} >= :start AND {column} < :end', 'start', 'end'
+            ), bounds)
+
+            moved[partition] = result.rowcount
+            logger.info(f"{result.rowcount} linhas movidas de {table} para {partition}")
+
+        # Leituras passam pela view: as linhas movidas continuam visíveis
+        refresh_view(conn, table)
+
+    return moved
+
+
+def prune_partitions(engine: Engine, table: str, retention_months: int, now: datetime = None) -> List[str]:
+    """
+    Remover partições mais antigas que o período de retenção
+
+    Returns:
+        Lista com as partições removidas
+    """
+    cutoff = add_months(month_start(now or datetime.utcnow()), -retention_months)
+    partitions = list_partitions(engine, table)
+    dropped = []
+
+    with engine.begin() as conn:
+        # PostgreSQL não remove tabelas usadas por uma view
+        conn.execute(text(f'DROP VIEW IF EXISTS {view_name(table)}'))
+        for partition in partitions:
+            year, month = map(int, _PARTITION_SUFFIX.search(partition).groups())
+            if datetime(year, month, 1) < cutoff:
+                conn.execute(text(f'DROP TABLE {partition}'))
+                dropped.append(partition)
+                logger.info(f"Partição {partition} removida (retenção de {retention_months} meses)")
+        refresh_view(conn, table)
+
+    return dropped
@@ -0,0 +1,218 @@
+import contextvars
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Prioridades: consultas de usuários passam na frente das renovações em segundo plano
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+_current_priority = contextvars.ContextVar('weather_request_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: str):
+    """Definir a prioridade das requisições feitas dentro do bloco"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+
+class SQLiteTokenBucket:
+    """
+    Token bucket com estado em SQLite, compartilhado entre threads e processos
+
+    Vários workers do gunicorn que apontam para o mesmo arquivo dividem a
+    mesma cota. Cada retirada é uma transação `BEGIN IMMEDIATE` curta.
+    """
+
+    def __init__(self, path: str = None, name: str = 'openweather', rate_per_minute: float = 60,
+                 capacity: float = None, clock: Callable[[], float] = time.time):
+        self.path = path or os.path.join(tempfile.gettempdir(), 'weather_rate_limit.db')
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        # Relógio de parede: o estado é compartilhado entre processos
+        self._clock = clock
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS token_bucket '
+                '(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+            )
+
+    @contextmanager
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        yield conn
+
+    def _update(self, take: float, reserve: float = 0.0, floor: float = None) -> float:
+        with self._connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT tokens, updated_at FROM token_bucket WHERE name = ?',
+                                   (self.name,)).fetchone()
+                now = self._clock()
+                tokens = self.capacity if row is None else \
+                    min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+
+                wait = 0.0
+                if floor is not None:
+                    tokens = min(tokens, floor)
+                elif tokens - take >= reserve:
+                    tokens -= take
+                else:
+                    wait = (take + reserve - tokens) / self.rate
+
+                conn.execute('INSERT OR REPLACE INTO token_bucket (name, tokens, updated_at) VALUES (?, ?, ?)',
+                             (self.name, tokens, now))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return wait
+
+    def try_acquire(self, tokens: float = 1, reserve: float = 0) -> float:
+        """
+        Tentar retirar `tokens` mantendo ao menos `reserve` no bucket
+
+        Returns:
+            0 se os tokens foram retirados, senão os segundos estimados até haver saldo
+        """
+        return self._update(tokens, reserve)
+
+    def penalize(self, seconds: float):
+        """Esvaziar o bucket por `seconds` (ex.: após um 429 com Retry-After)"""
+        self._update(0, floor=-seconds * self.rate)
+
+
+class RateLimiter:
+    """
+    Fila de prioridade na frente do token bucket
+
+    Requisições de segundo plano esperam enquanto houver requisições
+    interativas aguardando neste processo e, entre processos, só consomem
+    tokens acima da fração `background_reserve` da capacidade.
+    """
+
+    def __init__(self, bucket: SQLiteTokenBucket, max_wait: float = 10, background_reserve: float = 0.2):
+        self.bucket = bucket
+        self.max_wait = max_wait
+        self.reserve = {
+            INTERACTIVE: 0.0,
+            BACKGROUND: bucket.capacity * background_reserve
+        }
+        self._cond = threading.Condition()
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+
+        # Métricas por prioridade
+        self._acquired = {priority: 0 for priority in PRIORITIES}
+        self._rejected = {priority: 0 for priority in PRIORITIES}
+        self._wait_total = {priority: 0.0 for priority in PRIORITIES}
+        self._wait_max = {priority: 0.0 for priority in PRIORITIES}
+        self.throttled = 0
+
+    def acquire(self, priority: str = None, timeout: float = None) -> bool:
+        """
+        Aguardar um token (no máximo `timeout` segundos)
+
+        Returns:
+            bool: False se o tempo de espera esgotou
+        """
+        priority = priority or current_priority()
+        deadline = time.monotonic() + (self.max_wait if timeout is None else timeout)
+        started = time.monotonic()
+
+        with self._cond:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                with self._cond:
+                    # Segundo plano cede a vez para consultas interativas pendentes
+                    while priority == BACKGROUND and self._waiting[INTERACTIVE] > 0:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return self._reject(priority)
+                        self._cond.wait(min(remaining, 0.5))
+
+                wait = self.bucket.try_acquire(1, self.reserve[priority])
+                if wait == 0:
+                    self._record(priority, time.monotonic() - started)
+                    return True
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return self._reject(priority)
+                time.sleep(min(wait, remaining, 1.0))
+        finally:
+            with self._cond:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def _record(self, priority: str, waited: float):
+        with self._cond:
+            self._acquired[priority] += 1
+            self._wait_total[priority] += waited
+            self._wait_max[priority] = max(self._wait_max[priority], waited)
+
+    def _reject(self, priority: str) -> bool:
+        with self._cond:
+            self._rejected[priority] += 1
+        logger.warning(f"Limite de requisições da OpenWeather: requisição {priority} descartada")
+        return False
+
+    def on_throttled(self, retry_after: float):
+        """Upstream devolveu 429: pausar todos os processos por `retry_after` segundos"""
+        with self._cond:
+            self.throttled += 1
+        self.bucket.penalize(retry_after)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                'rate_per_minute': round(self.bucket.rate * 60, 2),
+                'capacity': self.bucket.capacity,
+                'throttled': self.throttled,
+                'priorities': {
+                    priority: {
+                        'queue_depth': self._waiting[priority],
+                        'acquired': self._acquired[priority],
+                        'rejected': self._rejected[priority],
+                        'avg_wait_ms': round(self._wait_total[priority] / self._acquired[priority] * 1000, 2)
+                        if self._acquired[priority] else 0.0,
+                        'max_wait_ms': round(self._wait_max[priority] * 1000, 2)
+                    }
+                    for priority in PRIORITIES
+                }
+            }
+
+
+def create_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Limitador configurado por OPENWEATHER_RATE_LIMIT (requisições por minuto,
+    0 desativa) e WEATHER_RATE_LIMIT_DB (arquivo compartilhado pelos workers)
+    """
+    rate_per_minute = float(os.getenv('OPENWEATHER_RATE_LIMIT', 60))
+    if rate_per_minute <= 0:
+        return None
+    bucket = SQLiteTokenBucket(path=os.getenv('WEATHER_RATE_LIMIT_DB'), rate_per_minute=rate_per_minute)
+    return RateLimiter(bucket, max_wait=float(os.getenv('WEATHER_RATE_LIMIT_MAX_WAIT', 10)))
@@ -0,0 +1,142 @@
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from rate_limiter import BACKGROUND, request_priority
+from weather_cache import WeatherCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheRefresher:
+    """
+    Agendador em segundo plano que mantém as cidades mais consultadas
+    sempre aquecidas no cache
+
+    A cada `interval` segundos obtém as `top_k` cidades mais populares
+    (via `hot_cities`) e renova as que expiram em menos de
+    `refresh_ahead` segundos, antes que algum usuário precise esperar
+    pela API.
+    """
+
+    def __init__(self, cache: WeatherCache, fetch: Callable[[str, str], Optional[Dict]],
+                 hot_cities: Callable[[int], List[Tuple[str, str, int]]],
+                 top_k: int = 10, interval: float = 30, refresh_ahead: float = 60):
+        """
+        Args:
+            cache: Cache compartilhado com as rotas
+            fetch: Função (cidade, país) que consulta a API
+            hot_cities: Função (limite) que devolve [(cidade, país, consultas)]
+            top_k: Quantidade de cidades mantidas aquecidas
+            interval: Intervalo entre ciclos, em segundos
+            refresh_ahead: Antecedência da renovação em relação à expiração
+        """
+        self.cache = cache
+        self.fetch = fetch
+        self.hot_cities = hot_cities
+        self.top_k = top_k
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # Estado exposto via status()
+        self.schedule: List[Dict] = []
+        self.cycles = 0
+        self.refreshed = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_run: Optional[datetime] = None
+        self.last_duration = 0.0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def start(self):
+        """Iniciar a thread de renovação (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-refresher', daemon=True)
+        self._thread.start()
+        logger.info(f"Renovação de cache iniciada (top {self.top_k}, a cada {self.interval}s)")
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Erro no ciclo de renovação do cache: {e}")
+                with self._lock:
+                    self.failures += 1
+                    self.last_error = str(e)
+            self._stop.wait(self.interval)
+
+    def run_once(self):
+        """Executar um ciclo de renovação"""
+        started = time.monotonic()
+        schedule = []
+
+        for city, country, hits in self.hot_cities(self.top_k):
+            remaining = self.cache.current_ttl_remaining(city, country)
+            due = remaining is None or remaining <= self.refresh_ahead
+            item = {
+                'city': city,
+                'country': country,
+                'queries': hits,
+                'expires_in': round(remaining, 1) if remaining is not None else None,
+                'refreshed': False
+            }
+
+            if due:
+                # Atraso: quanto tempo a entrada ficou expirada antes da renovação
+                lag = max(0.0, -remaining) if remaining is not None else 0.0
+                # Renovação cede a cota da API para consultas de usuários
+                with request_priority(BACKGROUND):
+                    value = self.cache.refresh_current(lambda: self.fetch(city, country), city, country)
+                with self._lock:
+                    if value is None:
+                        self.failures += 1
+                        self.last_error = f"Falha ao renovar {city},{country}"
+                    else:
+                        self.refreshed += 1
+                        self.last_lag = lag
+                        self.max_lag = max(self.max_lag, lag)
+                item['refreshed'] = value is not None
+
+            schedule.append(item)
+
+        with self._lock:
+            self.schedule = schedule
+            self.cycles += 1
+            self.last_run = datetime.utcnow()
+            self.last_duration = time.monotonic() - started
+
+    def status(self) -> Dict:
+        """Agenda, atraso de renovação e falhas"""
+        with self._lock:
+            return {
+                'running': bool(self._thread and self._thread.is_alive()),
+                'top_k': self.top_k,
+                'interval': self.interval,
+                'refresh_ahead': self.refresh_ahead,
+                'cycles': self.cycles,
+                'refreshed': self.refreshed,
+                'failures': self.failures,
+                'last_error': self.last_error,
+                'last_run': self.last_run.isoformat() if self.last_run else None,
+                'last_duration': round(self.last_duration, 3),
+                'lag': {
+                    'last': round(self.last_lag, 3),
+                    'max': round(self.max_lag, 3)
+                },
+                'schedule': list(self.schedule)
+            }
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+
+try:
+    import orjson
+except ImportError:  # encoder opcional
+    orjson = None
+
+
+def _dumps_json(payload: Any) -> bytes:
+    # Mesmo formato do jsonify em produção: compacto e com chaves ordenadas
+    return json.dumps(payload, separators=(',', ':'), sort_keys=True, default=str).encode()
+
+
+def _dumps_orjson(payload: Any) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+
+
+def get_encoder(name: str = None) -> Callable[[Any], bytes]:
+    """
+    Encoder JSON -> bytes: 'orjson', 'json' ou automático (orjson se instalado)
+
+    Configurável por WEATHER_JSON_ENCODER.
+    """
+    name = name or os.getenv('WEATHER_JSON_ENCODER', 'auto')
+    if name == 'orjson' or (name == 'auto' and orjson is not None):
+        if orjson is None:
+            raise ValueError("WEATHER_JSON_ENCODER=orjson, mas o pacote orjson não está instalado")
+        return _dumps_orjson
+    return _dumps_json
+
+
+class CachedResponse:
+    """Corpo JSON já codificado, com validadores HTTP"""
+
+    __slots__ = ('version', 'body', 'etag', 'last_modified', 'last_modified_http')
+
+    def __init__(self, version: Any, body: bytes, last_modified: datetime):
+        self.version = version
+        self.body = body
+        # ETag derivado do conteúdo: igual em todos os workers para os mesmos dados
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.last_modified = last_modified.replace(microsecond=0)
+        self.last_modified_http = format_datetime(self.last_modified, usegmt=True)
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """Avaliar os cabeçalhos condicionais (If-None-Match tem precedência)"""
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or self.etag in tags or f'W/{self.etag}' in tags
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified <= since
+        return False
+
+
+class ResponseCache:
+    """
+    Cache de respostas JSON pré-codificadas, indexado por chave e versão dos dados
+
+    Enquanto a versão informada pelo chamador não muda, a resposta é servida
+    do cache sem reconstruir o dict nem chamar o encoder. Versões são
+    comparadas por identidade e depois por igualdade, então um dict de
+    origem com o mesmo conteúdo também reaproveita a entrada.
+    """
+
+    def __init__(self, maxsize: int = 512, encoder: Callable[[Any], bytes] = None, enabled: bool = True):
+        self.maxsize = maxsize
+        self.encoder = encoder or get_encoder()
+        self.enabled = enabled
+        self._data: 'OrderedDict[Hashable, CachedResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.hits = 0
+        self.misses = 0
+
+    def peek(self, key: Hashable, version: Any) -> Optional[CachedResponse]:
+        """Entrada válida para a versão, sem construir nada (para responder 304)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is not None and (entry.version is version or entry.version == version):
+            return entry
+        return None
+
+    def get(self, key: Hashable, version: Any, build: Callable[[], Any]) -> CachedResponse:
+        """
+        Resposta para (key, version), codificando `build()` só em caso de falta
+
+        Args:
+            key: Identifica o recurso (rota e parâmetros)
+            version: Versão dos dados de origem
+            build: Monta o payload (dict/list) a ser codificado
+        """
+        entry = self.peek(key, version)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+                if key in self._data:
+                    self._data.move_to_end(key, last=True)
+            return entry
+
+        entry = CachedResponse(version, self.encoder(build()), datetime.now(timezone.utc))
+        with self._lock:
+            self.misses += 1
+            if self.enabled:
+                self._data[key] = entry
+                self._data.move_to_end(key, last=True)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'encoder': 'orjson' if self.encoder is _dumps_orjson else 'json',
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,188 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, WeatherData, WeatherRollup
+from partitions import all_rows
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = ('hour', 'day')
+
+
+def bucket_start(dt: datetime, bucket: str) -> datetime:
+    """Início do bucket (hora cheia ou meia-noite) que contém `dt`"""
+    if bucket == 'hour':
+        return dt.replace(minute=0, second=0, microsecond=0)
+    if bucket == 'day':
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Bucket inválido: {bucket}")
+
+
+def rollup_city(city: str) -> str:
+    """Chave de cidade dos agregados (mesma normalização de get_weather_by_city)"""
+    return city.lower()
+
+
+def _insert(dialect: str):
+    """INSERT com suporte a ON CONFLICT do banco em uso (SQLite ou PostgreSQL)"""
+    return postgresql.insert if dialect == 'postgresql' else sqlite.insert
+
+
+def _pairwise(dialect: str, name: str, current, new):
+    """
+    Menor/maior entre o valor gravado e o novo, ignorando NULL
+
+    SQLite usa min()/max() com dois argumentos; PostgreSQL, least()/greatest().
+    """
+    if dialect == 'postgresql':
+        name = {'min': 'least', 'max': 'greatest'}[name]
+    function = getattr(func, name)
+    return function(func.coalesce(current, new), func.coalesce(new, current))
+
+
+def _observation(weather: WeatherData) -> Dict:
+    """Valores de uma leitura isolada, no formato das colunas de WeatherRollup"""
+    values = {'count': 1}
+    for field in ('temperature', 'humidity', 'wind_speed'):
+        value = getattr(weather, field)
+        values.update({
+            f'{field}_sum': value if value is not None else 0.0,
+            f'{field}_min': value,
+            f'{field}_max': value,
+        })
+        if field != 'temperature':
+            values[f'{field}_count'] = 1 if value is not None else 0
+    return values
+
+
+def update_rollups(weather: WeatherData):
+    """
+    Incorporar uma leitura aos agregados horário e diário
+
+    Cada bucket é atualizado com um único INSERT ... ON CONFLICT DO UPDATE:
+    gravações simultâneas na mesma cidade e bucket somam-se no banco, sem
+    ler o agregado antes (nem violar a restrição única). Deve ser chamada
+    antes do commit que grava a leitura, para que leitura e agregados sejam
+    persistidos na mesma transação.
+    """
+    if weather.created_at is None:
+        weather.created_at = datetime.utcnow()
+
+    dialect = db.engine.dialect.name
+    table = WeatherRollup.__table__
+    observation = _observation(weather)
+    city = rollup_city(weather.city)
+
+    for bucket in BUCKETS:
+        statement = _insert(dialect)(table).values(
+            city=city, bucket=bucket, bucket_start=bucket_start(weather.created_at, bucket), **observation
+        )
+        excluded = statement.excluded
+        updates = {}
+        for name in observation:
+            if name.endswith(('_min', '_max')):
+                updates[name] = _pairwise(dialect, name[-3:], table.c[name], excluded[name])
+            else:
+                updates[name] = table.c[name] + excluded[name]
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['city', 'bucket', 'bucket_start'], set_=updates
+        ))
+
+
+def get_aggregates(city: str, bucket: str, start: datetime, end: datetime) -> List[Dict]:
+    """
+    Agregados de uma cidade no intervalo [start, end)
+
+    Lê apenas a tabela de agregados: o custo é proporcional ao número de
+    buckets, não ao número de leituras.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Bucket inválido: {bucket}")
+
+    rollups = WeatherRollup.query.filter(
+        WeatherRollup.city == rollup_city(city),
+        WeatherRollup.bucket == bucket,
+        WeatherRollup.bucket_start >= bucket_start(start, bucket),
+        WeatherRollup.bucket_start < end
+    ).order_by(WeatherRollup.bucket_start).all()
+
+    return [rollup.to_dict() for rollup in rollups]
+
+
+def backfill_rollups(since: datetime = None, until: datetime = None, batch_size: int = 5000) -> int:
+    """
+    Recalcular os agregados de um intervalo a partir de WeatherData
+
+    O intervalo é alinhado a dias inteiros, e só os buckets dentro dele são
+    substituídos; agregados de fora (inclusive de meses cujas leituras já
+    foram removidas pela retenção) são preservados. As leituras vêm da view
+    weather_data_all, então partições mensais também são consideradas.
+
+    Args:
+        since: Início (padrão: leitura mais antiga)
+        until: Fim, exclusivo (padrão: depois da leitura mais recente)
+        batch_size: Leituras por lote (paginação por chave em created_at, id)
+
+    Returns:
+        Número de leituras processadas
+    """
+    weather = all_rows(WeatherData)
+    if since is None or until is None:
+        oldest, newest = db.session.query(func.min(weather.created_at), func.max(weather.created_at)).one()
+        if oldest is None:
+            return 0
+        since = oldest if since is None else since
+        until = newest + timedelta(microseconds=1) if until is None else until
+
+    # Dias inteiros: buckets horários e diários do intervalo ficam completos
+    start = bucket_start(since, 'day')
+    end = bucket_start(until, 'day')
+    if end < until:
+        end += timedelta(days=1)
+
+    rollups: Dict[Tuple[str, str, datetime], WeatherRollup] = {}
+    columns = (weather.id, weather.city, weather.temperature,
+               weather.humidity, weather.wind_speed, weather.created_at)
+    processed = 0
+    last = None
+
+    while True:
+        query = db.session.query(*columns).filter(weather.created_at >= start, weather.created_at < end)
+        if last is not None:
+            query = query.filter(or_(weather.created_at > last[0],
+                                     and_(weather.created_at == last[0], weather.id > last[1])))
+        rows = query.order_by(weather.created_at, weather.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        for row_id, city, temperature, humidity, wind_speed, created_at in rows:
+            for bucket in BUCKETS:
+                key = (rollup_city(city), bucket, bucket_start(created_at, bucket))
+                rollup = rollups.get(key)
+                if rollup is None:
+                    rollup = rollups[key] = WeatherRollup(city=key[0], bucket=bucket, bucket_start=key[2])
+                rollup.add_observation(temperature, humidity, wind_speed)
+
+        processed += len(rows)
+        last = (rows[-1].created_at, rows[-1].id)
+
+    WeatherRollup.query.filter(
+        WeatherRollup.bucket_start >= start, WeatherRollup.bucket_start < end
+    ).delete(synchronize_session=False)
+    db.session.add_all(rollups.values())
+    db.session.commit()
+
+    logger.info(f"Agregados recalculados de {start:%Y-%m-%d} a {end:%Y-%m-%d}: "
+                f"{processed} leituras, {len(rollups)} buckets")
+    return processed
+
+
+def default_range(bucket: str, now: datetime = None) -> Tuple[datetime, datetime]:
+    """Intervalo padrão: últimas 24 horas (hour) ou últimos 30 dias (day)"""
+    now = now or datetime.utcnow()
+    span = timedelta(hours=24) if bucket == 'hour' else timedelta(days=30)
+    return now - span, now
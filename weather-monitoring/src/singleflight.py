@@ -0,0 +1,76 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    """Chamada em andamento compartilhada entre as threads que aguardam"""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicação de chamadas concorrentes ("single-flight")
+
+    Enquanto uma chamada para uma chave está em andamento, as demais
+    threads que pedem a mesma chave aguardam e recebem o mesmo resultado
+    (ou a mesma exceção), em vez de repetir a requisição.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Executar `fn` uma única vez por chave entre chamadas simultâneas"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def is_in_flight(self, key: Hashable) -> bool:
+        """Verificar se há chamada em andamento para a chave"""
+        return key in self._calls
+
+    def in_flight(self) -> int:
+        """Número de chaves com chamada em andamento"""
+        return len(self._calls)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls)
+            }
@@ -0,0 +1,51 @@
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+SECONDS_PER_DAY = 86400
+# date(1970, 1, 1).toordinal(): ordinal do dia local = (ts + offset) // 86400 + EPOCH_ORDINAL
+EPOCH_ORDINAL = 719163
+
+
+def current_offset(data: Dict) -> Optional[int]:
+    """
+    Deslocamento UTC (s) de uma resposta de /weather
+
+    Vem só do próprio payload (`timezone`): o resultado do parsing não
+    depende de respostas anteriores.
+    """
+    offset = data.get('timezone')
+    return int(offset) if offset is not None else None
+
+
+def forecast_offset(data: Dict) -> Optional[int]:
+    """Deslocamento UTC (s) de uma resposta de /forecast (`city.timezone`)"""
+    offset = (data.get('city') or {}).get('timezone')
+    return int(offset) if offset is not None else None
+
+
+def local_day(ts: int, offset: Optional[int]) -> int:
+    """
+    Dia local (ordinal) de um timestamp UTC
+
+    Com o deslocamento conhecido é só aritmética inteira; sem ele, usa o
+    fuso horário do servidor (comportamento anterior).
+    """
+    if offset is None:
+        return datetime.fromtimestamp(ts).toordinal()
+    return (ts + offset) // SECONDS_PER_DAY + EPOCH_ORDINAL
+
+
+def local_hhmm(ts: int, offset: Optional[int]) -> str:
+    """Horário local HH:MM de um timestamp UTC (nascer/pôr do sol)"""
+    if offset is None:
+        return datetime.fromtimestamp(ts).strftime('%H:%M')
+    seconds = (ts + offset) % SECONDS_PER_DAY
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}"
+
+
+@lru_cache(maxsize=1024)
+def day_label(ordinal: int) -> Tuple[str, str]:
+    """Data (AAAA-MM-DD) e nome do dia para um ordinal, formatados uma única vez"""
+    day = date.fromordinal(ordinal)
+    return day.strftime('%Y-%m-%d'), day.strftime('%A')
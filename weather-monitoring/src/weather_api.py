@@ -4,15 +4,127 @@ from datetime import datetime, timedelta
 import logging
 from typing import Dict, Optional, List
 
+from geo_cache import GeoCache
+from http_client import ResilientHttpClient
+from rate_limiter import create_rate_limiter
+from timezones import current_offset, day_label, forecast_offset, local_day, local_hhmm
+from weather_cache import WeatherCache, make_key
+
 # Configurar logging
 logger = logging.getLogger(__name__)
 
+# Pode apontar para um servidor local (ex.: benchmarks/fake_openweather.py)
+OPENWEATHER_BASE_URL = os.getenv('OPENWEATHER_BASE_URL', "http://api.openweathermap.org/data/2.5")
+
+
+def build_query(city: str, country_code: str = None) -> str:
+    """Montar parâmetro `q` da API ("cidade" ou "cidade,país")"""
+    query = city
+    if country_code:
+        query += f",{country_code}"
+    return query
+
+
+def parse_current_weather(data: Dict) -> Dict:
+    """Converter resposta de /weather no formato usado pela aplicação"""
+    # Nascer/pôr do sol no horário local da cidade, não do servidor
+    offset = current_offset(data)
+    return {
+        'city': data['name'],
+        'country': data['sys']['country'],
+        'temperature': round(data['main']['temp'], 1),
+        'feels_like': round(data['main']['feels_like'], 1),
+        'humidity': data['main']['humidity'],
+        'pressure': data['main']['pressure'],
+        'description': data['weather'][0]['description'].title(),
+        'icon': data['weather'][0]['icon'],
+        'wind_speed': data['wind']['speed'],
+        'wind_deg': data.get('wind', {}).get('deg', 0),
+        'visibility': data.get('visibility', 0),
+        'clouds': data['clouds']['all'],
+        'sunrise': local_hhmm(data['sys']['sunrise'], offset),
+        'sunset': local_hhmm(data['sys']['sunset'], offset),
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def parse_forecast(data: Dict, days: int = 5) -> List[Dict]:
+    """Agrupar as previsões de 3 em 3 horas de /forecast em previsões diárias"""
+    forecasts = []
+    current_date = None
+    daily_forecast = None
+    # Dias no fuso horário da cidade (city.timezone), não do servidor
+    offset = forecast_offset(data)
+    
+    for forecast in data['list']:
+        forecast_date = local_day(forecast['dt'], offset)
+        
+        # Nova previsão diária
+        if forecast_date != current_date:
+            if daily_forecast:
+                forecasts.append(daily_forecast)
+            
+            current_date = forecast_date
+            label, day_name = day_label(forecast_date)
+            daily_forecast = {
+                'date': label,
+                'day_name': day_name,
+                'temp_min': forecast['main']['temp_min'],
+                'temp_max': forecast['main']['temp_max'],
+                'description': forecast['weather'][0]['description'].title(),
+                'icon': forecast['weather'][0]['icon'],
+                'humidity': forecast['main']['humidity'],
+                'wind_speed': forecast['wind']['speed'],
+                'precipitation': forecast.get('pop', 0) * 100  # Probabilidade de chuva em %
+            }
+        else:
+            # Atualizar mínimas e máximas
+            daily_forecast['temp_min'] = min(daily_forecast['temp_min'], forecast['main']['temp_min'])
+            daily_forecast['temp_max'] = max(daily_forecast['temp_max'], forecast['main']['temp_max'])
+    
+    # Adicionar última previsão
+    if daily_forecast:
+        forecasts.append(daily_forecast)
+    
+    return forecasts[:days]  # Limitar ao número solicitado de dias
+
+
+# Campos devolvidos pela consulta por coordenadas
+COORDINATE_FIELDS = ('city', 'country', 'temperature', 'feels_like', 'humidity', 'pressure',
+                     'description', 'icon', 'wind_speed', 'timestamp')
+
+
+def parse_coordinates_weather(data: Dict) -> Dict:
+    """Converter resposta de /weather (consulta por coordenadas)"""
+    return {
+        'city': data['name'],
+        'country': data['sys']['country'],
+        'temperature': round(data['main']['temp'], 1),
+        'feels_like': round(data['main']['feels_like'], 1),
+        'humidity': data['main']['humidity'],
+        'pressure': data['main']['pressure'],
+        'description': data['weather'][0]['description'].title(),
+        'icon': data['weather'][0]['icon'],
+        'wind_speed': data['wind']['speed'],
+        'timestamp': datetime.now().isoformat()
+    }
+
+
 class WeatherAPI:
     """Classe para interagir com a API do OpenWeatherMap"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, cache: Optional[WeatherCache] = None,
+                 units: str = 'metric', lang: str = 'pt_br',
+                 http_client: Optional[ResilientHttpClient] = None, base_url: str = None,
+                 geo_cache: Optional[GeoCache] = None, nearest_radius_km: float = 0):
         self.api_key = api_key or os.getenv('OPENWEATHER_API_KEY')
-        self.base_url = "http://api.openweathermap.org/data/2.5"
+        self.base_url = base_url or OPENWEATHER_BASE_URL
+        self.cache = cache
+        self.geo_cache = geo_cache
+        self.nearest_radius_km = nearest_radius_km
+        self.http = http_client or ResilientHttpClient()
+        self.units = units
+        self.lang = lang
         
         if not self.api_key:
             logger.warning("OpenWeather API key não encontrada")
@@ -28,44 +140,41 @@ class WeatherAPI:
         Returns:
             Dict com dados meteorológicos ou None em caso de erro
         """
+        if self.cache is None:
+            return self._fetch_current_weather(city, country_code)
+        
+        return self.cache.get_current(
+            lambda: self._fetch_current_weather(city, country_code),
+            city, country_code, self.units, self.lang
+        )
+    
+    def _fetch_current_weather(self, city: str, country_code: str = None) -> Optional[Dict]:
+        """Consultar clima atual diretamente na API (sem cache)"""
         try:
             # Construir query
-            query = city
-            if country_code:
-                query += f",{country_code}"
+            query = build_query(city, country_code)
             
             # Fazer requisição
             url = f"{self.base_url}/weather"
             params = {
                 'q': query,
                 'appid': self.api_key,
-                'units': 'metric',
-                'lang': 'pt_br'
+                'units': self.units,
+                'lang': self.lang
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
             
             # Processar e formatar dados
-            processed_data = {
-                'city': data['name'],
-                'country': data['sys']['country'],
-                'temperature': round(data['main']['temp'], 1),
-                'feels_like': round(data['main']['feels_like'], 1),
-                'humidity': data['main']['humidity'],
-                'pressure': data['main']['pressure'],
-                'description': data['weather'][0]['description'].title(),
-                'icon': data['weather'][0]['icon'],
-                'wind_speed': data['wind']['speed'],
-                'wind_deg': data.get('wind', {}).get('deg', 0),
-                'visibility': data.get('visibility', 0),
-                'clouds': data['clouds']['all'],
-                'sunrise': datetime.fromtimestamp(data['sys']['sunrise']).strftime('%H:%M'),
-                'sunset': datetime.fromtimestamp(data['sys']['sunset']).strftime('%H:%M'),
-                'timestamp': datetime.now().isoformat()
-            }
+            processed_data = parse_current_weather(data)
+            
+            # Posição da cidade no índice espacial (consultas por coordenadas próximas)
+            if self.geo_cache is not None and 'coord' in data:
+                self.geo_cache.register_city(make_key(city, country_code, self.units, self.lang),
+                                             data['coord']['lat'], data['coord']['lon'])
             
             logger.info(f"Dados meteorológicos obtidos para {city}")
             return processed_data
@@ -92,63 +201,40 @@ class WeatherAPI:
         Returns:
             Lista de dicionários com previsão ou None em caso de erro
         """
+        if self.cache is None:
+            return self._fetch_weather_forecast(city, country_code, days)
+        
+        return self.cache.get_forecast(
+            lambda: self._fetch_weather_forecast(city, country_code, days),
+            city, country_code, days, self.units, self.lang
+        )
+    
+    def _fetch_weather_forecast(self, city: str, country_code: str = None, days: int = 5) -> Optional[List[Dict]]:
+        """Consultar previsão diretamente na API (sem cache)"""
         try:
             # Construir query
-            query = city
-            if country_code:
-                query += f",{country_code}"
+            query = build_query(city, country_code)
             
             # Fazer requisição
             url = f"{self.base_url}/forecast"
             params = {
                 'q': query,
                 'appid': self.api_key,
-                'units': 'metric',
-                'lang': 'pt_br',
+                'units': self.units,
+                'lang': self.lang,
                 'cnt': days * 8  # 8 previsões por dia (3 horas cada)
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
             
             # Processar previsões
-            forecasts = []
-            current_date = None
-            daily_forecast = None
-            
-            for forecast in data['list']:
-                forecast_date = datetime.fromtimestamp(forecast['dt']).date()
-                
-                # Nova previsão diária
-                if forecast_date != current_date:
-                    if daily_forecast:
-                        forecasts.append(daily_forecast)
-                    
-                    current_date = forecast_date
-                    daily_forecast = {
-                        'date': forecast_date.strftime('%Y-%m-%d'),
-                        'day_name': forecast_date.strftime('%A'),
-                        'temp_min': forecast['main']['temp_min'],
-                        'temp_max': forecast['main']['temp_max'],
-                        'description': forecast['weather'][0]['description'].title(),
-                        'icon': forecast['weather'][0]['icon'],
-                        'humidity': forecast['main']['humidity'],
-                        'wind_speed': forecast['wind']['speed'],
-                        'precipitation': forecast.get('pop', 0) * 100  # Probabilidade de chuva em %
-                    }
-                else:
-                    # Atualizar mínimas e máximas
-                    daily_forecast['temp_min'] = min(daily_forecast['temp_min'], forecast['main']['temp_min'])
-                    daily_forecast['temp_max'] = max(daily_forecast['temp_max'], forecast['main']['temp_max'])
-            
-            # Adicionar última previsão
-            if daily_forecast:
-                forecasts.append(daily_forecast)
+            forecasts = parse_forecast(data, days)
             
             logger.info(f"Previsão obtida para {city} - {len(forecasts)} dias")
-            return forecasts[:days]  # Limitar ao número solicitado de dias
+            return forecasts
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro na requisição de previsão para {city}: {e}")
@@ -171,33 +257,59 @@ class WeatherAPI:
         Returns:
             Dict com dados meteorológicos ou None em caso de erro
         """
+        if self.geo_cache is None:
+            return self._fetch_weather_by_coordinates(lat, lon)
+        
+        # 1. Mesma célula da grade já consultada
+        cached = self.geo_cache.get(lat, lon)
+        if cached is not None:
+            return cached
+        
+        # 2. Cidade em cache a até `nearest_radius_km` km
+        nearby = self._nearest_cached_city(lat, lon)
+        if nearby is not None:
+            self.geo_cache.set(lat, lon, nearby)
+            return nearby
+        
+        # 3. Consulta à API
+        processed_data = self._fetch_weather_by_coordinates(lat, lon)
+        if processed_data is not None:
+            self.geo_cache.set(lat, lon, processed_data)
+        return processed_data
+    
+    def _nearest_cached_city(self, lat: float, lon: float) -> Optional[Dict]:
+        """Clima da cidade em cache mais próxima, sem acessar a rede"""
+        if self.cache is None or self.nearest_radius_km <= 0:
+            return None
+        
+        for distance, key in self.geo_cache.nearest_cities(lat, lon, self.nearest_radius_km):
+            weather = self.cache.current.peek(key)
+            if weather is not None:
+                self.geo_cache.nearest_hits += 1
+                logger.info(f"Coordenadas {lat}, {lon} atendidas por {weather['city']} ({distance:.1f} km)")
+                return {field: weather[field] for field in COORDINATE_FIELDS}
+        
+        self.geo_cache.nearest_misses += 1
+        return None
+    
+    def _fetch_weather_by_coordinates(self, lat: float, lon: float) -> Optional[Dict]:
+        """Consultar clima por coordenadas diretamente na API (sem cache)"""
         try:
             url = f"{self.base_url}/weather"
             params = {
                 'lat': lat,
                 'lon': lon,
                 'appid': self.api_key,
-                'units': 'metric',
-                'lang': 'pt_br'
+                'units': self.units,
+                'lang': self.lang
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
             
-            processed_data = {
-                'city': data['name'],
-                'country': data['sys']['country'],
-                'temperature': round(data['main']['temp'], 1),
-                'feels_like': round(data['main']['feels_like'], 1),
-                'humidity': data['main']['humidity'],
-                'pressure': data['main']['pressure'],
-                'description': data['weather'][0]['description'].title(),
-                'icon': data['weather'][0]['icon'],
-                'wind_speed': data['wind']['speed'],
-                'timestamp': datetime.now().isoformat()
-            }
+            processed_data = parse_coordinates_weather(data)
             
             logger.info(f"Dados obtidos por coordenadas: {lat}, {lon}")
             return processed_data
@@ -220,17 +332,37 @@ class WeatherAPI:
                 'appid': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=5)
+            response = self.http.get(url, params=params, timeout=5)
             return response.status_code == 200
             
         except Exception:
             return False
+    
+    def close(self):
+        """Fechar o pool de conexões HTTP"""
+        self.http.close()
 
 
 # Função de utilidade para criar instância da API
 def create_weather_api() -> WeatherAPI:
     """Factory function para criar instância do WeatherAPI"""
-    return WeatherAPI()
+    cache = WeatherCache(
+        maxsize=int(os.getenv('WEATHER_CACHE_SIZE', 256)),
+        current_ttl=float(os.getenv('WEATHER_CACHE_TTL_CURRENT', 600)),
+        forecast_ttl=float(os.getenv('WEATHER_CACHE_TTL_FORECAST', 1800))
+    )
+    http_client = ResilientHttpClient(
+        pool_size=int(os.getenv('WEATHER_HTTP_POOL_SIZE', 10)),
+        max_retries=int(os.getenv('WEATHER_HTTP_MAX_RETRIES', 2)),
+        timeout=float(os.getenv('WEATHER_HTTP_TIMEOUT', 10)),
+        rate_limiter=create_rate_limiter()
+    )
+    geo_cache = GeoCache(
+        precision=int(os.getenv('WEATHER_GEO_PRECISION', 6)),
+        ttl=float(os.getenv('WEATHER_CACHE_TTL_CURRENT', 600))
+    )
+    return WeatherAPI(cache=cache, http_client=http_client, geo_cache=geo_cache,
+                      nearest_radius_km=float(os.getenv('WEATHER_GEO_NEAREST_KM', 5)))
 
 
 # Exemplo de uso
@@ -0,0 +1,293 @@
+import threading
+import time
+import unicodedata
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from rate_limiter import BACKGROUND, request_priority
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Sentinela para diferenciar "não encontrado" de valores armazenados
+_MISSING = object()
+
+
+def normalize_city(city: str) -> str:
+    """
+    Normalizar nome de cidade para uso como chave de cache
+
+    "  São   Paulo " e "são paulo" resultam na mesma chave.
+    """
+    city = unicodedata.normalize('NFC', city or '')
+    return ' '.join(city.split()).casefold()
+
+
+def make_key(city: str, country_code: str = None, units: str = 'metric', lang: str = 'pt_br') -> Tuple:
+    """Montar chave de cache (cidade normalizada, país, unidades, idioma)"""
+    country = (country_code or '').strip().upper()
+    return (normalize_city(city), country, units, lang)
+
+
+class TTLCache:
+    """
+    Cache LRU com tamanho máximo e expiração por entrada (thread-safe)
+
+    Entradas expiradas continuam disponíveis via `get_stale` por mais
+    `stale_ttl` segundos, permitindo servir dados antigos enquanto são
+    revalidados (stale-while-revalidate).
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300, stale_ttl: float = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize deve ser maior que zero")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Obter valor válido do cache, ou `default` se ausente/expirado"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            now = self._clock()
+            if expires_at <= now:
+                if expires_at + self.stale_ttl <= now:
+                    del self._data[key]
+                    self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """Obter valor expirado ainda dentro do período `stale_ttl`"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            value, expires_at = entry
+            if expires_at + self.stale_ttl <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.stale_hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Consultar valor válido sem alterar contadores nem a ordem LRU"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= self._clock():
+                return default
+            return entry[0]
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """Segundos até a expiração (negativo se já expirou), ou None se ausente"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            return entry[1] - self._clock()
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        """Armazenar valor, despejando as entradas menos usadas se necessário"""
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (value, expires_at)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        """Remover entrada do cache"""
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self):
+        """Esvaziar o cache (contadores são mantidos)"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        """Estatísticas de uso do cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale_hits': self.stale_hits,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class WeatherCache:
+    """
+    Cache de respostas do clima atual e previsão, com TTLs separados
+
+    Em caso de ausência, consultas simultâneas para a mesma chave são
+    agrupadas em uma única chamada à API (single-flight). Com `stale_ttl`
+    maior que zero, entradas recém-expiradas são servidas imediatamente
+    enquanto uma thread de fundo busca o valor atualizado.
+    """
+
+    def __init__(self, maxsize: int = 256, current_ttl: float = 600, forecast_ttl: float = 1800,
+                 stale_ttl: float = 0, clock: Callable[[], float] = time.monotonic):
+        self.current = TTLCache(maxsize=maxsize, ttl=current_ttl, stale_ttl=stale_ttl, clock=clock)
+        self.forecast = TTLCache(maxsize=maxsize, ttl=forecast_ttl, stale_ttl=stale_ttl, clock=clock)
+        self.flight = SingleFlight()
+        self._revalidator = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cache-revalidate')
+
+    def _load(self, kind: str, key: Hashable, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+        cache = getattr(self, kind)
+
+        def load_and_store():
+            value = loader()
+            # Falhas (None) não são armazenadas para permitir nova tentativa
+            if value is not None:
+                cache.set(key, value)
+            return value
+
+        return self.flight.do((kind,) + key, load_and_store)
+
+    def _revalidate(self, kind: str, key: Hashable, loader: Callable[[], Optional[Any]]):
+        try:
+            # O usuário já recebeu o valor antigo: a revalidação é segundo plano
+            with request_priority(BACKGROUND):
+                self._load(kind, key, loader)
+        except Exception as e:
+            logger.error(f"Erro ao revalidar cache {kind} {key}: {e}")
+
+    def _fetch(self, kind: str, key: Hashable, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+        cache = getattr(self, kind)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        value = cache.get_stale(key, _MISSING)
+        if value is not _MISSING:
+            if not self.flight.is_in_flight((kind,) + key):
+                self._revalidator.submit(self._revalidate, kind, key, loader)
+            return value
+
+        return self._load(kind, key, loader)
+
+    def get_current(self, loader: Callable[[], Optional[Dict]], city: str, country_code: str = None,
+                    units: str = 'metric', lang: str = 'pt_br') -> Optional[Dict]:
+        """
+        Obter clima atual do cache ou via `loader` em caso de ausência
+
+        Args:
+            loader: Função sem argumentos que consulta a API
+            city: Nome da cidade
+            country_code: Código do país (opcional)
+            units: Sistema de unidades da consulta
+            lang: Idioma da consulta
+
+        Returns:
+            Dict com dados meteorológicos ou None em caso de erro
+        """
+        key = make_key(city, country_code, units, lang)
+        return self._fetch('current', key, loader)
+
+    def get_forecast(self, loader: Callable[[], Optional[list]], city: str, country_code: str = None,
+                     days: int = 5, units: str = 'metric', lang: str = 'pt_br') -> Optional[list]:
+        """Obter previsão do cache ou via `loader` em caso de ausência"""
+        key = make_key(city, country_code, units, lang) + (days,)
+        return self._fetch('forecast', key, loader)
+
+    def refresh_current(self, loader: Callable[[], Optional[Dict]], city: str, country_code: str = None,
+                        units: str = 'metric', lang: str = 'pt_br') -> Optional[Dict]:
+        """Forçar nova consulta do clima atual e atualizar o cache"""
+        key = make_key(city, country_code, units, lang)
+        return self._load('current', key, loader)
+
+    def current_ttl_remaining(self, city: str, country_code: str = None,
+                              units: str = 'metric', lang: str = 'pt_br') -> Optional[float]:
+        """Segundos até a expiração do clima atual em cache (None se ausente)"""
+        return self.current.ttl_remaining(make_key(city, country_code, units, lang))
+
+    @staticmethod
+    def _fetch_many(cache: TTLCache, keys: List[Hashable], specs: Sequence[Tuple[str, Optional[str]]],
+                    loader: Callable[[List[Tuple[str, Optional[str]]]], List[Optional[Any]]]) -> List[Optional[Any]]:
+        results = [cache.get(key, _MISSING) for key in keys]
+        missing = [i for i, value in enumerate(results) if value is _MISSING]
+
+        if missing:
+            loaded = loader([specs[i] for i in missing])
+            for i, value in zip(missing, loaded):
+                results[i] = value
+                if value is not None:
+                    cache.set(keys[i], value)
+        return results
+
+    def get_many_current(self, loader: Callable, cities: Sequence[Tuple[str, Optional[str]]],
+                         units: str = 'metric', lang: str = 'pt_br') -> List[Optional[Dict]]:
+        """
+        Obter clima atual de várias cidades, consultando só as ausentes
+
+        Args:
+            loader: Recebe a lista de (cidade, país) ausentes e devolve
+                resultados alinhados a ela
+            cities: Lista de (cidade, país)
+
+        Returns:
+            Lista alinhada com `cities`
+        """
+        keys = [make_key(city, country, units, lang) for city, country in cities]
+        return self._fetch_many(self.current, keys, cities, loader)
+
+    def get_many_forecasts(self, loader: Callable, cities: Sequence[Tuple[str, Optional[str]]],
+                           days: int = 5, units: str = 'metric', lang: str = 'pt_br') -> List[Optional[list]]:
+        """Obter previsões de várias cidades, consultando só as ausentes"""
+        keys = [make_key(city, country, units, lang) + (days,) for city, country in cities]
+        return self._fetch_many(self.forecast, keys, cities, loader)
+
+    def clear(self):
+        """Esvaziar ambos os caches"""
+        self.current.clear()
+        self.forecast.clear()
+
+    def stats(self) -> Dict:
+        """Estatísticas de ambos os caches"""
+        return {
+            'current': self.current.stats(),
+            'forecast': self.forecast.stats(),
+            'singleflight': self.flight.stats()
+        }
@@ -0,0 +1,173 @@
+import queue
+import threading
+import time
+import logging
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Políticas quando a fila está cheia
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+BLOCK = 'block'
+
+
+class WriteBehindBuffer:
+    """
+    Buffer de escrita assíncrona ("write-behind") para inserções em lote
+
+    As linhas são enfileiradas e gravadas por uma thread de fundo em um
+    único insert em lote, a cada `max_batch` linhas ou `flush_interval`
+    segundos, o que ocorrer primeiro.
+    """
+
+    def __init__(self, flush_fn: Callable[[List[Dict]], None], max_batch: int = 100,
+                 flush_interval: float = 0.5, max_queue: int = 10000,
+                 policy: str = DROP_OLDEST, block_timeout: float = 1.0):
+        """
+        Args:
+            flush_fn: Função que grava uma lista de linhas (dicts) no banco
+            max_batch: Número máximo de linhas por lote
+            flush_interval: Tempo máximo (s) que uma linha aguarda na fila
+            max_queue: Capacidade da fila
+            policy: 'drop_oldest', 'drop_newest' ou 'block' quando cheia
+            block_timeout: Espera máxima (s) na política 'block'
+        """
+        if policy not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError(f"Política inválida: {policy}")
+
+        self.flush_fn = flush_fn
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.enqueued = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.batches = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def start(self):
+        """Iniciar a thread de gravação (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        """Parar a thread gravando tudo o que ainda estiver na fila"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.flush()
+
+    def submit(self, row: Dict) -> bool:
+        """
+        Enfileirar uma linha para gravação
+
+        Returns:
+            bool: False se a linha foi descartada
+        """
+        try:
+            if self.policy == BLOCK:
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            if self.policy != DROP_OLDEST:
+                self._count_drop()
+                return False
+            try:
+                self._queue.get_nowait()
+                self._count_drop()
+                self._queue.put_nowait(row)
+            except (queue.Empty, queue.Full):
+                self._count_drop()
+                return False
+
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _count_drop(self):
+        with self._lock:
+            self.dropped += 1
+        if self.dropped % 1000 == 1:
+            logger.warning(f"Fila de gravação cheia: {self.dropped} linhas descartadas")
+
+    def _drain(self, first: Dict, deadline: float) -> List[Dict]:
+        batch = [first]
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._write(self._drain(first, time.monotonic() + self.flush_interval))
+
+    def flush(self):
+        """Gravar imediatamente todas as linhas pendentes"""
+        while True:
+            batch = []
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch: List[Dict]):
+        started = time.perf_counter()
+        try:
+            self.flush_fn(batch)
+        except Exception as e:
+            logger.error(f"Erro ao gravar lote de {len(batch)} linhas: {e}")
+            with self._lock:
+                self.flush_errors += 1
+                self.dropped += len(batch)
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.flushed += len(batch)
+            self.batches += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'policy': self.policy,
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                'enqueued': self.enqueued,
+                'flushed': self.flushed,
+                'batches': self.batches,
+                'dropped': self.dropped,
+                'flush_errors': self.flush_errors,
+                'avg_batch_size': round(self.flushed / self.batches, 1) if self.batches else 0.0,
+                'last_flush_ms': round(self.last_flush_ms, 2),
+                'max_flush_ms': round(self.max_flush_ms, 2)
+            }
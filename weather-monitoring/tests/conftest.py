@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+
+# app.py lê a configuração no import: banco temporário e nada rodando em segundo plano
+_DB_DIR = tempfile.mkdtemp(prefix='weather-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_DB_DIR, 'weather.db')}"
+os.environ['WEATHER_REFRESH_ENABLED'] = '0'
+os.environ['WEATHER_BACKEND'] = 'simulado'
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    app.app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def db(app_module):
+    """Banco vazio (tabelas, views e sem partições) dentro de um app context"""
+    from sqlalchemy import text
+    from models import db
+    from partitions import ensure_views, list_partitions, view_name
+
+    with app_module.app.app_context():
+        with db.engine.begin() as conn:
+            for table in app_module.PARTITIONED_TABLES:
+                conn.execute(text(f'DROP VIEW IF EXISTS {view_name(table)}'))
+                for partition in list_partitions(conn, table):
+                    conn.execute(text(f'DROP TABLE {partition}'))
+        db.drop_all()
+        db.create_all()
+        ensure_views(db.engine, app_module.PARTITIONED_TABLES)
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app_module, db):
+    return app_module.app.test_client()
+
+
+
+@pytest.fixture
+def fake_openweather():
+    """OpenWeather local (benchmarks/fake_openweather.py); devolve a URL base da API"""
+    sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    from fake_openweather import serve
+
+    server = serve(0, latency_ms=0, jitter_ms=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from archive import ArchiveReader, export_archive, write_archive
+from models import WeatherData
+from partitions import rollover_partitions
+
+START = datetime(2024, 1, 20)
+
+
+def _rows(count=50):
+    return [{
+        'city': ('recife', 'natal', 'belém')[i % 3],
+        'country': 'BR',
+        'description': 'céu limpo' if i % 2 else None,
+        'temperature': 20.0 + i % 10,
+        'humidity': None if i % 5 == 0 else 60,
+        'pressure': 1010,
+        'wind_speed': 2.5,
+        'created_at': START + timedelta(hours=i * 7)
+    } for i in range(count)]
+
+
+def test_round_trip_preserves_rows(tmp_path):
+    path = str(tmp_path / 'weather.wxa')
+    rows = _rows()
+
+    # Âncoras frequentes: a decodificação atravessa vários blocos
+    assert write_archive(path, rows, anchor_every=8) == len(rows)
+
+    with ArchiveReader(path) as reader:
+        restored = list(reader.iter_rows(batch_size=16))
+
+    assert len(restored) == len(rows)
+    for original, row in zip(rows, restored):
+        assert row['created_at'] == original['created_at'].isoformat()
+        assert {k: row[k] for k in ('city', 'country', 'description', 'humidity')} == \
+            {k: original[k] for k in ('city', 'country', 'description', 'humidity')}
+        assert row['temperature'] == pytest.approx(original['temperature'])
+
+
+def test_time_range_and_aggregates(tmp_path):
+    path = str(tmp_path / 'weather.wxa')
+    rows = _rows()
+    write_archive(path, rows, anchor_every=8)
+    since, until = START + timedelta(days=3), START + timedelta(days=9)
+    expected = [row for row in rows if since <= row['created_at'] < until]
+
+    with ArchiveReader(path) as reader:
+        assert len(list(reader.iter_rows(since, until))) == len(expected)
+        cities = {item['city']: item for item in reader.aggregate_by_city(since, until)}
+
+    recife = [row for row in expected if row['city'] == 'recife']
+    assert cities['recife']['count'] == len(recife)
+    assert cities['recife']['temperature']['max'] == max(row['temperature'] for row in recife)
+    assert cities['recife']['humidity']['count'] == sum(row['humidity'] is not None for row in recife)
+
+
+def test_rows_must_be_in_time_order(tmp_path):
+    rows = _rows(3)[::-1]
+    with pytest.raises(ValueError):
+        write_archive(str(tmp_path / 'weather.wxa'), rows)
+
+
+def test_invalid_file_is_rejected(tmp_path):
+    path = tmp_path / 'weather.wxa'
+    path.write_bytes(b'nada disso' * 10)
+    with pytest.raises(ValueError):
+        ArchiveReader(str(path))
+
+
+def test_export_includes_partitioned_rows(db, tmp_path):
+    for row in _rows(20):
+        db.session.add(WeatherData(**row))
+    db.session.commit()
+    rollover_partitions(db.engine, 'weather_data', 'created_at', hot_months=1, now=datetime(2024, 2, 10))
+
+    path = str(tmp_path / 'weather.wxa')
+    assert export_archive(path) == 20
+    with ArchiveReader(path) as reader:
+        assert reader.stats()['since'] == START.isoformat()
@@ -0,0 +1,47 @@
+import asyncio
+
+import requests
+
+from async_weather_api import AsyncWeatherAPI, BlockingWeatherClient
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_many_current_is_aligned_with_the_input(fake_openweather):
+    async def main():
+        async with AsyncWeatherAPI('chave', base_url=f"{fake_openweather}/data/2.5") as api:
+            return await api.get_many_current(['Recife', ('Natal', 'BR'), 'Belém'], country_code='BR')
+
+    results = _run(main())
+
+    assert [r['city'] for r in results] == ['Recife', 'Natal', 'Belém']
+    calls = requests.get(f"{fake_openweather}/__stats").json()['calls']
+    assert calls == {'/data/2.5/weather': 3}
+
+
+def test_many_forecasts_returns_daily_forecasts(fake_openweather):
+    async def main():
+        async with AsyncWeatherAPI('chave', base_url=f"{fake_openweather}/data/2.5") as api:
+            return await api.get_many_forecasts(['Recife', 'Natal'], days=3)
+
+    results = _run(main())
+
+    assert len(results) == 2
+    assert all(1 <= len(days) <= 3 for days in results)
+    assert {'date', 'temp_min', 'temp_max'} <= set(results[0][0])
+    # Resumo diário calculado em lote para todas as cidades
+    for day in results[0] + results[1]:
+        assert day['temp_min'] <= day['temp_mean'] <= day['temp_max']
+        assert 0 <= day['precipitation_max'] <= 100
+        assert day['dominant_description']
+
+
+def test_unreachable_upstream_yields_none():
+    client = BlockingWeatherClient(AsyncWeatherAPI('chave', base_url='http://127.0.0.1:9/data/2.5',
+                                                   timeout=1, max_retries=0))
+    try:
+        assert client.get_many_current([('Recife', 'BR')]) == [None]
+    finally:
+        client.close()
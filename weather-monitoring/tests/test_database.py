@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import decode_cursor, encode_cursor, get_weather_page, iter_weather_data
+from models import WeatherData
+
+START = datetime(2024, 3, 1)
+
+
+def _seed(db, count=25):
+    # Pares de leituras no mesmo instante: o desempate é pelo id
+    for i in range(count):
+        db.session.add(WeatherData(city='recife' if i % 3 else 'natal', temperature=float(i),
+                                   created_at=START + timedelta(minutes=i // 2)))
+    db.session.commit()
+
+
+def _ids(rows):
+    return [row['id'] for row in rows]
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(START, 42)
+    assert decode_cursor(cursor) == (START, 42)
+    with pytest.raises(ValueError):
+        decode_cursor('não-é-um-cursor')
+
+
+def test_pages_cover_every_row_once_in_order(db):
+    _seed(db)
+    seen, cursor = [], None
+    while True:
+        rows, cursor = get_weather_page(limit=4, cursor=cursor)
+        assert len(rows) <= 4
+        seen.extend(rows)
+        if cursor is None:
+            break
+
+    assert sorted(_ids(seen), reverse=True) == _ids(seen)
+    assert len(set(_ids(seen))) == 25
+
+
+def test_page_filters_by_city_and_projects_fields(db):
+    _seed(db)
+    rows, _ = get_weather_page(limit=100, city='Natal', fields=['temperature'])
+
+    assert len(rows) == 9
+    assert set(rows[0]) == {'id', 'temperature', 'created_at'}
+
+
+def test_unknown_fields_are_rejected(db):
+    with pytest.raises(ValueError):
+        get_weather_page(fields=['senha'])
+
+
+@pytest.mark.parametrize('limit', [0, -1])
+def test_page_limit_must_be_positive(db, limit):
+    _seed(db)
+    with pytest.raises(ValueError):
+        get_weather_page(limit=limit)
+
+
+def test_iter_weather_data_streams_all_rows(db):
+    _seed(db)
+    assert len(list(iter_weather_data(batch_size=7))) == 25
+
+
+@pytest.mark.parametrize('limit, expected', [('0', 1), ('-5', 1), ('3', 3), ('9999', 25)])
+def test_endpoint_clamps_limit(client, db, limit, expected):
+    _seed(db)
+    response = client.get(f'/api/weather/data?limit={limit}')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['data']) == expected
+
+
+def test_endpoint_rejects_non_numeric_limit(client, db):
+    response = client.get('/api/weather/data?limit=abc')
+
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_endpoint_rejects_invalid_cursor(client, db):
+    assert client.get('/api/weather/data?cursor=xyz').status_code == 400
+
+
+def test_export_streams_ndjson(client, db):
+    _seed(db, count=5)
+    response = client.get('/api/weather/data/export?format=ndjson')
+
+    assert response.status_code == 200
+    assert len(response.get_data(as_text=True).splitlines()) == 5
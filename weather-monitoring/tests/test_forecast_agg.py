@@ -0,0 +1,47 @@
+import random
+
+from forecast_agg import aggregate_forecasts, summarize_forecasts
+from weather_api import parse_forecast
+
+START = 1_700_000_000 - 1_700_000_000 % 10800
+OFFSETS = [-10800, 0, 19800, 32400, -36000, None]
+
+
+def _payload(rng, offset, entries=40):
+    items = []
+    for i in range(entries):
+        temp = round(rng.uniform(12, 34), 2)
+        items.append({
+            'dt': START + i * 10800,
+            'main': {'temp': temp, 'temp_min': round(temp - rng.uniform(0, 2), 2),
+                     'temp_max': round(temp + rng.uniform(0, 2), 2), 'humidity': rng.randint(30, 95)},
+            'weather': [{'description': rng.choice(['céu limpo', 'chuva leve']), 'icon': '03d'}],
+            'wind': {'speed': round(rng.uniform(0, 12), 2)},
+            'pop': round(rng.random(), 2)
+        })
+    city = {'name': 'Cidade', 'country': 'BR'}
+    if offset is not None:
+        city['timezone'] = offset
+    return {'list': items, 'city': city}
+
+
+def test_vectorized_aggregation_matches_parse_forecast():
+    rng = random.Random(7)
+    payloads = [_payload(rng, offset) for offset in OFFSETS * 3] + [None]
+
+    for days in (1, 3, 5):
+        expected = [None if p is None else parse_forecast(p, days) for p in payloads]
+        assert aggregate_forecasts(payloads, days) == expected
+
+
+def test_summary_statistics_per_day():
+    rng = random.Random(3)
+    payload = _payload(rng, 0, entries=16)
+    summary = summarize_forecasts([payload, None], days=2)
+
+    assert summary[1] is None
+    assert len(summary[0]) == 2
+    entries = payload['list']
+    first_day = [e for e in entries if (e['dt'] // 86400) == (entries[0]['dt'] // 86400)]
+    assert summary[0][0]['temp_min'] == min(e['main']['temp_min'] for e in first_day)
+    assert summary[0][0]['temp_max'] == max(e['main']['temp_max'] for e in first_day)
@@ -0,0 +1,77 @@
+from geo_cache import GeoCache, geohash_encode, haversine_km
+from weather_api import WeatherAPI
+from weather_cache import TTLCache, WeatherCache, make_key
+
+RECIFE = (-8.05, -34.9)
+OLINDA = (-8.01, -34.86)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _reading(city):
+    return {'city': city, 'country': 'BR', 'temperature': 28.0, 'feels_like': 30.0, 'humidity': 70,
+            'pressure': 1012, 'description': 'Céu Limpo', 'icon': '01d', 'wind_speed': 3.0,
+            'timestamp': '2024-03-10T12:00:00'}
+
+
+def test_geohash_and_distance():
+    assert geohash_encode(57.64911, 10.40744, 6) == 'u4pruy'
+    assert 5 < haversine_km(*RECIFE, *OLINDA) < 7
+
+
+def test_nearest_cities_are_sorted_by_distance():
+    geo = GeoCache()
+    geo.register_city('olinda', *OLINDA)
+    geo.register_city('joao pessoa', -7.12, -34.86)
+    geo.register_city('natal', -5.79, -35.2)
+
+    found = geo.nearest_cities(*RECIFE, radius_km=150)
+
+    assert [key for _, key in found] == ['olinda', 'joao pessoa']
+
+
+# TTLCache.peek foi criado para a busca de vizinhos; o contrato é testado aqui
+def test_peek_does_not_touch_counters_or_lru_order():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    assert cache.peek('a') == 1
+    assert cache.peek('missing') is None
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    # 'a' continua sendo o menos usado
+    cache.set('c', 3)
+    assert cache.peek('a') is None
+
+    clock.now += 10
+    assert cache.peek('b') is None
+
+
+def test_coordinates_served_by_nearby_cached_city_without_counting_cache_lookups():
+    cache = WeatherCache(current_ttl=60)
+    geo = GeoCache()
+    api = WeatherAPI('chave', cache=cache, geo_cache=geo, nearest_radius_km=10,
+                     base_url='http://127.0.0.1:9/data/2.5')
+    key = make_key('Olinda', 'BR')
+    cache.current.set(key, _reading('Olinda'))
+    geo.register_city(key, *OLINDA)
+
+    try:
+        weather = api.get_weather_by_coordinates(*RECIFE)
+    finally:
+        api.close()
+
+    assert weather['city'] == 'Olinda'
+    assert geo.nearest_hits == 1
+    stats = cache.current.stats()
+    assert (stats['hits'], stats['misses']) == (0, 0)
+    # A célula agora responde direto, sem nova busca de vizinhos
+    assert geo.get(*RECIFE) == weather
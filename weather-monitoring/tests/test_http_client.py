@@ -0,0 +1,174 @@
+import os
+import sys
+import threading
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from http_client import CircuitBreaker, CircuitOpenError, ResilientHttpClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+URL = 'http://api.local/data/2.5/weather'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ScriptedAdapter(BaseAdapter):
+    """Transporte sem rede: responde com os status (e cabeçalhos) da lista, em ordem"""
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        status, headers = self.responses.pop(0)
+        self.sent += 1
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = b'{}'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.throttled = []
+
+    def acquire(self):
+        return True
+
+    def on_throttled(self, seconds):
+        self.throttled.append(seconds)
+
+    def stats(self):
+        return {}
+
+
+def _client(responses, **options):
+    options = {'backoff_base': 0, 'backoff_cap': 0.01, **options}
+    client = ResilientHttpClient(**options)
+    adapter = ScriptedAdapter(responses)
+    client.session.mount('http://', adapter)
+    return client, adapter
+
+
+def test_transient_errors_are_retried():
+    client, adapter = _client([(503, {}), (429, {}), (200, {})], max_retries=2)
+
+    response = client.get(URL)
+
+    assert response.status_code == 200
+    assert adapter.sent == 3 and client.retries == 2
+    # Sucesso zera as falhas consecutivas do disjuntor
+    assert client.breaker.stats()['consecutive_failures'] == 0
+
+
+def test_client_errors_are_not_retried():
+    client, adapter = _client([(404, {})], max_retries=2)
+
+    assert client.get(URL).status_code == 404
+    assert adapter.sent == 1 and client.retries == 0
+
+
+def test_last_response_is_returned_when_retries_run_out():
+    client, adapter = _client([(500, {}), (502, {})], max_retries=1)
+
+    assert client.get(URL).status_code == 502
+    assert adapter.sent == 2
+
+
+def test_retry_after_sets_the_delay_and_throttles_the_limiter():
+    limiter = RecordingLimiter()
+    client = ResilientHttpClient(backoff_base=0.01, backoff_cap=5, rate_limiter=limiter)
+    response = requests.Response()
+    response.status_code = 429
+    response.headers['Retry-After'] = '3'
+
+    assert client._retry_delay(0, response) == 3.0
+    assert limiter.throttled == [3.0]
+    # Limitado por backoff_cap
+    client.backoff_cap = 2
+    assert client._retry_delay(0, response) == 2
+
+
+def test_retry_after_from_the_fake_openweather():
+    sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    from fake_openweather import serve
+
+    server = serve(0, latency_ms=0, jitter_ms=0, rate_limit=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/data/2.5/weather"
+    limiter = RecordingLimiter()
+    client = ResilientHttpClient(max_retries=1, backoff_cap=0.01, rate_limiter=limiter)
+    try:
+        assert client.get(url, params={'q': 'Recife'}).status_code == 200
+        # Cota de 1/min esgotada: 429 com Retry-After, repassado ao limitador
+        assert client.get(url, params={'q': 'Recife'}).status_code == 429
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+    assert limiter.throttled == [1.0]
+    assert client.retries == 1
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=FakeClock())
+    client, adapter = _client([(500, {})] * 3, max_retries=2, breaker=breaker)
+
+    assert client.get(URL).status_code == 500
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        client.get(URL)
+    assert adapter.sent == 3
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_half_open_allows_a_single_trial_request():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+
+    clock.now += 29.9
+    assert not breaker.allow_request()
+    clock.now += 0.1
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Enquanto a tentativa de teste não termina, as demais são rejeitadas
+    assert not breaker.allow_request()
+
+    # Falha no teste: abre de novo por mais `reset_timeout`
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_successful_trial_closes_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    client, adapter = _client([(503, {}), (503, {}), (200, {}), (200, {})], max_retries=1, breaker=breaker)
+
+    client.get(URL)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 30
+    assert client.get(URL).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert client.get(URL).status_code == 200
+    assert adapter.sent == 4
@@ -0,0 +1,94 @@
+import json
+import time
+
+import pytest
+
+from live_updates import LiveUpdates, format_event
+
+
+def _wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'tempo esgotado'
+        time.sleep(0.005)
+
+
+def _events(messages):
+    events = []
+    for message in messages:
+        for block in message.strip().split('\n\n'):
+            event, data = block.split('\n')
+            events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+@pytest.fixture
+def readings():
+    return {('Recife', 'BR'): {'temperature': 28.0, 'description': 'Céu Limpo', 'timestamp': 't0'}}
+
+
+@pytest.fixture
+def hub(readings):
+    hub = LiveUpdates(lambda specs: [dict(readings[spec]) if spec in readings else None for spec in specs],
+                      interval=60, queue_size=2)
+    yield hub
+    hub.stop()
+
+
+def _cycle(hub):
+    cycles = hub.cycles
+    hub._wakeup.set()
+    _wait_until(lambda: hub.cycles > cycles)
+
+
+def test_format_event():
+    assert format_event('update', {'a': 'ç'}) == 'event: update\ndata: {"a": "ç"}\n\n'
+
+
+def test_new_subscriber_gets_snapshot_then_only_changes(hub, readings):
+    subscription = hub.subscribe([('Recife', 'BR')])
+    _wait_until(lambda: hub.cycles >= 1)
+
+    [(event, data)] = _events(subscription.get(1))
+    assert event == 'snapshot' and data['data']['temperature'] == 28.0
+
+    readings[('Recife', 'BR')].update(temperature=29.5, timestamp='t1')
+    _cycle(hub)
+    [(event, data)] = _events(subscription.get(1))
+    assert event == 'update'
+    assert data['changes'] == {'temperature': 29.5}
+
+
+def test_timestamp_only_changes_are_not_published(hub, readings):
+    subscription = hub.subscribe([('Recife', 'BR')])
+    _wait_until(lambda: hub.cycles >= 1)
+    subscription.get(1)
+
+    readings[('Recife', 'BR')]['timestamp'] = 't1'
+    _cycle(hub)
+
+    assert subscription.get(0.01) == []
+    assert hub.stats()['unchanged'] == 1
+
+
+def test_slow_subscriber_is_resynced_with_a_snapshot(hub, readings):
+    subscription = hub.subscribe([('Recife', 'BR')])
+    _wait_until(lambda: hub.cycles >= 1)
+    subscription.get(1)
+
+    for temperature in (30.0, 31.0, 32.0):
+        readings[('Recife', 'BR')]['temperature'] = temperature
+        _cycle(hub)
+
+    assert subscription.dropped == 1
+    [(event, data)] = _events(subscription.get(1))
+    assert event == 'snapshot' and data['data']['temperature'] == 32.0
+
+
+def test_unsubscribe_stops_polling_the_city(hub):
+    subscription = hub.subscribe([('recife', 'br')])
+    _wait_until(lambda: hub.cycles >= 1)
+    hub.unsubscribe(subscription)
+
+    assert hub.stats()['cities'] == 0
+    assert hub.stats()['subscribers'] == 0
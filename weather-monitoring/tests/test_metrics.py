@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from metrics import Counter, Gauge, Histogram, Registry
+
+
+def _values(metric):
+    return {labels: value for _, labels, value in metric.samples()}
+
+
+def test_counter_sums_shards_from_every_thread():
+    registry = Registry()
+    counter = Counter('requests_total', 'Requisições', ('route',), registry=registry)
+
+    def work():
+        for _ in range(1000):
+            counter.inc('/api')
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert _values(counter) == {('/api',): 4000.0}
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = Histogram('latency_seconds', 'Latência', ('route',), buckets=(0.1, 1), registry=registry)
+    for value in (0.05, 0.5, 2):
+        histogram.observe(value, '/api')
+
+    text = registry.render()
+
+    assert 'latency_seconds_bucket{route="/api",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/api",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/api"} 3' in text
+
+
+def test_duplicate_metric_names_are_rejected():
+    registry = Registry()
+    Gauge('em_andamento', 'Em andamento', registry=registry)
+    with pytest.raises(ValueError):
+        Gauge('em_andamento', 'Em andamento', registry=registry)
+
+
+def test_requests_are_counted_by_route_and_status(app_module, client):
+    before = _values(app_module.REQUEST_COUNT).get(('GET', '/api/weather/data', '400'), 0)
+
+    client.get('/api/weather/data?limit=abc')
+
+    after = _values(app_module.REQUEST_COUNT)[('GET', '/api/weather/data', '400')]
+    assert after == before + 1
+    assert 'http_request_duration_seconds_bucket' in client.get('/metrics').get_data(as_text=True)
+
+
+def test_in_flight_gauge_settles_when_a_view_raises(app_module, client, monkeypatch):
+    def fail(**kwargs):
+        raise RuntimeError('falha inesperada')
+
+    monkeypatch.setattr(app_module, 'get_weather_page', fail)
+    before = _values(app_module.REQUEST_COUNT).get(('GET', '/api/weather/data', '500'), 0)
+
+    with pytest.raises(RuntimeError):
+        client.get('/api/weather/data')
+
+    assert sum(_values(app_module.REQUESTS_IN_FLIGHT).values()) == 0
+    assert _values(app_module.REQUEST_COUNT)[('GET', '/api/weather/data', '500')] == before + 1
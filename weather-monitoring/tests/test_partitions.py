@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from database import get_all_weather_data, get_weather_by_city, get_weather_page
+from models import WeatherData
+from partitions import add_months, list_partitions, prune_partitions, rollover_partitions
+
+NOW = datetime(2024, 3, 15, 12)
+
+
+def _seed(db, months=3, per_month=4):
+    for offset in range(months):
+        month = add_months(datetime(NOW.year, NOW.month, 1), -offset)
+        for i in range(per_month):
+            db.session.add(WeatherData(city='recife' if i % 2 else 'natal', temperature=20 + i,
+                                       created_at=month.replace(day=i + 1, hour=6)))
+    db.session.commit()
+
+
+def test_add_months_crosses_years():
+    assert add_months(datetime(2024, 1, 1), -1) == datetime(2023, 12, 1)
+    assert add_months(datetime(2023, 11, 1), 3) == datetime(2024, 2, 1)
+
+
+def test_rollover_moves_old_months_into_partitions(db):
+    _seed(db)
+
+    moved = rollover_partitions(db.engine, 'weather_data', 'created_at', hot_months=1, now=NOW)
+
+    assert moved == {'weather_data_202401': 4, 'weather_data_202402': 4}
+    assert list_partitions(db.engine, 'weather_data') == ['weather_data_202401', 'weather_data_202402']
+    assert db.session.query(WeatherData).count() == 4
+
+
+def test_reads_still_see_rows_after_rollover(db):
+    _seed(db)
+    rollover_partitions(db.engine, 'weather_data', 'created_at', hot_months=1, now=NOW)
+
+    assert len(get_all_weather_data()) == 12
+    assert len(get_weather_by_city('Recife')) == 6
+
+    rows, cursor = get_weather_page(limit=20)
+    assert len(rows) == 12 and cursor is None
+    assert rows[-1]['created_at'] == '2024-01-01T06:00:00'
+
+
+def test_history_endpoint_reads_partitioned_queries(app_module, client, db):
+    WeatherQuery = app_module.WeatherQuery
+    db.session.add_all([
+        WeatherQuery(city='Recife', country='BR', temperature=28, timestamp=datetime(2024, 1, 10)),
+        WeatherQuery(city='Natal', country='BR', temperature=29, timestamp=NOW),
+    ])
+    db.session.commit()
+    rollover_partitions(db.engine, 'weather_query', 'timestamp', hot_months=1, now=NOW)
+    app_module.response_cache.clear()
+
+    data = client.get('/api/history').get_json()['data']
+    assert [item['city'] for item in data] == ['Natal', 'Recife']
+
+
+def test_prune_drops_old_partitions_and_keeps_the_rest_readable(db):
+    _seed(db)
+    rollover_partitions(db.engine, 'weather_data', 'created_at', hot_months=1, now=NOW)
+
+    dropped = prune_partitions(db.engine, 'weather_data', retention_months=1, now=NOW)
+
+    assert dropped == ['weather_data_202401']
+    assert len(get_all_weather_data()) == 8
+
+
+def test_rollover_is_idempotent(db):
+    _seed(db)
+    rollover_partitions(db.engine, 'weather_data', 'created_at', hot_months=1, now=NOW)
+
+    assert rollover_partitions(db.engine, 'weather_data', 'created_at', hot_months=1, now=NOW) == {}
+    assert len(get_all_weather_data()) == 12
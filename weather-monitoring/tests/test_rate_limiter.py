@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+from rate_limiter import BACKGROUND, INTERACTIVE, RateLimiter, SQLiteTokenBucket, request_priority
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _bucket(tmp_path, clock, **options):
+    options = {'rate_per_minute': 60, **options}
+    return SQLiteTokenBucket(path=str(tmp_path / 'bucket.db'), clock=clock, **options)
+
+
+def test_bucket_refills_at_the_configured_rate(tmp_path, clock):
+    bucket = _bucket(tmp_path, clock, capacity=2)
+
+    assert [bucket.try_acquire() for _ in range(2)] == [0, 0]
+    assert bucket.try_acquire() == pytest.approx(1.0)
+    clock.now += 0.5
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.try_acquire() == 0
+
+    # O saldo acumulado nunca passa da capacidade
+    clock.now += 1000
+    assert [bucket.try_acquire() for _ in range(3)][-1] > 0
+
+
+def test_state_is_shared_through_the_sqlite_file(tmp_path, clock):
+    first = _bucket(tmp_path, clock, capacity=1)
+    second = _bucket(tmp_path, clock, capacity=1)
+
+    assert first.try_acquire() == 0
+    assert second.try_acquire() > 0
+
+
+def test_reserve_keeps_tokens_in_the_bucket(tmp_path, clock):
+    bucket = _bucket(tmp_path, clock, capacity=10)
+
+    assert [bucket.try_acquire(1, reserve=8) for _ in range(2)] == [0, 0]
+    # Saldo 8: retirar mais um deixaria menos que a reserva
+    assert bucket.try_acquire(1, reserve=8) == pytest.approx(1.0)
+    assert bucket.try_acquire(1) == 0
+
+
+def test_penalize_empties_the_bucket_for_retry_after(tmp_path, clock):
+    limiter = RateLimiter(_bucket(tmp_path, clock, capacity=5), max_wait=0)
+
+    limiter.on_throttled(5)
+
+    assert limiter.bucket.try_acquire() == pytest.approx(6.0)
+    clock.now += 6
+    assert limiter.bucket.try_acquire() == 0
+    assert limiter.stats()['throttled'] == 1
+
+
+def test_background_requests_yield_to_interactive_ones(tmp_path, clock):
+    bucket = _bucket(tmp_path, clock, rate_per_minute=600, capacity=5)
+    limiter = RateLimiter(bucket, max_wait=5, background_reserve=0.2)
+    for _ in range(5):
+        bucket.try_acquire()
+
+    reserves, acquired = [], []
+    try_acquire = bucket.try_acquire
+    bucket.try_acquire = lambda tokens=1, reserve=0: reserves.append(reserve) or try_acquire(tokens, reserve)
+
+    def request(priority):
+        with request_priority(priority):
+            if limiter.acquire():
+                acquired.append(priority)
+
+    interactive = threading.Thread(target=request, args=(INTERACTIVE,))
+    interactive.start()
+    while limiter.stats()['priorities'][INTERACTIVE]['queue_depth'] == 0:
+        time.sleep(0.01)
+    background = threading.Thread(target=request, args=(BACKGROUND,))
+    background.start()
+    time.sleep(0.3)
+
+    # Bucket vazio: só a consulta interativa tenta retirar tokens
+    assert set(reserves) == {0.0}
+    assert limiter.stats()['priorities'][BACKGROUND]['queue_depth'] == 1
+
+    clock.now += 60  # bucket cheio de novo
+    interactive.join(5)
+    background.join(5)
+
+    assert acquired == [INTERACTIVE, BACKGROUND]
+    assert reserves[-1] == 1.0  # segundo plano respeita a reserva de 20%
+
+
+def test_stats_count_acquired_and_rejected_per_priority(tmp_path, clock):
+    limiter = RateLimiter(_bucket(tmp_path, clock, capacity=2), max_wait=0)
+
+    assert limiter.acquire(INTERACTIVE)
+    assert limiter.acquire(INTERACTIVE)
+    assert not limiter.acquire(INTERACTIVE)
+    assert not limiter.acquire(BACKGROUND)
+
+    stats = limiter.stats()
+    assert stats['rate_per_minute'] == 60 and stats['capacity'] == 2
+    assert stats['priorities'][INTERACTIVE]['acquired'] == 2
+    assert stats['priorities'][INTERACTIVE]['rejected'] == 1
+    assert stats['priorities'][BACKGROUND] == {'queue_depth': 0, 'acquired': 0, 'rejected': 1,
+                                               'avg_wait_ms': 0.0, 'max_wait_ms': 0.0}
@@ -0,0 +1,78 @@
+import time
+
+from refresher import CacheRefresher
+from weather_cache import WeatherCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _refresher(clock, hot, fetch, **options):
+    cache = WeatherCache(current_ttl=300, stale_ttl=600, clock=clock)
+    options = {'top_k': 10, 'interval': 0.01, 'refresh_ahead': 60, **options}
+    return cache, CacheRefresher(cache, fetch, lambda limit: hot[:limit], **options)
+
+
+def test_only_entries_expiring_within_refresh_ahead_are_renewed():
+    clock = FakeClock()
+    hot = [('Recife', 'BR', 9), ('Natal', 'BR', 7), ('Belém', 'BR', 5), ('Manaus', 'BR', 3)]
+    fetched = []
+
+    def fetch(city, country):
+        fetched.append(city)
+        return None if city == 'Manaus' else {'city': city}
+
+    cache, refresher = _refresher(clock, hot, fetch)
+    cache.get_current(lambda: {'city': 'Recife'}, 'Recife', 'BR')
+    clock.now += 50
+    cache.get_current(lambda: {'city': 'Natal'}, 'Natal', 'BR')
+    clock.now += 200
+    cache.get_current(lambda: {'city': 'Belém'}, 'Belém', 'BR')
+    clock.now += 55
+
+    refresher.run_once()
+    status = refresher.status()
+
+    # Recife: expirada há 5s; Natal: expira em 45s; Belém: em 245s; Manaus: ausente
+    assert [(item['city'], item['expires_in'], item['refreshed']) for item in status['schedule']] == [
+        ('Recife', -5.0, True), ('Natal', 45.0, True), ('Belém', 245.0, False), ('Manaus', None, False)]
+    assert fetched == ['Recife', 'Natal', 'Manaus']
+    assert (status['refreshed'], status['failures']) == (2, 1)
+    assert status['last_error'] == 'Falha ao renovar Manaus,BR'
+    # Atraso: quanto a entrada ficou expirada antes da renovação
+    assert status['lag'] == {'last': 0.0, 'max': 5.0}
+    assert cache.current_ttl_remaining('Recife', 'BR') == 300
+
+
+def test_top_k_limits_the_hot_cities():
+    clock = FakeClock()
+    hot = [('Recife', 'BR', 9), ('Natal', 'BR', 7)]
+    fetched = []
+    _, refresher = _refresher(clock, hot, lambda city, country: fetched.append(city) or {}, top_k=1)
+
+    refresher.run_once()
+
+    assert fetched == ['Recife']
+    assert refresher.status()['cycles'] == 1
+
+
+def test_failing_cycles_are_counted_and_the_thread_keeps_running():
+    def hot_cities(limit):
+        raise RuntimeError('banco indisponível')
+
+    refresher = CacheRefresher(WeatherCache(), lambda city, country: None, hot_cities, interval=0.01)
+    refresher.start()
+    deadline = time.monotonic() + 5
+    while refresher.status()['failures'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    status = refresher.status()
+    refresher.stop()
+
+    assert status['running'] and status['failures'] >= 2
+    assert status['last_error'] == 'banco indisponível'
+    assert status['cycles'] == 0
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+CURRENT = '/api/weather/current?city=Maceió&country=BR'
+
+
+@pytest.fixture
+def caches(app_module):
+    app_module.weather_cache.clear()
+    app_module.response_cache.clear()
+    return app_module
+
+
+def _counters(app_module):
+    stats = app_module.response_cache.stats()
+    return stats['hits'], stats['misses']
+
+
+def test_etag_is_stable_and_the_body_is_not_rebuilt(caches, client):
+    first = client.get(CURRENT)
+    hits, misses = _counters(caches)
+    second = client.get(CURRENT)
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert first.headers['Last-Modified'] == second.headers['Last-Modified']
+    assert first.get_data() == second.get_data()
+    # Mesma versão (mesmo dict do cache de clima): servido sem reconstruir
+    assert _counters(caches) == (hits + 1, misses)
+
+
+def test_if_none_match_returns_an_empty_304(caches, client):
+    etag = client.get(CURRENT).headers['ETag']
+
+    response = client.get(CURRENT, headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+    assert client.get(CURRENT, headers={'If-None-Match': '"outro"'}).status_code == 200
+
+
+def test_if_modified_since_returns_an_empty_304(caches, client):
+    last_modified = client.get(CURRENT).headers['Last-Modified']
+
+    response = client.get(CURRENT, headers={'If-Modified-Since': last_modified})
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    older = client.get(CURRENT, headers={'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+    assert older.status_code == 200
+
+
+def test_new_version_rebuilds_the_body(caches, client):
+    first = client.get(CURRENT)
+    _, misses = _counters(caches)
+
+    caches.weather_cache.clear()  # nova leitura do clima = nova versão
+    second = client.get(CURRENT, headers={'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 200
+    assert second.get_data() != first.get_data()
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert _counters(caches)[1] == misses + 1
+
+
+def test_history_changes_after_new_queries_are_written(caches, client):
+    assert 'Aracaju' not in [item['city'] for item in client.get('/api/history').get_json()['data']]
+    flushed = caches.query_buffer.stats()['flushed']
+
+    client.get('/api/weather/current?city=Aracaju&country=BR')
+    deadline = time.monotonic() + 5
+    while caches.query_buffer.stats()['flushed'] == flushed and time.monotonic() < deadline:
+        caches.query_buffer.flush()
+        time.sleep(0.01)
+
+    # Novo lote gravado = nova versão: o histórico é reconstruído
+    data = client.get('/api/history').get_json()['data']
+    assert data[0]['city'] == 'Aracaju'
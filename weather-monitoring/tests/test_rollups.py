@@ -0,0 +1,113 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import save_weather_data
+from models import WeatherData, WeatherRollup
+from partitions import rollover_partitions
+from rollups import backfill_rollups, bucket_start, get_aggregates, update_rollups
+
+DAY = datetime(2024, 3, 10)
+
+
+def _add(db, temperature, created_at, humidity=None, city='recife'):
+    db.session.add(WeatherData(city=city, temperature=temperature, humidity=humidity, created_at=created_at))
+
+
+def _snapshot():
+    return sorted((r.city, r.bucket, r.bucket_start, r.count, r.temperature_sum, r.temperature_min,
+                   r.temperature_max, r.humidity_count, r.humidity_min, r.humidity_max)
+                  for r in WeatherRollup.query.all())
+
+
+def test_bucket_start():
+    dt = datetime(2024, 3, 10, 14, 35, 12)
+    assert bucket_start(dt, 'hour') == datetime(2024, 3, 10, 14)
+    assert bucket_start(dt, 'day') == datetime(2024, 3, 10)
+    with pytest.raises(ValueError):
+        bucket_start(dt, 'week')
+
+
+def test_readings_update_hour_and_day_buckets(db):
+    for temperature, humidity in ((20.0, None), (26.0, 70), (23.0, 50)):
+        save_weather_data({'city': 'Recife', 'temperature': temperature, 'humidity': humidity})
+
+    now = datetime.utcnow()
+    day = get_aggregates('RECIFE', 'day', now - timedelta(days=1), now + timedelta(days=1))
+    assert len(day) == 1
+    assert day[0]['count'] == 3
+    assert day[0]['temperature'] == {'min': 20.0, 'max': 26.0, 'avg': 23.0}
+    # Leituras sem umidade não entram na média nem no mínimo
+    assert day[0]['humidity'] == {'min': 50, 'max': 70, 'avg': 60.0}
+
+
+def test_concurrent_upserts_on_the_same_bucket_are_not_lost(app_module, db):
+    threads, per_thread, errors = 6, 15, []
+
+    def worker(n):
+        try:
+            with app_module.app.app_context():
+                for i in range(per_thread):
+                    save_weather_data({'city': 'Recife', 'temperature': float(n * per_thread + i)})
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join(30)
+
+    assert errors == []
+    total = threads * per_thread
+    # Normalmente um único bucket (dois se o teste cruzar a meia-noite)
+    days = WeatherRollup.query.filter_by(city='recife', bucket='day').all()
+    assert sum(day.count for day in days) == total
+    assert sum(day.temperature_sum for day in days) == sum(range(total))
+    assert min(day.temperature_min for day in days) == 0.0
+    assert max(day.temperature_max for day in days) == total - 1
+
+
+def test_backfill_rebuilds_only_the_requested_range(db):
+    for day in range(3):
+        _add(db, 20.0 + day, DAY + timedelta(days=day, hours=9))
+    db.session.commit()
+    backfill_rollups()
+    expected = _snapshot()
+
+    # Agregado fora do intervalo sem leituras correspondentes (ex.: removidas pela retenção)
+    db.session.add(WeatherRollup(city='recife', bucket='day', bucket_start=DAY - timedelta(days=60),
+                                 count=5, temperature_sum=100.0))
+    db.session.commit()
+
+    processed = backfill_rollups(since=DAY + timedelta(days=1), until=DAY + timedelta(days=2))
+
+    assert processed == 1
+    assert len(_snapshot()) == len(expected) + 1
+    assert set(expected) <= set(_snapshot())
+
+
+def test_backfill_matches_incremental_rollups(db):
+    for i in range(6):
+        _add(db, 18.0 + i, DAY + timedelta(hours=i * 5), humidity=40 + i if i % 2 else None)
+    db.session.commit()
+    for weather in WeatherData.query.all():
+        update_rollups(weather)
+    db.session.commit()
+    incremental = _snapshot()
+
+    backfill_rollups()
+
+    assert _snapshot() == incremental
+
+
+def test_backfill_reads_rolled_over_partitions(db):
+    _add(db, 21.0, datetime(2024, 1, 5, 8))
+    _add(db, 25.0, datetime(2024, 3, 5, 8))
+    db.session.commit()
+    rollover_partitions(db.engine, 'weather_data', 'created_at', hot_months=1, now=datetime(2024, 3, 15))
+
+    assert backfill_rollups() == 2
+    days = get_aggregates('recife', 'day', datetime(2024, 1, 1), datetime(2024, 4, 1))
+    assert [day['bucket_start'][:10] for day in days] == ['2024-01-05', '2024-03-05']
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def _run_concurrently(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def _wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return 'clima'
+
+    threads = _run_concurrently(8, lambda: results.append(flight.do('recife', fn)))
+    # Todas as threads já entraram (uma executa, as demais aguardam)
+    _wait_until(lambda: flight.executions + flight.coalesced == 8)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ['clima'] * 8
+    assert flight.stats() == {'executions': 1, 'coalesced': 7, 'in_flight': 0}
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fn():
+        release.wait(5)
+        raise RuntimeError('upstream fora do ar')
+
+    def call():
+        try:
+            flight.do('recife', fn)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = _run_concurrently(4, call)
+    # Todas as threads já entraram (uma executa, as demais aguardam)
+    _wait_until(lambda: flight.executions + flight.coalesced == 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == ['upstream fora do ar'] * 4
+
+
+def test_key_is_released_after_the_call():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do('a', lambda: int('x'))
+
+    assert not flight.is_in_flight('a')
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.executions == 2
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+from timezones import current_offset, forecast_offset, local_day, local_hhmm
+from weather_api import parse_current_weather, parse_forecast
+
+# 2024-03-10 02:00 UTC: ainda dia 9 em São Paulo (-3h), já dia 10 em Tóquio (+9h)
+DT = int(datetime(2024, 3, 10, 2, tzinfo=timezone.utc).timestamp())
+
+
+def _forecast(offset=None, start=DT, entries=8):
+    items = [{
+        'dt': start + i * 10800,
+        'main': {'temp': 20 + i, 'temp_min': 19 + i, 'temp_max': 21 + i, 'humidity': 60},
+        'weather': [{'description': 'céu limpo', 'icon': '01d'}],
+        'wind': {'speed': 3.0},
+        'pop': 0.1
+    } for i in range(entries)]
+    city = {'name': 'Cidade', 'country': 'BR'}
+    if offset is not None:
+        city['timezone'] = offset
+    return {'list': items, 'city': city}
+
+
+def _current(name, offset=None):
+    data = {
+        'name': name,
+        'sys': {'country': 'BR', 'sunrise': DT + 6 * 3600, 'sunset': DT + 18 * 3600},
+        'main': {'temp': 25.0, 'feels_like': 26.0, 'humidity': 70, 'pressure': 1012},
+        'weather': [{'description': 'céu limpo', 'icon': '01d'}],
+        'wind': {'speed': 3.0},
+        'clouds': {'all': 0}
+    }
+    if offset is not None:
+        data['timezone'] = offset
+    return data
+
+
+def test_offsets_come_from_the_payload():
+    assert current_offset({'timezone': -10800}) == -10800
+    assert current_offset({}) is None
+    assert forecast_offset({'city': {'timezone': 32400}}) == 32400
+    assert forecast_offset({'city': {}}) is None
+
+
+def test_local_day_and_time_use_the_offset():
+    assert local_day(DT, -10800) == datetime(2024, 3, 9).toordinal()
+    assert local_day(DT, 32400) == datetime(2024, 3, 10).toordinal()
+    assert local_hhmm(DT, -10800) == '23:00'
+    assert local_hhmm(DT, 32400) == '11:00'
+
+
+def test_forecast_days_follow_the_city_timezone():
+    sao_paulo = parse_forecast(_forecast(-10800))
+    tokyo = parse_forecast(_forecast(32400))
+
+    assert [day['date'] for day in sao_paulo] == ['2024-03-09', '2024-03-10']
+    assert [day['date'] for day in tokyo] == ['2024-03-10', '2024-03-11']
+    assert sao_paulo[0]['temp_min'] == 19 and sao_paulo[0]['temp_max'] == 21
+
+
+def test_forecast_parsing_does_not_depend_on_previous_payloads():
+    without_timezone = _forecast()
+    before = parse_forecast(without_timezone)
+
+    # Respostas de outras cidades (com fuso) não alteram o parsing seguinte
+    parse_forecast(_forecast(32400))
+    parse_current_weather(_current('Cidade', 32400))
+
+    assert parse_forecast(without_timezone) == before
+
+
+def test_current_weather_sun_times_are_local():
+    data = parse_current_weather(_current('Recife', -10800))
+    assert (data['sunrise'], data['sunset']) == ('05:00', '17:00')
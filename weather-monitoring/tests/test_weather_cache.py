@@ -0,0 +1,100 @@
+import threading
+
+from weather_cache import TTLCache, WeatherCache, make_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entry_expires_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set('a', 1)
+
+    clock.now += 9.9
+    assert cache.get('a') == 1
+    clock.now += 0.1
+    assert cache.get('a') is None
+    assert (cache.hits, cache.misses, cache.expirations) == (1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')  # 'b' passa a ser o menos usado
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.evictions == 1
+
+
+def test_stale_value_is_served_within_stale_ttl():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, stale_ttl=5, clock=clock)
+    cache.set('a', 1)
+
+    clock.now += 12
+    assert cache.get('a') is None
+    assert cache.get_stale('a') == 1
+    clock.now += 5
+    assert cache.get_stale('a') is None
+
+
+def test_weather_cache_keys_ignore_case_and_spacing():
+    cache = WeatherCache(current_ttl=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {'city': 'São Paulo'}
+
+    cache.get_current(loader, 'São Paulo', 'BR')
+    cache.get_current(loader, '  são   PAULO ', 'br')
+
+    assert len(calls) == 1
+    assert make_key('São Paulo', 'BR') == make_key('são paulo', ' br ')
+
+
+def test_failed_lookups_are_not_cached():
+    cache = WeatherCache(current_ttl=60)
+    results = iter([None, {'city': 'Recife'}])
+
+    assert cache.get_current(lambda: next(results), 'Recife') is None
+    assert cache.get_current(lambda: next(results), 'Recife') == {'city': 'Recife'}
+
+
+def test_stale_hit_is_served_while_one_background_revalidation_runs():
+    clock = FakeClock()
+    cache = WeatherCache(current_ttl=10, stale_ttl=60, clock=clock)
+    cache.get_current(lambda: {'temp': 1}, 'Recife')
+    clock.now += 11
+
+    started, release, calls, submitted = threading.Event(), threading.Event(), [], []
+
+    def slow_loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'temp': 2}
+
+    submit = cache._revalidator.submit
+    cache._revalidator.submit = lambda *args: submitted.append(args) or submit(*args)
+
+    # Valor antigo na hora, sem esperar a API
+    assert cache.get_current(slow_loader, 'Recife') == {'temp': 1}
+    assert started.wait(5)
+    assert cache.get_current(slow_loader, 'Recife') == {'temp': 1}
+    release.set()
+    cache._revalidator.shutdown(wait=True)
+
+    assert len(submitted) == 1 and len(calls) == 1
+    assert cache.get_current(slow_loader, 'Recife') == {'temp': 2}
+    assert cache.current.stale_hits == 2
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from write_buffer import BLOCK, DROP_NEWEST, DROP_OLDEST, WriteBehindBuffer
+
+
+def test_rows_are_written_in_batches():
+    batches = []
+    buffer = WriteBehindBuffer(batches.append, max_batch=3)
+    for i in range(7):
+        buffer.submit({'id': i})
+    buffer.flush()
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [row['id'] for batch in batches for row in batch] == list(range(7))
+    assert buffer.stats()['flushed'] == 7
+
+
+def test_background_thread_flushes_after_interval():
+    written = threading.Event()
+    rows = []
+
+    def flush(batch):
+        rows.extend(batch)
+        written.set()
+
+    buffer = WriteBehindBuffer(flush, max_batch=100, flush_interval=0.05)
+    buffer.start()
+    try:
+        buffer.submit({'id': 1})
+        assert written.wait(2)
+    finally:
+        buffer.stop()
+    assert rows == [{'id': 1}]
+
+
+def test_stop_drains_the_queue():
+    rows = []
+    buffer = WriteBehindBuffer(rows.extend, max_batch=10, flush_interval=5)
+    buffer.start()
+    for i in range(25):
+        buffer.submit({'id': i})
+    buffer.stop()
+
+    assert len(rows) == 25
+
+
+@pytest.mark.parametrize('policy, kept', [
+    (DROP_OLDEST, [2, 3]),
+    (DROP_NEWEST, [0, 1]),
+    (BLOCK, [0, 1]),
+])
+def test_full_queue_policies(policy, kept):
+    rows = []
+    buffer = WriteBehindBuffer(rows.extend, max_queue=2, policy=policy, block_timeout=0.01)
+    accepted = [buffer.submit({'id': i}) for i in range(4)]
+    buffer.flush()
+
+    assert [row['id'] for row in rows] == kept
+    assert buffer.stats()['dropped'] == 2
+    assert accepted == ([True] * 4 if policy == DROP_OLDEST else [True, True, False, False])
+
+
+def test_failed_batch_is_counted_as_dropped():
+    def flush(batch):
+        raise RuntimeError('banco indisponível')
+
+    buffer = WriteBehindBuffer(flush)
+    buffer.submit({'id': 1})
+    buffer.flush()
+
+    stats = buffer.stats()
+    assert (stats['flush_errors'], stats['dropped'], stats['flushed']) == (1, 1, 0)
+
+
+def test_invalid_policy_is_rejected():
+    with pytest.raises(ValueError):
+        WriteBehindBuffer(list, policy='ignorar')